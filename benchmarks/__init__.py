@@ -0,0 +1,9 @@
+"""Замеры производительности движка Mau.
+
+Все замеры запускаются через `python -m benchmarks`,
+а отдельные сценарии через `python -m benchmarks.<name>`.
+
+- harness: Разогрев, выборки, процентили и сравнение с базовыми замерами.
+- cases: Замеры горячих участков движка.
+- baseline.json: Базовые замеры для проверки на регрессии.
+"""
@@ -0,0 +1,60 @@
+"""Запуск всех замеров из командной строки.
+
+```sh
+python -m benchmarks
+python -m benchmarks --save benchmarks/baseline.json
+python -m benchmarks --compare benchmarks/baseline.json --threshold 0.25
+```
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks.cases import CASES
+from benchmarks.harness import Result, load, regressions, run_all, save
+from mau import log
+
+
+def _report(name: str, res: Result) -> None:
+    print(  # noqa: T201
+        f"{name:<24} p50 {res.p50 / 1e3:>10.2f} us  "
+        f"p90 {res.p90 / 1e3:>10.2f} us  p99 {res.p99 / 1e3:>10.2f} us  "
+        f"{res.per_second:>12,.0f} op/s"
+    )
+
+
+def main() -> None:
+    """Проводит замеры, сохраняет и сравнивает результаты."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="Часть названия")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Множитель числа выборок"
+    )
+    parser.add_argument("--save", type=Path, help="Сохранить результаты")
+    parser.add_argument("--compare", type=Path, help="Базовые результаты")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Допустимый рост медианы, по умолчанию 25%%",
+    )
+    args = parser.parse_args()
+
+    log.disable()
+    cases = [c for c in CASES if args.filter in c.name]
+    results = run_all(cases, args.scale, _report)
+
+    if args.save is not None:
+        save(results, args.save)
+
+    if args.compare is not None:
+        slower = regressions(results, load(args.compare), args.threshold)
+        for name, change in slower:
+            print(f"regression: {name} is {change:+.1%} slower")  # noqa: T201
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Замеры горячих участков движка.
+
+- Взятие карт из колоды и подсчёт карт до покрытия.
+- Поиск подходящих карт в руке игрока.
+- Обработка хода игрока, в том числе с включённым журналом.
+- Полные игры между ботами, в том числе в пакетном движке.
+- Создание, подключение и удаление комнат при 10к и 100к комнатах.
+"""
+
+import random
+from collections.abc import Callable
+from functools import cache
+
+from loguru import logger
+
+from benchmarks.harness import Case, Op
+from mau import log, metrics
+from mau.deck.deck import Deck
+from mau.deck.presets import CLASSIC
+from mau.game.game import MauGame
+from mau.game.player import BaseUser, Player
+from mau.game.timer import TimerAlert
+from mau.scheduler import TimerWheel
+from mau.session import SessionManager
+from mau.sim.players import ScriptedPlayer
+from mau.sim.runner import NoopEventHandler, play_game
+from mau.sim.runner import run_games as _run_games
+from mau.storage import ShardedStorage
+
+PLAYERS = 4
+
+
+def _deck() -> Deck:
+    deck = CLASSIC.deck()
+    deck.shuffle()
+    return deck
+
+
+def _game(room_id: str = "bench") -> MauGame:
+    sm = SessionManager(NoopEventHandler())
+    users = [
+        BaseUser(f"{room_id}:{i}", f"user {i}", "") for i in range(PLAYERS)
+    ]
+    game = sm.create(room_id, users[0])
+    for user in users[1:]:
+        sm.join(room_id, user)
+    game.start(_deck())
+    return game
+
+
+def _playable() -> tuple[MauGame, Player, int]:
+    while True:
+        game = _game()
+        player = game.player
+        cover = player.cover_cards().cover
+        if cover:
+            return game, player, cover[0][0]
+
+
+def deck_take() -> Op:
+    """Взятие одной карты из колоды."""
+    deck = _deck()
+    return lambda: next(deck.take())
+
+
+def deck_count_until_cover() -> Op:
+    """Подсчёт карт в колоде до первой подходящей."""
+    game = _game()
+    return game.deck.count_until_cover
+
+
+def cover_cards() -> Op:
+    """Поиск подходящих карт в руке текущего игрока."""
+    player = _game().player
+    return player.cover_cards
+
+
+def process_turn() -> Op:
+    """Ход первой подходящей картой."""
+    game, player, index = _playable()
+    return lambda: game.process_turn(player, index)
+
+
+def full_game() -> Op:
+    """Полная игра между четырьмя ботами."""
+    sm = SessionManager(NoopEventHandler())
+    bots = [ScriptedPlayer(random.Random(i)) for i in range(PLAYERS)]
+    return lambda: play_game(sm, "bench", 0, bots)
+
+
+@cache
+def _rooms(count: int, shards: int = 0) -> SessionManager[NoopEventHandler]:
+    storage = ShardedStorage(shards) if shards else None
+    sm = SessionManager(NoopEventHandler(), storage)
+    for i in range(count):
+        room_id = f"room{i}"
+        sm.create(room_id, BaseUser(f"{room_id}:0", "owner", ""))
+        sm.join(room_id, BaseUser(f"{room_id}:1", "user", ""))
+    return sm
+
+
+def session(count: int, shards: int = 0) -> Op:
+    """Создание комнаты, подключение игроков и удаление комнаты."""
+    sm = _rooms(count, shards)
+    owner = BaseUser("bench:0", "owner", "")
+    users = [BaseUser(f"bench:{i}", "user", "") for i in range(1, PLAYERS)]
+
+    def op() -> None:
+        sm.create("bench", owner)
+        for user in users:
+            sm.join("bench", user)
+        sm.remove("bench")
+
+    return op
+
+
+def _noop() -> None:
+    pass
+
+
+@cache
+def _wheel(count: int) -> TimerWheel:
+    wheel = TimerWheel()
+    for i in range(count):
+        wheel.schedule((f"room{i}", TimerAlert.GAME), 3600, _noop)
+    return wheel
+
+
+def timers(count: int) -> Op:
+    """Перенос срока хода и шаг колеса среди множества сроков."""
+    wheel = _wheel(count)
+    key = ("bench", TimerAlert.TURN)
+
+    def op() -> None:
+        wheel.schedule(key, 60, _noop)
+        wheel.advance()
+
+    return op
+
+
+def run_games() -> Op:
+    """Серия игр в текущем процессе, как в симуляторе."""
+    return lambda: _run_games(0, 10, ["first"] * PLAYERS, seed=0)
+
+
+@cache
+def _null_sink() -> None:
+    # Сообщения форматируются как обычно, но никуда не пишутся
+    logger.remove()
+    logger.add(lambda _: None, level="DEBUG", filter="mau")
+
+
+def _logged(setup: Callable[[], Op]) -> Callable[[], Op]:
+    """Проводит замер с включённым отладочным журналом."""
+
+    def wrapped() -> Op:
+        _null_sink()
+        log.enable("DEBUG")
+        return setup()
+
+    return wrapped
+
+
+def _measured(setup: Callable[[], Op]) -> Callable[[], Op]:
+    """Проводит замер с включёнными метриками."""
+
+    def wrapped() -> Op:
+        metrics.enable()
+        return setup()
+
+    return wrapped
+
+
+def batch_games() -> Op:
+    """Пакет игр в движке на NumPy."""
+    from mau.sim.batch import run_batch  # noqa: PLC0415
+
+    return lambda: run_batch(0, 1000, PLAYERS)
+
+
+CASES = [
+    Case("deck.take", deck_take, inner=50),
+    Case("deck.count_until_cover", deck_count_until_cover, inner=100),
+    Case("player.cover_cards", cover_cards, inner=100),
+    Case("game.process_turn", process_turn, samples=500),
+    Case("game.full", full_game, samples=100, warmup=5),
+    Case(
+        "log.process_turn",
+        _logged(process_turn),
+        samples=500,
+        teardown=log.disable,
+    ),
+    Case(
+        "metrics.process_turn",
+        _measured(process_turn),
+        samples=500,
+        teardown=metrics.disable,
+    ),
+    Case(
+        "log.game.full",
+        _logged(full_game),
+        samples=50,
+        warmup=5,
+        teardown=log.disable,
+    ),
+    Case("sim.run_games", run_games, ops=10, samples=20, warmup=2),
+    Case("sim.batch", batch_games, ops=1000, samples=10, warmup=1),
+    Case("session.10k", lambda: session(10_000), inner=100),
+    Case("session.100k", lambda: session(100_000), inner=100, warmup=1),
+    Case(
+        "session.sharded.100k",
+        lambda: session(100_000, 16),
+        inner=100,
+        warmup=1,
+    ),
+    Case("timers.100k", lambda: timers(100_000), inner=100, warmup=1),
+]
@@ -0,0 +1,73 @@
+"""Раздача карт.
+
+Раздаёт полные руки 8 игрокам в каждой из множества игр.
+Сравнивает обычную и упакованную колоду.
+
+```sh
+python -m benchmarks.deal
+```
+"""
+
+from collections.abc import Callable
+from time import perf_counter
+
+from mau import log
+from mau.deck.card import CardColor
+from mau.deck.deck import Deck
+from mau.deck.presets import NUMBER, CardGroup, DeckGenerator
+from mau.events import Event
+from mau.game.player import BaseUser
+from mau.session import SessionManager
+
+GAMES = 10_000
+PLAYERS = 8
+
+_COLORS = [CardColor(c) for c in range(6)]
+_GENERATOR = DeckGenerator(
+    [CardGroup(NUMBER, value, _COLORS, 2) for value in range(10)]
+    + [CardGroup(NUMBER, 0, [CardColor.BLACK], 4)]
+)
+
+
+class _NoopHandler:
+    def dispatch(self, event: Event) -> None:
+        pass
+
+
+def _deal(make_deck: Callable[[], Deck]) -> float:
+    sm = SessionManager(_NoopHandler())
+    users = [BaseUser(str(i), f"user {i}", f"@user{i}") for i in range(PLAYERS)]
+
+    start = perf_counter()
+    for game_id in range(GAMES):
+        room_id = str(game_id)
+        game = sm.create(room_id, users[0])
+        for user in users[1:]:
+            sm.join(room_id, user)
+        game.start(make_deck())
+        game.end()
+        sm.remove(room_id)
+    return perf_counter() - start
+
+
+def _list_deck() -> Deck:
+    return _GENERATOR.deck
+
+
+def _packed_deck() -> Deck:
+    return _GENERATOR.template.packed_deck()
+
+
+def main() -> None:
+    """Запускает замер раздачи карт."""
+    log.disable()
+    for name, make_deck in (("list", _list_deck), ("packed", _packed_deck)):
+        total = _deal(make_deck)
+        print(  # noqa: T201
+            f"{name:>8}: {GAMES} games x {PLAYERS} players "
+            f"in {total:.3f}s ({total / GAMES * 1e6:.1f} us/game)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Запуск замеров и сравнение результатов.
+
+Каждый замер состоит из разогрева и серии выборок.
+Перед каждой выборкой заново готовится состояние, а время подготовки
+не учитывается в результате.
+Как и в `timeit`, сборщик мусора отключается на время выборки.
+"""
+
+import gc
+import json
+import random
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import fmean, quantiles
+from time import perf_counter_ns
+
+Op = Callable[[], object]
+CALIBRATION = "calibration"
+
+
+@dataclass(frozen=True, slots=True)
+class Case:
+    """Описание замера.
+
+    Args:
+        name: Название замера.
+        setup: Готовит состояние и возвращает замеряемое действие.
+            Вызывается перед каждой выборкой.
+        inner: Сколько раз вызвать действие за одну выборку.
+        ops: Сколько операций выполняет одно действие.
+            Время пересчитывается на одну операцию.
+        samples: Количество выборок.
+        warmup: Количество выборок для разогрева.
+        teardown: Вызывается после каждой выборки.
+
+    """
+
+    name: str
+    setup: Callable[[], Op]
+    inner: int = 1
+    ops: int = 1
+    samples: int = 200
+    warmup: int = 20
+    teardown: Callable[[], None] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Result:
+    """Результат замера, время одной операции в наносекундах."""
+
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    samples: int
+
+    @property
+    def per_second(self) -> float:
+        """Сколько операций выполняется за секунду."""
+        return 1e9 / self.mean if self.mean else 0.0
+
+
+def _sample(case: Case, seed: int) -> float:
+    random.seed(seed)
+    op = case.setup()
+    gc.disable()
+    try:
+        start = perf_counter_ns()
+        for _ in range(case.inner):
+            op()
+        end = perf_counter_ns()
+    finally:
+        gc.enable()
+        if case.teardown is not None:
+            case.teardown()
+    return (end - start) / (case.inner * case.ops)
+
+
+def _calibration() -> Op:
+    data = list(range(1000))
+    return lambda: sorted(data, key=lambda x: -x)
+
+
+CALIBRATION_CASE = Case(CALIBRATION, _calibration, inner=10)
+"""Эталонный замер на чистом Python.
+
+Показывает общую скорость машины во время замеров.
+"""
+
+
+def run_case(case: Case, scale: float = 1.0) -> Result:
+    """Проводит замер: разогрев, затем серию выборок.
+
+    `scale` уменьшает или увеличивает количество выборок.
+    """
+    samples = max(3, int(case.samples * scale))
+    for i in range(max(1, int(case.warmup * scale))):
+        _sample(case, -1 - i)
+
+    times = [_sample(case, i) for i in range(samples)]
+    q = quantiles(times, n=100, method="inclusive")
+    return Result(fmean(times), q[49], q[89], q[98], samples)
+
+
+def run_all(
+    cases: Iterable[Case],
+    scale: float = 1.0,
+    report: Callable[[str, Result], None] | None = None,
+) -> dict[str, Result]:
+    """Проводит все замеры и возвращает результаты по названиям.
+
+    Первым всегда проводится эталонный замер.
+    """
+    results = {}
+    for case in (CALIBRATION_CASE, *cases):
+        results[case.name] = res = run_case(case, scale)
+        if report is not None:
+            report(case.name, res)
+    return results
+
+
+def save(results: dict[str, Result], path: Path) -> None:
+    """Сохраняет результаты замеров в JSON."""
+    data = {name: asdict(res) for name, res in results.items()}
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def load(path: Path) -> dict[str, Result]:
+    """Загружает сохранённые результаты замеров."""
+    data = json.loads(path.read_text())
+    return {name: Result(**res) for name, res in data.items()}
+
+
+def regressions(
+    results: dict[str, Result],
+    baseline: dict[str, Result],
+    threshold: float,
+) -> list[tuple[str, float]]:
+    """Находит замеры, медиана которых выросла больше чем на `threshold`.
+
+    Медианы поправляются на эталонный замер, чтобы общая скорость
+    машины не влияла на сравнение.
+    Возвращает названия замеров и относительное изменение медианы.
+    Замеры, которых нет в базовых результатах, пропускаются.
+    """
+    speed = 1.0
+    if CALIBRATION in results and CALIBRATION in baseline:
+        speed = results[CALIBRATION].p50 / baseline[CALIBRATION].p50
+
+    res = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if name == CALIBRATION or base is None or base.p50 == 0:
+            continue
+        change = result.p50 / (base.p50 * speed) - 1
+        if change > threshold:
+            res.append((name, change))
+    return res
@@ -0,0 +1,302 @@
+"""Асинхронный менеджер сессий.
+
+Фасад над `SessionManager` для asyncio, в котором каждая комната
+работает как отдельный исполнитель со своим почтовым ящиком.
+Команды одной комнаты выполняются строго по очереди,
+а команды разных комнат чередуются в одном цикле событий.
+Потому клиенту не нужен общий замок вокруг вызовов движка.
+
+Каждая команда возвращает результат вместе с событиями,
+которые она породила:
+
+```py
+sm = AsyncSessionManager(handler)
+res = await sm.play(room_id, user_id, card_index)
+for event in res.events:
+    ...
+```
+
+Задача комнаты запускается только пока в ящике есть команды,
+потому простаивающие комнаты не держат задач.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from loguru import logger
+
+from mau import commands
+from mau.deck.card import CardColor
+from mau.deck.deck import Deck
+from mau.events import AsyncEventHandler, Event
+from mau.game.game import MauGame
+from mau.game.player import BaseUser, Player
+from mau.game.timer import TimerAlert
+from mau.session import SessionManager, TimeoutHandler, skip_on_timeout
+from mau.storage import SessionStorage
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True, slots=True)
+class CommandResult(Generic[_T]):
+    """Результат команды.
+
+    - value: Что вернула команда.
+    - events: События, которые произошли во время команды, по порядку.
+    """
+
+    value: _T
+    events: tuple[Event[Any], ...]
+
+
+class _EventRecorder:
+    """Записывает события текущей команды."""
+
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: list[Event[Any]] | None = None
+
+    def dispatch(self, event: Event[Any]) -> None:
+        """Добавляет событие к текущей команде."""
+        if self.events is not None:
+            self.events.append(event)
+
+
+_Command = tuple[Callable[[], Any], "asyncio.Future[CommandResult[Any]]"]
+
+
+class RoomActor:
+    """Исполнитель команд одной комнаты.
+
+    Команды складываются в почтовый ящик и выполняются по одной.
+    После каждой команды её события отправляются в обработчик,
+    и только затем выполняется следующая команда.
+    """
+
+    __slots__ = ("room_id", "_recorder", "_handler", "_mailbox", "_task")
+
+    def __init__(
+        self,
+        room_id: str,
+        recorder: _EventRecorder,
+        handler: AsyncEventHandler | None = None,
+    ) -> None:
+        self.room_id = room_id
+        self._recorder = recorder
+        self._handler = handler
+        self._mailbox: deque[_Command] = deque()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        """Количество команд в почтовом ящике."""
+        return len(self._mailbox)
+
+    @property
+    def idle(self) -> bool:
+        """Нет ни ожидающих, ни выполняемых команд."""
+        return self._task is None or self._task.done()
+
+    def submit(
+        self, command: Callable[[], _T]
+    ) -> "asyncio.Future[CommandResult[_T]]":
+        """Кладёт команду в почтовый ящик.
+
+        Возвращает будущий результат команды.
+        Должна вызываться из работающего цикла событий.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[CommandResult[_T]] = loop.create_future()
+        self._mailbox.append((command, future))
+        if self.idle:
+            self._task = loop.create_task(self._run())
+        return future
+
+    async def _run(self) -> None:
+        while self._mailbox:
+            command, future = self._mailbox.popleft()
+            if future.cancelled():
+                continue
+
+            events: list[Event[Any]] = []
+            self._recorder.events = events
+            try:
+                value = command()
+            except Exception as e:  # noqa: BLE001
+                future.set_exception(e)
+            else:
+                future.set_result(CommandResult(value, tuple(events)))
+            finally:
+                self._recorder.events = None
+
+            if self._handler is None or not events:
+                # Даём выполниться командам других комнат
+                await asyncio.sleep(0)
+                continue
+            try:
+                await self._handler.dispatch_batch(events)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to dispatch {} events", len(events))
+
+
+class AsyncSessionManager:
+    """Асинхронный менеджер сессий.
+
+    Владеет обычным `SessionManager` и исполнителем для каждой
+    активной комнаты.
+    Все действия с играми нужно выполнять через команды менеджера,
+    иначе их события не попадут в результат и обработчик.
+    Команды из `mau.commands` проверяют что игрок может совершить
+    действие в момент выполнения, а не в момент отправки.
+
+    Истечение времени на ход или игру также выполняется командой
+    в ящике комнаты.
+    Если к тому моменту ход уже сменился, команда ничего не делает.
+
+    Args:
+        handler: Получает события каждой команды одним пакетом.
+        storage: Хранилище игр, как у `SessionManager`.
+        on_timeout: Действие при истечении времени.
+
+    """
+
+    __slots__ = ("_recorder", "_handler", "_sessions", "_actors", "_timeout")
+
+    def __init__(
+        self,
+        handler: AsyncEventHandler | None = None,
+        storage: SessionStorage | None = None,
+        on_timeout: TimeoutHandler = skip_on_timeout,
+    ) -> None:
+        self._recorder = _EventRecorder()
+        self._handler = handler
+        self._timeout = on_timeout
+        self._actors: dict[str, RoomActor] = {}
+        self._sessions = SessionManager(
+            self._recorder, storage, self._post_timeout
+        )
+
+    @property
+    def sessions(self) -> SessionManager[_EventRecorder]:
+        """Обычный менеджер сессий для чтения состояния игр."""
+        return self._sessions
+
+    def actor(self, room_id: str) -> RoomActor:
+        """Возвращает исполнителя комнаты, создавая его при необходимости."""
+        actor = self._actors.get(room_id)
+        if actor is None:
+            actor = self._actors[room_id] = RoomActor(
+                room_id, self._recorder, self._handler
+            )
+        return actor
+
+    def call(
+        self, room_id: str, command: Callable[[MauGame], _T]
+    ) -> "asyncio.Future[CommandResult[_T]]":
+        """Выполняет произвольную команду над игрой в очереди комнаты."""
+        return self.actor(room_id).submit(
+            lambda: command(commands.game(self._sessions, room_id))
+        )
+
+    async def run_timers(self) -> None:
+        """Продвигает колесо таймеров в цикле asyncio."""
+        await self._sessions.run_timers()
+
+    def _post_timeout(self, game: MauGame, alert: TimerAlert) -> None:
+        ticks = game.timer.stat().ticks
+
+        def command() -> None:
+            # Ход уже сменился, пока команда ждала в ящике
+            if game.started and game.timer.stat().ticks == ticks:
+                self._timeout(game, alert)
+
+        self.actor(game.room_id).submit(command)
+
+    def _submit(
+        self, name: str, room_id: str, *args: object
+    ) -> "asyncio.Future[CommandResult[Any]]":
+        command = commands.COMMANDS[name]
+        return self.actor(room_id).submit(
+            lambda: command(self._sessions, room_id, *args)
+        )
+
+    # Управление сессиями
+    # ===================
+
+    async def create(
+        self,
+        room_id: str,
+        owner: BaseUser,
+        min_players: int = 2,
+        max_players: int = 8,
+    ) -> CommandResult[MauGame]:
+        """Создаёт новую игру, см. `SessionManager.create`."""
+        return await self._submit(
+            "create", room_id, owner, min_players, max_players
+        )
+
+    async def join(
+        self, room_id: str, user: BaseUser
+    ) -> CommandResult[Player | None]:
+        """Добавляет пользователя в игру, см. `SessionManager.join`."""
+        return await self._submit("join", room_id, user)
+
+    async def leave(self, user_id: str) -> CommandResult[None]:
+        """Выводит пользователя из его текущей игры."""
+        room_id = self._sessions.storage.get_player(user_id)
+        if room_id is None:
+            raise ValueError("User not in game")
+        return await self._submit("leave", room_id, user_id)
+
+    async def remove(self, room_id: str) -> CommandResult[None]:
+        """Удаляет игру, см. `SessionManager.remove`."""
+        actor = self.actor(room_id)
+        try:
+            return await self._submit("remove", room_id)
+        finally:
+            # Отправка последних событий завершится без исполнителя
+            if not actor:
+                self._actors.pop(room_id, None)
+
+    async def start(self, room_id: str, deck: Deck) -> CommandResult[None]:
+        """Начинает игру в комнате с указанной колодой."""
+        return await self._submit("start", room_id, deck)
+
+    # Действия игроков
+    # ================
+
+    async def play(
+        self, room_id: str, user_id: str, card_index: int
+    ) -> CommandResult[None]:
+        """Игрок кладёт карту из руки на верх колоды."""
+        return await self._submit("play", room_id, user_id, card_index)
+
+    async def take(self, room_id: str, user_id: str) -> CommandResult[None]:
+        """Игрок берёт карты или завершает ход, если уже брал."""
+        return await self._submit("take", room_id, user_id)
+
+    async def shoot(self, room_id: str, user_id: str) -> CommandResult[bool]:
+        """Игрок стреляет из револьвера, возвращает выбыл ли игрок."""
+        return await self._submit("shoot", room_id, user_id)
+
+    async def check_bluff(
+        self, room_id: str, user_id: str
+    ) -> CommandResult[None]:
+        """Игрок проверяет предыдущего игрока на блеф."""
+        return await self._submit("check_bluff", room_id, user_id)
+
+    async def choose_color(
+        self, room_id: str, user_id: str, color: CardColor
+    ) -> CommandResult[None]:
+        """Игрок выбирает цвет для дикой карты."""
+        return await self._submit("choose_color", room_id, user_id, color)
+
+    async def twist_hand(
+        self, room_id: str, user_id: str, other_id: str
+    ) -> CommandResult[None]:
+        """Игрок меняется руками с другим игроком."""
+        return await self._submit("twist_hand", room_id, user_id, other_id)
@@ -0,0 +1,16 @@
+"""Кластер процессов.
+
+Распределяет комнаты между несколькими процессами, у каждого из которых
+свой `SessionManager`.
+Так игры используют все ядра, а не одно.
+
+- ring: Согласованное хеширование комнат по процессам.
+- worker: Процесс с менеджером сессий и протокол обмена командами.
+- router: Маршрутизация команд, индекс игроков и перенос комнат.
+
+```py
+with Cluster(4) as cluster:
+    cluster.call("create", room_id, owner)
+    res = cluster.call("play", room_id, user_id, card_index)
+```
+"""
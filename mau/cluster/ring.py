@@ -0,0 +1,73 @@
+"""Кольцо согласованного хеширования.
+
+Ключи и узлы размещаются на одном кольце хешей.
+Ключ принадлежит первому узлу после него по кольцу.
+При добавлении или удалении узла переезжает только часть ключей,
+примерно одна доля от их общего количества на узел.
+"""
+
+from bisect import bisect
+from collections.abc import Iterator
+from hashlib import blake2b
+
+
+def ring_hash(key: str) -> int:
+    """Хеш ключа на кольце, одинаковый во всех процессах."""
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+
+    Каждый узел занимает на кольце `replicas` точек, чтобы ключи
+    распределялись между узлами равномерно.
+
+    Args:
+        nodes: Начальные узлы кольца.
+        replicas: Количество точек каждого узла.
+
+    """
+
+    __slots__ = ("_replicas", "_hashes", "_nodes")
+
+    def __init__(
+        self, nodes: list[int] | None = None, replicas: int = 64
+    ) -> None:
+        self._replicas = replicas
+        self._hashes: list[int] = []
+        self._nodes: list[int] = []
+        for node in nodes or []:
+            self.add(node)
+
+    def __len__(self) -> int:
+        """Количество узлов кольца."""
+        return len(set(self._nodes))
+
+    def __iter__(self) -> Iterator[int]:
+        """Проходится по узлам кольца."""
+        return iter(sorted(set(self._nodes)))
+
+    def add(self, node: int) -> None:
+        """Добавляет узел на кольцо."""
+        for i in range(self._replicas):
+            h = ring_hash(f"{node}:{i}")
+            pos = bisect(self._hashes, h)
+            self._hashes.insert(pos, h)
+            self._nodes.insert(pos, node)
+
+    def remove(self, node: int) -> None:
+        """Убирает узел с кольца."""
+        points = [
+            (h, n)
+            for h, n in zip(self._hashes, self._nodes, strict=True)
+            if n != node
+        ]
+        self._hashes = [h for h, _ in points]
+        self._nodes = [n for _, n in points]
+
+    def node(self, key: str) -> int:
+        """Возвращает узел, которому принадлежит ключ."""
+        if not self._nodes:
+            raise ValueError("Hash ring is empty")
+        pos = bisect(self._hashes, ring_hash(key)) % len(self._hashes)
+        return self._nodes[pos]
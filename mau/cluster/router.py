@@ -0,0 +1,380 @@
+"""Маршрутизатор кластера.
+
+Запускает процессы кластера и направляет каждую команду в процесс,
+которому принадлежит комната.
+Комнаты распределяются по процессам согласованным хешированием,
+потому при добавлении процесса переезжает только часть комнат.
+Новая комната закрепляется за процессом при создании и остаётся в нём,
+пока её не перенесут через `migrate` или `rebalance`.
+
+Маршрутизатор держит общий индекс активных игроков, чтобы пользователь
+не мог участвовать сразу в нескольких играх даже в разных процессах.
+Индекс обновляется по событиям сессий из ответов процессов.
+"""
+
+import multiprocessing as mp
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from multiprocessing.context import SpawnContext
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, Self
+
+from loguru import logger
+
+from mau.cluster.ring import HashRing
+from mau.cluster.worker import (
+    PUSH,
+    ClusterEvent,
+    ClusterResult,
+    serve,
+)
+from mau.events import GameEvents
+from mau.game.player import BaseUser
+
+if TYPE_CHECKING:
+    from mau.session import RoomImage
+
+EventsHandler = Callable[[Sequence[ClusterEvent]], None]
+
+# Команды, которые отмечают пользователя активным игроком комнаты
+_CLAIMS = ("create", "join")
+
+
+class _Pending:
+    __slots__ = ("future", "name", "room_id", "user_id")
+
+    def __init__(
+        self,
+        future: "Future[ClusterResult]",
+        name: str,
+        room_id: str,
+        user_id: str | None = None,
+    ) -> None:
+        self.future = future
+        self.name = name
+        self.room_id = room_id
+        self.user_id = user_id
+
+
+class _Worker:
+    """Процесс кластера и его канал."""
+
+    __slots__ = ("index", "process", "conn", "pending", "send_lock", "reader")
+
+    def __init__(
+        self,
+        index: int,
+        ctx: SpawnContext,
+        on_message: Callable[["_Worker"], None],
+    ) -> None:
+        self.index = index
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=serve, args=(child,), name=f"mau-worker-{index}", daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.pending: deque[_Pending] = deque()
+        self.send_lock = Lock()
+        self.reader = Thread(
+            target=on_message,
+            args=(self,),
+            name=f"mau-worker-{index}-reader",
+            daemon=True,
+        )
+        self.reader.start()
+
+    def send(self, message: object, pending: _Pending) -> None:
+        with self.send_lock:
+            self.pending.append(pending)
+            self.conn.send(message)
+
+
+class Cluster:
+    """Кластер процессов с менеджерами сессий.
+
+    Команды из `mau.commands` отправляются по названию через `submit`
+    или `call`.
+    Команды одной комнаты выполняются по очереди в её процессе,
+    а команды разных процессов выполняются параллельно.
+    Для asyncio будущий результат можно обернуть в `asyncio.wrap_future`.
+
+    Все события процессов, включая события при истечении времени,
+    передаются в `on_events` из фонового потока.
+
+    Args:
+        workers: Количество процессов, по умолчанию по числу ядер.
+        on_events: Обработчик событий процессов.
+        replicas: Количество точек каждого процесса на кольце.
+
+    """
+
+    __slots__ = (
+        "_ctx",
+        "_workers",
+        "_ring",
+        "_location",
+        "_rooms",
+        "_users",
+        "_migrating",
+        "_route_lock",
+        "_index_lock",
+        "_on_events",
+    )
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        *,
+        on_events: EventsHandler | None = None,
+        replicas: int = 64,
+    ) -> None:
+        self._ctx = mp.get_context("spawn")
+        self._workers: list[_Worker] = []
+        self._ring = HashRing(replicas=replicas)
+        self._location: dict[str, int] = {}
+        self._rooms: dict[str, set[str]] = {}
+        self._users: dict[str, str] = {}
+        # Команды комнат, которые сейчас переносятся
+        self._migrating: dict[str, list[tuple[object, _Pending]]] = {}
+        self._route_lock = Lock()
+        self._index_lock = Lock()
+        self._on_events = on_events
+        for _ in range(workers or mp.cpu_count()):
+            self.add_worker()
+
+    def __enter__(self) -> Self:
+        """Возвращает запущенный кластер."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Останавливает процессы кластера."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Количество процессов кластера."""
+        return len(self._workers)
+
+    def close(self) -> None:
+        """Останавливает все процессы кластера."""
+        for worker in self._workers:
+            with worker.send_lock:
+                worker.conn.send(None)
+        for worker in self._workers:
+            worker.process.join()
+            worker.reader.join()
+            worker.conn.close()
+
+    # Маршрутизация
+    # =============
+
+    def room_of(self, user_id: str) -> str | None:
+        """Возвращает ID комнаты активного игрока."""
+        with self._index_lock:
+            return self._users.get(user_id)
+
+    def rooms(self) -> list[str]:
+        """Возвращает ID всех комнат кластера."""
+        with self._index_lock:
+            return list(self._rooms)
+
+    def worker_of(self, room_id: str) -> int:
+        """Возвращает номер процесса, в котором находится комната."""
+        location = self._location.get(room_id)
+        return self._ring.node(room_id) if location is None else location
+
+    def submit(
+        self, name: str, room_id: str, *args: object
+    ) -> "Future[ClusterResult]":
+        """Отправляет команду в процесс комнаты.
+
+        Для `create` и `join` пользователь сразу отмечается активным
+        игроком комнаты, а если команда не удалась, отметка снимается.
+        Если пользователь уже участвует в игре, вернёт `ValueError`.
+        Команды комнаты, которая сейчас переносится, ждут в очереди
+        и отправляются в её новый процесс после переноса.
+        """
+        future: Future[ClusterResult] = Future()
+        user_id = None
+        with self._route_lock:
+            if name in _CLAIMS:
+                user = args[0]
+                if not isinstance(user, BaseUser):
+                    raise TypeError("Expected user")
+                user_id = user.id
+                self._claim(user_id, room_id)
+            if name == "create":
+                self._location.setdefault(room_id, self._ring.node(room_id))
+            message = (name, room_id, args)
+            pending = _Pending(future, name, room_id, user_id)
+            queue = self._migrating.get(room_id)
+            if queue is not None:
+                queue.append((message, pending))
+                return future
+            worker = self._workers[self.worker_of(room_id)]
+            try:
+                worker.send(message, pending)
+            except Exception:
+                if user_id is not None:
+                    self._release(user_id, room_id)
+                raise
+        return future
+
+    def call(self, name: str, room_id: str, *args: object) -> ClusterResult:
+        """Выполняет команду и дожидается результата."""
+        return self.submit(name, room_id, *args).result()
+
+    def leave(self, user_id: str) -> "Future[ClusterResult]":
+        """Выводит пользователя из его текущей игры."""
+        room_id = self.room_of(user_id)
+        if room_id is None:
+            raise ValueError("User not in game")
+        return self.submit("leave", room_id, user_id)
+
+    def _claim(self, user_id: str, room_id: str) -> None:
+        with self._index_lock:
+            if user_id in self._users:
+                raise ValueError("User already in game")
+            self._users[user_id] = room_id
+
+    def _release(self, user_id: str, room_id: str) -> None:
+        with self._index_lock:
+            if self._users.get(user_id) == room_id:
+                del self._users[user_id]
+
+    def _apply(self, events: Sequence[ClusterEvent]) -> None:
+        """Обновляет индексы по событиям сессий."""
+        with self._index_lock:
+            for e in events:
+                if e.event_type in (
+                    GameEvents.SESSION_START,
+                    GameEvents.SESSION_JOIN,
+                ):
+                    self._users[e.user_id] = e.room_id
+                    self._rooms.setdefault(e.room_id, set()).add(e.user_id)
+                elif e.event_type == GameEvents.SESSION_LEAVE:
+                    if self._users.get(e.user_id) == e.room_id:
+                        del self._users[e.user_id]
+                    self._rooms.get(e.room_id, set()).discard(e.user_id)
+                elif e.event_type == GameEvents.SESSION_END:
+                    for user_id in self._rooms.pop(e.room_id, ()):
+                        if self._users.get(user_id) == e.room_id:
+                            del self._users[user_id]
+                    self._location.pop(e.room_id, None)
+
+    def _read(self, worker: _Worker) -> None:
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            events = message[-1]
+            self._apply(events)
+            if message[0] != PUSH:
+                self._resolve(worker.pending.popleft(), message)
+            if self._on_events is not None and events:
+                try:
+                    self._on_events(events)
+                except Exception:  # noqa: BLE001
+                    logger.exception("Failed to handle {} events", len(events))
+
+        while worker.pending:
+            worker.pending.popleft().future.set_exception(
+                ConnectionError(f"Worker {worker.index} stopped")
+            )
+
+    def _resolve(self, pending: _Pending, message: tuple[Any, ...]) -> None:
+        _, ok, value, events = message
+        if pending.user_id is not None and not any(
+            e.user_id == pending.user_id
+            and e.event_type
+            in (GameEvents.SESSION_START, GameEvents.SESSION_JOIN)
+            for e in events
+        ):
+            self._release(pending.user_id, pending.room_id)
+        if pending.name == "create" and not ok:
+            with self._index_lock:
+                if pending.room_id not in self._rooms:
+                    self._location.pop(pending.room_id, None)
+        if ok:
+            pending.future.set_result(ClusterResult(value, events))
+        else:
+            pending.future.set_exception(value)
+
+    # Перенос комнат
+    # ==============
+
+    def migrate(self, room_id: str, worker: int) -> None:
+        """Переносит комнату в другой процесс через снимок игры.
+
+        Пока комната переносится, новые команды копятся в очереди
+        и после переноса отправляются в процесс, где оказалась комната.
+        Перенос ждёт процессы без замка маршрутов, потому обработчик
+        событий может отправлять команды и во время переноса.
+        Если загрузить комнату не удалось, она возвращается обратно.
+        """
+        with self._route_lock:
+            source = self.worker_of(room_id)
+            if source == worker or room_id in self._migrating:
+                return
+            self._migrating[room_id] = []
+
+        target = source
+        try:
+            res = self._send(source, "export", room_id)
+            image: RoomImage = res.value
+            try:
+                self._send(worker, "import", room_id, image)
+            except Exception:
+                self._send(source, "import", room_id, image)
+                raise
+            target = worker
+        finally:
+            with self._route_lock:
+                if target != source:
+                    self._location[room_id] = target
+                self._flush(room_id, target)
+
+    def _flush(self, room_id: str, target: int) -> None:
+        # Отправляет команды, которые ждали окончания переноса
+        for message, pending in self._migrating.pop(room_id):
+            try:
+                self._workers[target].send(message, pending)
+            except Exception as e:  # noqa: BLE001
+                if pending.user_id is not None:
+                    self._release(pending.user_id, room_id)
+                pending.future.set_exception(e)
+
+    def _send(
+        self, worker: int, name: str, room_id: str, *args: object
+    ) -> ClusterResult:
+        future: Future[ClusterResult] = Future()
+        self._workers[worker].send(
+            (name, room_id, args), _Pending(future, name, room_id)
+        )
+        return future.result()
+
+    def add_worker(self) -> int:
+        """Запускает новый процесс и возвращает его номер.
+
+        Существующие комнаты остаются на месте до вызова `rebalance`.
+        """
+        with self._route_lock:
+            index = len(self._workers)
+            self._workers.append(_Worker(index, self._ctx, self._read))
+            self._ring.add(index)
+            return index
+
+    def rebalance(self) -> int:
+        """Переносит комнаты в процессы, которым они принадлежат по кольцу.
+
+        Возвращает количество перенесённых комнат.
+        """
+        moved = 0
+        for room_id in self.rooms():
+            target = self._ring.node(room_id)
+            if self.worker_of(room_id) != target:
+                self.migrate(room_id, target)
+                moved += 1
+        return moved
@@ -0,0 +1,160 @@
+"""Процесс кластера.
+
+Каждый процесс держит свой `SessionManager` и выполняет команды
+из `mau.commands`, которые приходят по каналу `multiprocessing`.
+
+Протокол обмена:
+
+- Запрос: кортеж `(команда, ID комнаты, аргументы)`, `None` для выхода.
+- Ответ: `(REPLY, успех, значение или исключение, события)`.
+  Ответы идут в порядке запросов.
+- Оповещение: `(PUSH, события)` для событий вне команд,
+  например при истечении времени хода.
+
+Игры, игроки и карты не передаются между процессами.
+Вместо них передаются ID комнаты, ID пользователя и упакованные карты.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any
+
+from loguru import logger
+
+from mau.commands import COMMANDS
+from mau.deck.card import MauCard
+from mau.events import Event, GameEvents
+from mau.game.game import MauGame
+from mau.game.player import Player
+from mau.session import RoomImage, SessionManager
+
+REPLY = 0
+PUSH = 1
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterEvent:
+    """Игровое событие, переданное из процесса кластера.
+
+    В отличие от `Event` вместо игры содержит ID комнаты,
+    а карты в данных события упакованы в числа.
+    """
+
+    room_id: str
+    user_id: str
+    event_type: GameEvents
+    data: Any
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterResult:
+    """Результат команды в процессе кластера.
+
+    - value: Что вернула команда. Игра заменяется на ID комнаты,
+      а игрок на ID пользователя.
+    - events: События, которые произошли во время команды, по порядку.
+    """
+
+    value: Any
+    events: tuple[ClusterEvent, ...]
+
+
+def wire(value: object) -> object:
+    """Заменяет объекты движка на значения, которые можно передать."""
+    if isinstance(value, MauCard):
+        return value.pack()
+    if isinstance(value, MauGame):
+        return value.room_id
+    if isinstance(value, Player):
+        return value.user_id
+    return value
+
+
+class _EventRecorder:
+    """Копит события до следующей отправки."""
+
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: list[ClusterEvent] = []
+
+    def dispatch(self, event: Event[Any]) -> None:
+        """Добавляет событие в очередь на отправку."""
+        self.events.append(
+            ClusterEvent(
+                event.game.room_id,
+                event.user_id,
+                event.event_type,
+                wire(event.data),
+            )
+        )
+
+    def drain(self) -> tuple[ClusterEvent, ...]:
+        """Забирает накопленные события."""
+        events = tuple(self.events)
+        self.events.clear()
+        return events
+
+
+def _export(sm: SessionManager[Any], room_id: str) -> RoomImage:
+    return sm.export_room(room_id)
+
+
+def _import(sm: SessionManager[Any], room_id: str, image: RoomImage) -> str:
+    if image.room_id != room_id:
+        raise ValueError("Room image belongs to another room")
+    sm.import_room(image)
+    return room_id
+
+
+# Команды для переноса комнат между процессами
+_ROOM_COMMANDS: dict[str, Callable[..., Any]] = {
+    "export": _export,
+    "import": _import,
+}
+
+
+def _execute(
+    sm: SessionManager[Any],
+    recorder: _EventRecorder,
+    name: str,
+    room_id: str,
+    args: tuple[object, ...],
+) -> tuple[object, ...]:
+    command = COMMANDS.get(name) or _ROOM_COMMANDS.get(name)
+    if command is None:
+        return (REPLY, False, ValueError(f"Unknown command {name}"), ())
+    try:
+        value = command(sm, room_id, *args)
+    except Exception as e:  # noqa: BLE001
+        return (REPLY, False, e, recorder.drain())
+    return (REPLY, True, wire(value), recorder.drain())
+
+
+def serve(conn: Connection) -> None:
+    """Выполняет команды из канала, пока он не закроется.
+
+    Между командами продвигает колесо таймеров менеджера.
+    """
+    recorder = _EventRecorder()
+    sm = SessionManager(recorder)
+    while True:
+        if conn.poll(sm.timers.resolution):
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            reply = _execute(sm, recorder, *message)
+            try:
+                conn.send(reply)
+            except Exception:  # noqa: BLE001
+                # Значение или исключение нельзя передать
+                logger.exception("Can`t send reply for {}", message[0])
+                conn.send((REPLY, False, ValueError(str(reply[2])), reply[3]))
+
+        sm.timers.advance()
+        if recorder.events:
+            conn.send((PUSH, recorder.drain()))
@@ -0,0 +1,199 @@
+"""Команды клиентов.
+
+Действия клиентов над играми менеджера сессий в виде обычных функций.
+Каждая команда сама находит игру по ID комнаты и проверяет,
+что действие возможно в момент выполнения.
+Если действие невозможно, команда вернёт `ValueError`.
+
+Команды выполняются асинхронным менеджером сессий и процессами кластера.
+По названию команду можно найти в `COMMANDS`.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from mau.deck.card import CardColor
+from mau.deck.deck import Deck
+from mau.enums import GameState
+from mau.game.game import MauGame
+from mau.game.player import BaseUser, Player
+from mau.session import SessionManager
+
+Sessions = SessionManager[Any]
+
+
+@dataclass(frozen=True, slots=True)
+class TurnInfo:
+    """Текущий ход игры.
+
+    - started: Идёт ли игра.
+    - user_id: Чей сейчас ход.
+    - state: Состояние игры.
+    - cover: Индексы карт игрока, которыми можно покрыть верхнюю карту.
+    """
+
+    started: bool
+    user_id: str
+    state: GameState
+    cover: tuple[int, ...]
+
+
+def game(sm: Sessions, room_id: str) -> MauGame:
+    """Возвращает игру комнаты."""
+    res = sm.room(room_id)
+    if res is None:
+        raise ValueError("game not found")
+    return res
+
+
+def _player(sm: Sessions, room_id: str, user_id: str) -> tuple[MauGame, Player]:
+    res = game(sm, room_id)
+    if not res.started or not res.can_play(user_id):
+        raise ValueError("Player can`t play now")
+    return res, res.pm.get(user_id)
+
+
+def turn(sm: Sessions, room_id: str) -> TurnInfo:
+    """Возвращает сведения о текущем ходе игры."""
+    res = game(sm, room_id)
+    if not res.started:
+        return TurnInfo(False, res.owner.user_id, res.state, ())
+    player = res.player
+    cover = res.legal_actions(player).play
+    return TurnInfo(True, player.user_id, res.state, cover)
+
+
+# Управление сессиями
+# ===================
+
+
+def create(
+    sm: Sessions,
+    room_id: str,
+    owner: BaseUser,
+    min_players: int = 2,
+    max_players: int = 8,
+) -> MauGame:
+    """Создаёт новую игру, см. `SessionManager.create`."""
+    return sm.create(room_id, owner, min_players, max_players)
+
+
+def join(sm: Sessions, room_id: str, user: BaseUser) -> Player | None:
+    """Добавляет пользователя в игру, см. `SessionManager.join`."""
+    return sm.join(room_id, user)
+
+
+def leave(sm: Sessions, room_id: str, user_id: str) -> None:
+    """Выводит пользователя из игры."""
+    player = game(sm, room_id).pm.get_or_none(user_id)
+    if player is None:
+        raise ValueError("User not in game")
+    sm.leave(player, room_id)
+
+
+def remove(sm: Sessions, room_id: str) -> None:
+    """Удаляет игру, см. `SessionManager.remove`."""
+    sm.remove(room_id)
+
+
+def start(sm: Sessions, room_id: str, deck: Deck) -> None:
+    """Начинает игру в комнате с указанной колодой."""
+    res = game(sm, room_id)
+    if res.started:
+        raise ValueError("Game already started")
+    res.start(deck)
+
+
+# Действия игроков
+# ================
+
+
+def play(sm: Sessions, room_id: str, user_id: str, card_index: int) -> None:
+    """Игрок кладёт карту из руки на верх колоды.
+
+    Карту можно положить, только если она есть среди доступных
+    действий игрока `MauGame.legal_actions`.
+    """
+    res, player = _player(sm, room_id, user_id)
+    if not 0 <= card_index < len(player.hand):
+        raise ValueError("No such card in hand")
+    if card_index not in res.legal_actions(player).play:
+        raise ValueError("Card can`t be played now")
+    res.process_turn(player, card_index)
+
+
+def take(sm: Sessions, room_id: str, user_id: str) -> None:
+    """Игрок берёт карты или завершает ход, если уже брал."""
+    res, player = _player(sm, room_id, user_id)
+    if res.state in (GameState.TAKE, GameState.CONTINUE):
+        res.next_turn()
+        return
+    if res.state != GameState.SHOTGUN:
+        res.take_cards()
+        if res.state == GameState.SHOTGUN:
+            return
+    player.take_cards()
+
+
+def shoot(sm: Sessions, room_id: str, user_id: str) -> bool:
+    """Игрок стреляет из револьвера вместо взятия карт.
+
+    Возвращает выбыл ли игрок.
+    """
+    res, player = _player(sm, room_id, user_id)
+    if res.state != GameState.SHOTGUN:
+        raise ValueError("Game is not in shotgun state")
+    if not res.shot():
+        res.next_turn()
+        return False
+    sm.leave(player, room_id)
+    if res.started:
+        res.set_state(GameState.NEXT)
+    return True
+
+
+def check_bluff(sm: Sessions, room_id: str, user_id: str) -> None:
+    """Игрок проверяет предыдущего игрока на блеф.
+
+    Проверить можно, только если это есть среди доступных
+    действий игрока `MauGame.legal_actions`.
+    """
+    res, player = _player(sm, room_id, user_id)
+    if not res.legal_actions(player).check_bluff:
+        raise ValueError("Nothing to check")
+    player.check_bluff()
+
+
+def choose_color(
+    sm: Sessions, room_id: str, user_id: str, color: CardColor
+) -> None:
+    """Игрок выбирает цвет для дикой карты."""
+    res, player = _player(sm, room_id, user_id)
+    if res.state != GameState.CHOOSE_COLOR:
+        raise ValueError("Game is not in choose color state")
+    player.choose_color(color)
+
+
+def twist_hand(sm: Sessions, room_id: str, user_id: str, other_id: str) -> None:
+    """Игрок меняется руками с другим игроком."""
+    res, player = _player(sm, room_id, user_id)
+    if res.state != GameState.TWIST_HAND:
+        raise ValueError("Game is not in twist hand state")
+    player.twist_hand(res.pm.get(other_id))
+
+
+COMMANDS: dict[str, Callable[..., Any]] = {
+    "turn": turn,
+    "create": create,
+    "join": join,
+    "leave": leave,
+    "remove": remove,
+    "start": start,
+    "play": play,
+    "take": take,
+    "shoot": shoot,
+    "check_bluff": check_bluff,
+    "choose_color": choose_color,
+    "twist_hand": twist_hand,
+}
@@ -4,14 +4,14 @@
 """
 
 from collections.abc import Callable, Sequence
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
+from mau import log as mau_log
 from mau.enums import GameState
 from mau.events import GameEvents
-from mau.rules import GameRules
 
 if TYPE_CHECKING:
     from mau.deck.card import MauCard
@@ -21,7 +21,8 @@ Callback = Callable[["MauGame", "MauCard"], None]
 
 
 def _auto_select_color(card: "MauCard", game: "MauGame") -> None:
-    logger.debug("Auto choose color for card")
+    if mau_log.DEBUG:
+        logger.debug("Auto choose color for card")
     color_index = game.deck.colors.index(game.deck.top.color)
     if game.pm.reverse == 1:
         color_index += 1
@@ -34,7 +35,8 @@ def _auto_select_color(card: "MauCard", game: "MauGame") -> None:
 
 def log(game: "MauGame", card: "MauCard") -> None:
     """Записывает действие с картой."""
-    logger.debug("Use card {} in game {}", card, game)
+    if mau_log.DEBUG:
+        logger.debug("Use card {} in game {}", card, game)
 
 
 def twist(game: "MauGame", card: "MauCard") -> None:  # noqa: ARG001
@@ -68,9 +70,10 @@ def reverse(game: "MauGame", card: "MauCard") -> None:  # noqa: ARG001
 
 def take(game: "MauGame", card: "MauCard") -> None:
     """Увеличивает счётчик взятия карт на значение карты."""
-    logger.info(
-        "Take counter increase by {} now {}", card.value, game.take_counter
-    )
+    if mau_log.INFO:
+        logger.info(
+            "Take counter increase by {} now {}", card.value, game.take_counter
+        )
     game.take_counter += card.value
 
 
@@ -83,16 +86,18 @@ def take_bluff(game: "MauGame", card: "MauCard") -> None:
     - При правиле `random_color` выбирает случайный цвет.
     - Иначе переходит в состояние выбора цвета.
     """
-    logger.info(
-        "Take counter increase by {} now {}", card.value, game.take_counter
-    )
+    if mau_log.INFO:
+        logger.info(
+            "Take counter increase by {} now {}", card.value, game.take_counter
+        )
     game.take_counter += card.value
     game.bluff_state = (game.player.user_id, game.player.is_bluffing())
 
 
 def reset_color(game: "MauGame", card: "MauCard") -> None:
     """Возвращает цвет карты в норму."""
-    logger.debug("Prepare card {} in game", card)
+    if mau_log.DEBUG:
+        logger.debug("Prepare card {} in game", card)
     card.color = game.deck.wild_color
 
 
@@ -103,16 +108,52 @@ def set_color(game: "MauGame", card: "MauCard") -> None:
     - При правиле `random_color` выбирает случайный цвет.
     - Иначе переходит в состояние выбора цвета.
     """
-    if game.rules.status(GameRules.auto_choose_color):
+    pipeline = game.pipeline
+    if pipeline.auto_choose_color:
         _auto_select_color(card, game)
-    elif not game.rules.status(GameRules.random_color):
+    elif not pipeline.random_color:
         game.set_state(GameState.CHOOSE_COLOR)
 
 
+def _noop(game: "MauGame", card: "MauCard") -> None:  # noqa: ARG001
+    """Ничего не делает."""
+
+
+def fuse(calls: Sequence[Callback]) -> Callback:
+    """Собирает последовательность действий в одну функцию.
+
+    Пустая последовательность становится пустой функцией,
+    единственное действие возвращается как есть,
+    а два действия вызываются подряд без цикла.
+    """
+    calls = tuple(calls)
+    if not calls:
+        return _noop
+    if len(calls) == 1:
+        return calls[0]
+    if len(calls) == 2:  # noqa: PLR2004
+        first, second = calls
+
+        def fused_pair(game: "MauGame", card: "MauCard") -> None:
+            first(game, card)
+            second(game, card)
+
+        return fused_pair
+
+    def fused(game: "MauGame", card: "MauCard") -> None:
+        for call in calls:
+            call(game, card)
+
+    return fused
+
+
 @dataclass(slots=True, frozen=True)
 class CardBehavior:
     """Поведение карты.
 
+    Действия собираются в `on_use` и `on_cover` при создании поведения,
+    потому изменять списки `use` и `cover` после этого бесполезно.
+
     Args:
         name: Название поведения.
         cost: СТоимость такой карты.
@@ -127,3 +168,72 @@ class CardBehavior:
     use: Sequence[Callback]
     cover: Sequence[Callback]
     on_counter: bool = False
+    on_use: Callback = field(init=False, repr=False, compare=False)
+    on_cover: Callback = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Собирает действия поведения и регистрирует его."""
+        object.__setattr__(self, "on_use", fuse(self.use))
+        object.__setattr__(self, "on_cover", fuse(self.cover))
+        register_behavior(self)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Собранные действия не сохраняются, а собираются заново."""
+        return (
+            CardBehavior,
+            (self.name, self.cost, self.use, self.cover, self.on_counter),
+        )
+
+    @property
+    def bid(self) -> int:
+        """Числовой идентификатор поведения, см. `register_behavior`."""
+        return register_behavior(self)
+
+
+# Реестр поведений
+# ================
+
+MAX_BEHAVIORS = 1 << 8
+
+_behaviors: list[CardBehavior] = []
+_behavior_ids: dict[str, int] = {}
+
+
+def register_behavior(card_behavior: CardBehavior) -> int:
+    """Регистрирует поведение и возвращает его числовой идентификатор.
+
+    Поведения регистрируются сами при создании и различаются по имени,
+    как и при сравнении карт.
+    Повторная регистрация поведения с тем же именем вернёт уже выданный
+    идентификатор.
+    Идентификаторы выдаются по порядку регистрации, потому в разных
+    процессах могут отличаться.
+    Снимки и журналы хранят имена поведений и сопоставляют по ним
+    идентификаторы при восстановлении, см. `behavior_id`.
+    """
+    bid = _behavior_ids.get(card_behavior.name)
+    if bid is not None:
+        return bid
+
+    if len(_behaviors) >= MAX_BEHAVIORS:
+        raise ValueError("Too many card behaviors registered")
+
+    bid = len(_behaviors)
+    _behaviors.append(card_behavior)
+    _behavior_ids[card_behavior.name] = bid
+    return bid
+
+
+def behavior_id(name: str) -> int:
+    """Возвращает идентификатор зарегистрированного поведения по имени."""
+    bid = _behavior_ids.get(name)
+    if bid is None:
+        raise ValueError(f"Unknown card behavior {name}")
+    return bid
+
+
+def get_behavior(bid: int) -> CardBehavior:
+    """Возвращает зарегистрированное поведение по идентификатору."""
+    if not 0 <= bid < len(_behaviors):
+        raise ValueError(f"Unknown card behavior id {bid}")
+    return _behaviors[bid]
@@ -1,10 +1,12 @@
 """Игровые карты Mau."""
 
+from array import array
+from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import IntEnum
 from typing import TYPE_CHECKING, Self
 
-from mau.deck.behavior import CardBehavior
+from mau.deck.behavior import CardBehavior, get_behavior
 
 if TYPE_CHECKING:
     from mau.game.game import MauGame
@@ -32,11 +34,40 @@ class CardColor(IntEnum):
     CREAM = 7
 
 
+# Упаковка карт
+# =============
+# Карта упаковывается в одно целое число:
+#
+# | биты  | поле      |
+# | ----- | --------- |
+# | 0-2   | цвет      |
+# | 3-7   | значение  |
+# | 8-14  | стоимость |
+# | 15-22 | поведение |
+
+_COLOR_SHIFT = 0
+_VALUE_SHIFT = 3
+_COST_SHIFT = 8
+_BEHAVIOR_SHIFT = 15
+
+_COLOR_MASK = 0b111
+_VALUE_MASK = 0b11111
+_COST_MASK = 0b1111111
+_BEHAVIOR_MASK = 0b11111111
+
+PACKED_TYPECODE = "I"
+
+
 @dataclass(slots=True)
 class MauCard:
     """Описание каждой карты Mau.
 
     Предоставляет общий функционал для всех карт.
+
+    Карты в колодах и руках - общие экземпляры из `card_prototype`,
+    один на каждый вид карты во всех играх, потому их нельзя изменять.
+    Цвет меняют только разыгрываемая и верхняя карта колоды,
+    для которых игра делает собственную копию через `overlay`.
     """
 
     color: CardColor
@@ -59,12 +90,110 @@ class MauCard:
 
     def on_use(self, game: "MauGame") -> None:
         """Выполняет активное действие карты во время её разыгрывания."""
-        for call in self.behavior.use:
-            call(game, self)
+        self.behavior.on_use(game, self)
 
     def on_cover(self, game: "MauGame") -> None:
         """Подготавливает карту к повторному использованию в колоде."""
-        for call in self.behavior.cover:
-            call(game, self)
+        self.behavior.on_cover(game, self)
 
     __call__ = on_use
+
+    def overlay(self) -> "MauCard":
+        """Возвращает собственную копию карты, цвет которой можно менять."""
+        return MauCard(self.color, self.value, self.cost, self.behavior)
+
+    def prototype(self) -> "MauCard":
+        """Возвращает общий экземпляр карты с теми же свойствами."""
+        return card_prototype(self.color, self.value, self.cost, self.behavior)
+
+    def pack(self) -> int:
+        """Упаковывает карту в целое число.
+
+        Поведение карты записывается по идентификатору из реестра.
+        Если поведение ещё не было зарегистрировано, оно регистрируется.
+        """
+        if not 0 <= self.value <= _VALUE_MASK:
+            raise ValueError(f"Card value {self.value} can`t be packed")
+        if not 0 <= self.cost <= _COST_MASK:
+            raise ValueError(f"Card cost {self.cost} can`t be packed")
+
+        return (
+            (self.color << _COLOR_SHIFT)
+            | (self.value << _VALUE_SHIFT)
+            | (self.cost << _COST_SHIFT)
+            | (self.behavior.bid << _BEHAVIOR_SHIFT)
+        )
+
+    @staticmethod
+    def unpack(code: int) -> "MauCard":
+        """Возвращает общий экземпляр карты по упакованному числу."""
+        card = _unpacked.get(code)
+        if card is None:
+            card = _unpacked.setdefault(
+                code,
+                card_prototype(
+                    packed_color(code),
+                    (code >> _VALUE_SHIFT) & _VALUE_MASK,
+                    (code >> _COST_SHIFT) & _COST_MASK,
+                    get_behavior((code >> _BEHAVIOR_SHIFT) & _BEHAVIOR_MASK),
+                ),
+            )
+        return card
+
+
+# Общие экземпляры карт
+# =====================
+# Поведения различаются по имени, как и при сравнении карт.
+
+_prototypes: dict[tuple[int, int, int, str], MauCard] = {}
+_unpacked: dict[int, MauCard] = {}
+
+
+def card_prototype(
+    color: CardColor, value: int, cost: int, behavior: CardBehavior
+) -> MauCard:
+    """Возвращает общий экземпляр карты.
+
+    Колоды всех игр ссылаются на одни и те же экземпляры,
+    потому память растёт с числом видов карт, а не с числом карт.
+    """
+    key = (color, value, cost, behavior.name)
+    card = _prototypes.get(key)
+    if card is None:
+        card = _prototypes.setdefault(
+            key, MauCard(color, value, cost, behavior)
+        )
+    return card
+
+
+def packed_color(code: int) -> CardColor:
+    """Возвращает цвет упакованной карты без её распаковки."""
+    return CardColor((code >> _COLOR_SHIFT) & _COLOR_MASK)
+
+
+def packed_behavior(code: int) -> int:
+    """Возвращает идентификатор поведения упакованной карты."""
+    return (code >> _BEHAVIOR_SHIFT) & _BEHAVIOR_MASK
+
+
+def repack_behavior(code: int, remap: dict[int, int]) -> int:
+    """Заменяет идентификатор поведения упакованной карты по таблице.
+
+    Идентификаторы, которых нет в таблице, остаются как были.
+    """
+    bid = (code >> _BEHAVIOR_SHIFT) & _BEHAVIOR_MASK
+    if bid not in remap:
+        return code
+    return (code & ~(_BEHAVIOR_MASK << _BEHAVIOR_SHIFT)) | (
+        remap[bid] << _BEHAVIOR_SHIFT
+    )
+
+
+def pack_cards(cards: Iterable[MauCard]) -> "array[int]":
+    """Упаковывает несколько карт в компактный массив."""
+    return array(PACKED_TYPECODE, (card.pack() for card in cards))
+
+
+def unpack_cards(codes: Iterable[int]) -> list[MauCard]:
+    """Распаковывает массив карт обратно в экземпляры карт."""
+    return [MauCard.unpack(code) for code in codes]
@@ -4,14 +4,26 @@
 После эти карты могут перемещаться в руку игрока или обратно в колоду.
 """
 
-from collections.abc import Iterator
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from random import randint, shuffle
 
 from loguru import logger
 
+from mau import log
 from mau.deck import behavior
 from mau.deck.behavior import CardBehavior
-from mau.deck.card import CardColor, MauCard
+from mau.deck.card import (
+    PACKED_TYPECODE,
+    CardColor,
+    MauCard,
+    card_prototype,
+    pack_cards,
+    packed_color,
+    unpack_cards,
+)
+from mau.rng import GameRandom
 
 
 def deck_colors(cards: list[MauCard]) -> list[CardColor]:
@@ -24,15 +36,16 @@ def deck_colors(cards: list[MauCard]) -> list[CardColor]:
 
 
 # TODO: Внедрить прочие поведения
-def _random_behavior() -> CardBehavior:
-    return CardBehavior(name="random", cost=0, use=[behavior.log], cover=[])
+_RANDOM_BEHAVIOR = CardBehavior(
+    name="random", cost=0, use=[behavior.log], cover=[]
+)
 
 
-def random_card() -> MauCard:
+def random_card(rng: GameRandom | None = None) -> MauCard:
     """Отдаёт случайную карту."""
-    value = randint(0, 9)
-    behavior = _random_behavior()
-    return MauCard(CardColor(randint(0, 7)), value, value, behavior)
+    rand = randint if rng is None else rng.randint
+    value = rand(0, 9)
+    return card_prototype(CardColor(rand(0, 7)), value, value, _RANDOM_BEHAVIOR)
 
 
 class Deck:
@@ -42,23 +55,55 @@ class Deck:
     Карты из колоды попадают в руку игроков, а после использования
     возвращаются в колоду.
     Предоставляется методы для добавления, удаления и перемещения карт.
+
+    Верх стопки находится в конце списка `cards`, потому взятие карт
+    не сдвигает оставшиеся карты в колоде.
+
+    Колода перемешивается генератором `rng`, который игра передаёт
+    ей в начале игры.
+    Без генератора используется общий модуль `random`.
+
+    В колоде лежат общие экземпляры карт, см. `card_prototype`.
+    Только верхняя карта - собственная копия, цвет которой можно менять.
     """
 
-    __slots__ = ("cards", "used_cards", "_top", "_colors", "_wild_color")
+    __slots__ = (
+        "cards",
+        "used_cards",
+        "rng",
+        "_top",
+        "_palette",
+        "_colors",
+        "_wild_color",
+    )
 
     def __init__(self, cards: list[MauCard] | None = None) -> None:
         self.cards: list[MauCard] = cards or []
         self.used_cards: list[MauCard] = []
+        self.rng: GameRandom | None = None
         self._top: MauCard | None = None
+        self._palette: list[CardColor] | None = None
         self._colors: list[CardColor] | None = None
         self._wild_color: CardColor | None = None
 
+    @property
+    def palette(self) -> list[CardColor]:
+        """Получает все цвета карт колоды вместе с диким цветом.
+
+        Из них выбирается дикий цвет в начале игры.
+        """
+        if self._palette is None:
+            self._palette = deck_colors(self.cards + self.used_cards)
+        return self._palette
+
     @property
     def colors(self) -> list[CardColor]:
         """Получает список всех используемых цветов в колоде."""
         if self._colors is None:
-            self._colors = deck_colors(self.cards)
-            self._colors.remove(self.wild_color)
+            self._colors = self.palette.copy()
+            # Все дикие карты могут быть уже на руках у игроков
+            if self.wild_color in self._colors:
+                self._colors.remove(self.wild_color)
         return self._colors
 
     @property
@@ -71,14 +116,15 @@ class Deck:
     # TODO: Можно оповещать о событии для смены дикого цвета
     def set_wild(self, color: CardColor) -> None:
         """Устанавливает цвет дикой карты."""
-        logger.info("Set wild color to {}", color)
+        if log.INFO:
+            logger.info("Set wild color to {}", color)
         self._wild_color = color
 
     @property
     def top(self) -> MauCard:
         """Возвращает верхнюю карту из колоды."""
         if self._top is None:
-            self._top = self._get_top_card()
+            self._top = self._get_top_card().overlay()
         return self._top
 
     def shuffle(self) -> None:
@@ -86,42 +132,60 @@ class Deck:
 
         Обязательно перемешивайте карты до начала игры.
         """
-        logger.debug("Shuffle deck")
-        shuffle(self.cards)
+        if log.DEBUG:
+            logger.debug("Shuffle deck")
+        if self.rng is None:
+            shuffle(self.cards)
+        else:
+            self.rng.shuffle(self.cards)
 
     def clear(self) -> None:
         """Очищает колоду карт."""
-        logger.debug("Clear deck")
+        if log.DEBUG:
+            logger.debug("Clear deck")
         self.cards = []
         self.used_cards = []
         self._top = None
 
     def _get_top_card(self) -> MauCard:
         """Устанавливает подходящую верную карту колоды."""
-        for i, card in enumerate(self.cards):
-            if card.color != self.wild_color:
+        for i in range(len(self.cards) - 1, -1, -1):
+            if self.cards[i].color != self.wild_color:
                 return self.cards.pop(i)
         raise ValueError("No suitable card for deck top")
 
-    def take(self, count: int = 1) -> Iterator[MauCard]:
-        """Берёт несколько карт из колоды.
+    def take_many(self, count: int = 1) -> list[MauCard]:
+        """Берёт сразу несколько карт из колоды одним списком.
 
         Используется чтобы дать участнику несколько карт.
+        Карты идут в том же порядке, в каком лежали сверху колоды.
         """
+        if count <= 0:
+            return []
+
         if len(self.cards) < count:
             self._prepared_used_cards()
 
         if len(self.cards) < count:
             raise ValueError("Not enough cards to take")
 
-        for i in range(count):
-            card = self.cards.pop(0)
-            logger.debug("Take {} / {} card: {}", i, count, card)
-            yield card
+        cards = self.cards[-count:]
+        del self.cards[-count:]
+        cards.reverse()
+        if log.DEBUG:
+            logger.debug("Take {} cards: {}", count, cards)
+        return cards
+
+    def take(self, count: int = 1) -> Iterator[MauCard]:
+        """Берёт несколько карт из колоды.
+
+        Используется чтобы дать участнику несколько карт.
+        """
+        yield from self.take_many(count)
 
     def count_until_cover(self) -> int:
         """Получает количество кард в колоде до покрывающей верную."""
-        for i, card in enumerate(self.cards):
+        for i, card in enumerate(reversed(self.cards)):
             if self.top.can_cover(card, self.wild_color):
                 return i + 1
         return 1
@@ -134,7 +198,7 @@ class Deck:
 
     def put(self, card: MauCard) -> None:
         """Возвращает использованную карту в колоду."""
-        self.used_cards.append(card)
+        self.used_cards.append(card.prototype())
 
     def put_top(self, card: MauCard) -> None:
         """Ложит карту на вершину стопки."""
@@ -145,30 +209,221 @@ class Deck:
         self.put(self._top)
         self._top = card
 
+    def pack(self) -> "PackedDeck":
+        """Упаковывает колоду вместе с верхней картой и цветами."""
+        deck = PackedDeck(self.cards)
+        deck.used_cards = self.used_cards
+        deck.rng = self.rng
+        deck._top = self._top  # noqa: SLF001
+        deck._palette = self._palette  # noqa: SLF001
+        deck._colors = self._colors  # noqa: SLF001
+        deck._wild_color = self._wild_color  # noqa: SLF001
+        return deck
+
+
+class PackedDeck(Deck):
+    """Упакованная колода карт.
+
+    Вместо экземпляров карт хранит в стопках массивы упакованных чисел.
+    Карты распаковываются при взятии из колоды и упаковываются обратно,
+    когда возвращаются в колоду.
+    Верхняя карта хранится как есть, поскольку её цвет может меняться.
+
+    Такая колода занимает в разы меньше памяти, а также дёшево
+    копируется и сохраняется.
+    Атрибуты `cards` и `used_cards` возвращают распакованные копии стопок.
+    """
+
+    __slots__ = ("packed", "packed_used")
+
+    def __init__(self, cards: Iterable[MauCard] | None = None) -> None:
+        super().__init__(None)
+        self.packed: array[int] = pack_cards(cards or [])
+        self.packed_used: array[int] = array(PACKED_TYPECODE)
+
+    @property  # type: ignore[override]
+    def cards(self) -> list[MauCard]:
+        """Распакованная копия стопки карт."""
+        return unpack_cards(self.packed)
+
+    @cards.setter
+    def cards(self, cards: Iterable[MauCard]) -> None:
+        self.packed = pack_cards(cards)
+
+    @property  # type: ignore[override]
+    def used_cards(self) -> list[MauCard]:
+        """Распакованная копия стопки использованных карт."""
+        return unpack_cards(self.packed_used)
+
+    @used_cards.setter
+    def used_cards(self, cards: Iterable[MauCard]) -> None:
+        self.packed_used = pack_cards(cards)
+
+    @property
+    def palette(self) -> list[CardColor]:
+        """Получает все цвета карт колоды вместе с диким цветом."""
+        if self._palette is None:
+            codes = (*self.packed, *self.packed_used)
+            self._palette = sorted({packed_color(code) for code in codes})
+        return self._palette
+
+    @property
+    def colors(self) -> list[CardColor]:
+        """Получает список всех используемых цветов в колоде."""
+        if self._colors is None:
+            self._colors = self.palette.copy()
+            if self.wild_color in self._colors:
+                self._colors.remove(self.wild_color)
+        return self._colors
+
+    def shuffle(self) -> None:
+        """Перемешивает доступные карты в колоде."""
+        if log.DEBUG:
+            logger.debug("Shuffle packed deck")
+        if self.rng is None:
+            shuffle(self.packed)
+        else:
+            self.rng.shuffle(self.packed)
+
+    def clear(self) -> None:
+        """Очищает колоду карт."""
+        if log.DEBUG:
+            logger.debug("Clear packed deck")
+        self.packed = array(PACKED_TYPECODE)
+        self.packed_used = array(PACKED_TYPECODE)
+        self._top = None
+
+    def _get_top_card(self) -> MauCard:
+        """Устанавливает подходящую верную карту колоды."""
+        for i in range(len(self.packed) - 1, -1, -1):
+            if packed_color(self.packed[i]) != self.wild_color:
+                return MauCard.unpack(self.packed.pop(i))
+        raise ValueError("No suitable card for deck top")
+
+    def take_many(self, count: int = 1) -> list[MauCard]:
+        """Берёт сразу несколько карт из колоды одним списком."""
+        if count <= 0:
+            return []
+
+        if len(self.packed) < count:
+            self._prepared_used_cards()
+
+        if len(self.packed) < count:
+            raise ValueError("Not enough cards to take")
+
+        codes = self.packed[-count:]
+        del self.packed[-count:]
+        codes.reverse()
+        if log.DEBUG:
+            logger.debug("Take {} cards", count)
+        return unpack_cards(codes)
+
+    def count_until_cover(self) -> int:
+        """Получает количество кард в колоде до покрывающей верную."""
+        for i, code in enumerate(reversed(self.packed)):
+            if self.top.can_cover(MauCard.unpack(code), self.wild_color):
+                return i + 1
+        return 1
+
+    def _prepared_used_cards(self) -> None:
+        """Возвращает использованные карты в колоду."""
+        self.packed.extend(self.packed_used)
+        self.packed_used = array(PACKED_TYPECODE)
+        self.shuffle()
+
+    def put(self, card: MauCard) -> None:
+        """Возвращает использованную карту в колоду."""
+        self.packed_used.append(card.pack())
+
+    def copy(self) -> "PackedDeck":
+        """Возвращает независимую копию колоды."""
+        deck = PackedDeck()
+        deck.packed = array(PACKED_TYPECODE, self.packed)
+        deck.packed_used = array(PACKED_TYPECODE, self.packed_used)
+        deck.rng = self.rng
+        if self._top is not None:
+            deck._top = MauCard.unpack(self._top.pack()).overlay()
+        deck._palette = self._palette
+        deck._colors = None if self._colors is None else self._colors.copy()
+        deck._wild_color = self._wild_color
+        return deck
+
+    def unpack(self) -> Deck:
+        """Распаковывает колоду обратно в экземпляры карт."""
+        deck = Deck(self.cards)
+        deck.used_cards = self.used_cards
+        deck.rng = self.rng
+        deck._top = self._top  # noqa: SLF001
+        deck._palette = self._palette  # noqa: SLF001
+        deck._colors = self._colors  # noqa: SLF001
+        deck._wild_color = self._wild_color  # noqa: SLF001
+        return deck
+
+
+@dataclass(frozen=True, slots=True)
+class DeckTemplate:
+    """Собранный шаблон колоды.
+
+    Хранит готовые карты шаблона, их упакованные числа и цвета,
+    чтобы новая колода получалась копированием вместо повторной сборки.
+    Колоды из шаблона ещё не перемешаны, игра перемешивает их в начале.
+
+    - name: Название шаблона.
+    - cards: Общие экземпляры карт колоды по порядку.
+    - packed: Упакованные карты в том же порядке.
+    - palette: Все цвета карт, из них выбирается дикий цвет.
+    """
+
+    name: str
+    cards: tuple[MauCard, ...]
+    packed: "array[int]"
+    palette: tuple[CardColor, ...]
+
+    @classmethod
+    def compile(cls, name: str, cards: Iterable[MauCard]) -> "DeckTemplate":
+        """Собирает шаблон из карт."""
+        res = tuple(cards)
+        return cls(name, res, pack_cards(res), tuple(deck_colors(list(res))))
+
+    def __len__(self) -> int:
+        """Количество карт в колоде шаблона."""
+        return len(self.cards)
+
+    def deck(self) -> Deck:
+        """Возвращает новую колоду из шаблона."""
+        deck = Deck(list(self.cards))
+        deck._palette = list(self.palette)  # noqa: SLF001
+        return deck
+
+    def packed_deck(self) -> PackedDeck:
+        """Возвращает новую упакованную колоду из шаблона."""
+        deck = PackedDeck()
+        deck.packed = array(PACKED_TYPECODE, self.packed)
+        deck._palette = list(self.palette)  # noqa: SLF001
+        return deck
+
 
 class RandomDeck(Deck):
     """Колода случайных карт."""
 
     def __init__(self) -> None:
         super().__init__(None)
-        self._colors = [CardColor(x) for x in range(8)]
+        self._palette = [CardColor(x) for x in range(8)]
+        self._colors = self._palette.copy()
 
     def _get_top_card(self) -> MauCard:
         """Устанавливает подходящую верную карту колоды."""
         while True:
-            card = random_card()
+            card = random_card(self.rng)
             if card.color != self.wild_color:
                 return card
 
-    def take(self, count: int = 1) -> Iterator[MauCard]:
-        """Берёт несколько карт из колоды.
-
-        Используется чтобы дать участнику несколько карт.
-        """
-        for i in range(count):
-            card = random_card()
-            logger.debug("Take {} / {} card: {}", i, count, card)
-            yield card
+    def take_many(self, count: int = 1) -> list[MauCard]:
+        """Берёт сразу несколько карт из колоды одним списком."""
+        cards = [random_card(self.rng) for _ in range(count)]
+        if log.DEBUG:
+            logger.debug("Take {} cards: {}", count, cards)
+        return cards
 
     def count_until_cover(self) -> int:
         """Получает количество кард в колоде до покрывающей верную."""
@@ -176,7 +431,8 @@ class RandomDeck(Deck):
 
     def put(self, card: MauCard) -> None:
         """Возвращает использованную карту в колоду."""
-        logger.debug("Put {}", card)
+        if log.DEBUG:
+            logger.debug("Put {}", card)
 
     def put_top(self, card: MauCard) -> None:
         """Ложит карту на вершину стопки."""
@@ -2,14 +2,43 @@
 
 Более высокоуровневый класс, для генерации колоды по выбранным правилам
 или по готовым шаблонам.
+
+Также предоставляет поведения классических карт и готовые шаблоны колод.
 """
 
 from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 
+from mau.deck import behavior
 from mau.deck.behavior import CardBehavior
-from mau.deck.card import CardColor, MauCard
-from mau.deck.deck import Deck
+from mau.deck.card import CardColor, MauCard, card_prototype
+from mau.deck.deck import Deck, DeckTemplate
+
+# Поведения классических карт
+# ===========================
+# Названия совпадают с типами карт генератора изображений.
+
+NUMBER = CardBehavior("number", 0, [behavior.log], [])
+BLOCK = CardBehavior("block", 20, [behavior.turn], [])
+REVERSE = CardBehavior("reverse", 20, [behavior.reverse], [])
+TAKE = CardBehavior("take", 20, [behavior.take], [], on_counter=True)
+WILD_COLOR = CardBehavior(
+    "wild+color", 50, [behavior.set_color], [behavior.reset_color]
+)
+WILD_TAKE = CardBehavior(
+    "wild+take",
+    50,
+    [behavior.take_bluff, behavior.set_color],
+    [behavior.reset_color],
+    on_counter=True,
+)
+
+CLASSIC_COLORS = (
+    CardColor.RED,
+    CardColor.YELLOW,
+    CardColor.GREEN,
+    CardColor.BLUE,
+)
 
 
 @dataclass(slots=True, frozen=True)
@@ -32,7 +61,9 @@ class CardGroup:
         """
         for _ in range(self.count):
             for color in self.colors:
-                yield MauCard(color, self.value, self.value, self.behavior)
+                yield card_prototype(
+                    color, self.value, self.value, self.behavior
+                )
 
 
 class DeckGenerator:
@@ -40,6 +71,8 @@ class DeckGenerator:
 
     Собирает колоду карт, используя группы карт.
     Позволяет редактировать правила сборки колоды.
+
+    Собранный шаблон запоминается, пока не изменятся группы карт.
     """
 
     def __init__(
@@ -49,13 +82,53 @@ class DeckGenerator:
     ) -> None:
         self.groups: list[CardGroup] = groups or []
         self.preset_name = preset_name
+        self._template: DeckTemplate | None = None
+        self._compiled: tuple[CardGroup, ...] = ()
 
     def _cards(self) -> Iterator[MauCard]:
         """Получает полный список карт для всего шаблона со всех групп."""
         for group in self.groups:
             yield from group.cards()
 
+    def compile(self) -> DeckTemplate:
+        """Собирает шаблон колоды из групп карт."""
+        return DeckTemplate.compile(self.preset_name, self._cards())
+
+    @property
+    def template(self) -> DeckTemplate:
+        """Собранный шаблон колоды."""
+        groups = tuple(self.groups)
+        if self._template is None or groups != self._compiled:
+            self._template = self.compile()
+            self._compiled = groups
+        return self._template
+
     @property
     def deck(self) -> Deck:
         """Собирает новую колоду из правил."""
-        return Deck(list(self._cards()))
+        return self.template.deck()
+
+
+def classic() -> DeckGenerator:
+    """Классический шаблон колоды из 108 карт.
+
+    - По одному нулю и по две карты от 1 до 9 каждого цвета.
+    - По две карты пропуска хода, разворота и +2 каждого цвета.
+    - По 4 чёрных карты выбора цвета и +4.
+    """
+    groups = [CardGroup(NUMBER, 0, CLASSIC_COLORS, 1)]
+    groups.extend(CardGroup(NUMBER, v, CLASSIC_COLORS, 2) for v in range(1, 10))
+    groups.extend(
+        (
+            CardGroup(BLOCK, 1, CLASSIC_COLORS, 2),
+            CardGroup(REVERSE, 0, CLASSIC_COLORS, 2),
+            CardGroup(TAKE, 2, CLASSIC_COLORS, 2),
+            CardGroup(WILD_COLOR, 0, [CardColor.BLACK], 4),
+            CardGroup(WILD_TAKE, 4, [CardColor.BLACK], 4),
+        )
+    )
+    return DeckGenerator(groups, "classic")
+
+
+# Классический шаблон собирается один раз, игры получают его копии
+CLASSIC = classic().compile()
@@ -3,15 +3,26 @@
 Предоставляет класс события и интерфейс для его обработчика.
 Обработчик событий используется чтобы реагировать на игровое поведение.
 Большинство действий игроков сопровождаются некоторыми действиями.
+
+Для асинхронных клиентов есть `BufferedEventHandler`, который копит
+события за весь ход и отправляет их одним пакетом.
 """
 
 from __future__ import annotations
 
+import asyncio
+from collections import deque
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import IntEnum
 from typing import TYPE_CHECKING, Any, Generic, Protocol, TypeVar
 
+from loguru import logger
+
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
     from mau.game.game import MauGame
 
 _T = TypeVar("_T")
@@ -91,3 +102,115 @@ class EventHandler(Protocol):
 
         Обработка некоторых из событий важна для корректной игры.
         """
+
+
+class AsyncEventHandler(Protocol):
+    """Асинхронный обработчик событий.
+
+    В отличие от `EventHandler` получает сразу все события хода
+    одним пакетом.
+    Используется вместе с `BufferedEventHandler`.
+    """
+
+    async def dispatch_batch(self, events: Sequence[Event[Any]]) -> None:
+        """Обрабатывает пакет игровых событий.
+
+        События в пакете идут в том порядке, в котором произошли.
+        Пакеты приходят в обработчик строго по очереди.
+        """
+
+
+def event_batch(handler: EventHandler) -> AbstractContextManager[None]:
+    """Группирует события обработчика, если он это поддерживает.
+
+    Игра оборачивает в группу каждое действие игрока.
+    Для обычных обработчиков ничего не делает.
+    """
+    batch = getattr(handler, "batch", None)
+    if batch is None:
+        return nullcontext()
+    return batch()
+
+
+class BufferedEventHandler:
+    """Обработчик событий с накоплением.
+
+    Копит события, пока игра выполняет действие игрока, например
+    `MauGame.process_turn` или `MauGame.next_turn`.
+    После завершения действия все накопленные события отправляются
+    в асинхронный обработчик одним пакетом.
+    События вне действий игрока отправляются отдельным пакетом сразу.
+
+    Если запущен цикл событий, пакеты отправляются фоновой задачей.
+    Иначе они ждут вызова `flush()`.
+
+    Текущий пакет свой у каждого потока и задачи asyncio, потому
+    действия в разных комнатах не смешивают и не задерживают
+    события друг друга.
+
+    Args:
+        handler: Асинхронный обработчик пакетов событий.
+
+    """
+
+    __slots__ = ("_handler", "_current", "_pending", "_task")
+
+    def __init__(self, handler: AsyncEventHandler) -> None:
+        self._handler = handler
+        self._current: ContextVar[list[Event[Any]] | None] = ContextVar(
+            f"mau_batch_{id(self)}", default=None
+        )
+        self._pending: deque[list[Event[Any]]] = deque()
+        self._task: asyncio.Task[None] | None = None
+
+    def dispatch(self, event: Event[Any]) -> None:
+        """Добавляет событие в текущий пакет."""
+        buffer = self._current.get()
+        if buffer is None:
+            self._close_batch([event])
+        else:
+            buffer.append(event)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Объединяет все события внутри блока в один пакет.
+
+        Блоки могут быть вложенными, пакет закрывается на внешнем блоке.
+        """
+        if self._current.get() is not None:
+            yield
+            return
+        buffer: list[Event[Any]] = []
+        token = self._current.set(buffer)
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+            self._close_batch(buffer)
+
+    def _close_batch(self, events: list[Event[Any]]) -> None:
+        if not events:
+            return
+        self._pending.append(events)
+
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._send())
+
+    async def _send(self) -> None:
+        while self._pending:
+            events = self._pending.popleft()
+            try:
+                await self._handler.dispatch_batch(events)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to dispatch {} events", len(events))
+
+    async def flush(self) -> None:
+        """Дожидается отправки всех накопленных пакетов."""
+        if self._task is not None:
+            await self._task
+        await self._send()
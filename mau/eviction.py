@@ -0,0 +1,291 @@
+"""Выгрузка неактивных комнат.
+
+Брошенные лобби и игры, в которых все замолчали, не должны занимать
+память менеджера сессий вечно.
+Менеджер с политикой `Eviction` отмечает каждое обращение к комнате
+и периодически выгружает давно неактивные комнаты в хранилище снимков.
+При следующем обращении через `room()` или `player()` комната
+незаметно загружается обратно.
+Комнаты, к которым не обращались дольше `reap_after`, удаляются
+полностью с событием `SESSION_END`.
+
+```py
+eviction = Eviction(SQLiteSpill("spill.db"), idle_ttl=600, max_rooms=50_000)
+sm = SessionManager(handler, eviction=eviction)
+```
+"""
+
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from threading import RLock
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from mau.game.game import MauGame
+
+# Примерный объём комнаты без журнала и карт на руках
+_ROOM_BYTES = 640
+# Примерный объём одной карты на руке в снимке
+_CARD_BYTES = 3
+
+
+class SpillStore(Protocol):
+    """Хранилище снимков выгруженных комнат."""
+
+    def __len__(self) -> int:
+        """Количество выгруженных комнат."""
+
+    def put(self, room_id: str, data: bytes, touched: float) -> None:
+        """Сохраняет снимок комнаты и время последнего обращения к ней."""
+
+    def pop(self, room_id: str) -> bytes | None:
+        """Забирает снимок комнаты из хранилища."""
+
+    def expired(self, before: float) -> list[str]:
+        """Возвращает комнаты, к которым не обращались с момента `before`."""
+
+    def close(self) -> None:
+        """Закрывает хранилище."""
+
+
+class MemorySpill:
+    """Снимки выгруженных комнат в памяти.
+
+    Снимок занимает в сотни раз меньше памяти, чем сама игра.
+    """
+
+    __slots__ = ("_rooms",)
+
+    def __init__(self) -> None:
+        self._rooms: dict[str, tuple[bytes, float]] = {}
+
+    def __len__(self) -> int:
+        """Количество выгруженных комнат."""
+        return len(self._rooms)
+
+    def put(self, room_id: str, data: bytes, touched: float) -> None:
+        """Сохраняет снимок комнаты и время последнего обращения к ней."""
+        self._rooms.pop(room_id, None)
+        self._rooms[room_id] = (data, touched)
+
+    def pop(self, room_id: str) -> bytes | None:
+        """Забирает снимок комнаты из хранилища."""
+        room = self._rooms.pop(room_id, None)
+        return None if room is None else room[0]
+
+    def expired(self, before: float) -> list[str]:
+        """Возвращает комнаты, к которым не обращались с момента `before`."""
+        return [
+            room_id
+            for room_id, (_, touched) in self._rooms.items()
+            if touched < before
+        ]
+
+    def close(self) -> None:
+        """Закрывать нечего, все снимки хранятся в памяти."""
+
+
+class SQLiteSpill:
+    """Снимки выгруженных комнат в файле SQLite.
+
+    Args:
+        path: Путь к файлу базы данных.
+
+    """
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, path: str | Path) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS spill "
+                "(room_id TEXT PRIMARY KEY, data BLOB NOT NULL, touched REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS spill_touched ON spill (touched)"
+            )
+
+    def __len__(self) -> int:
+        """Количество выгруженных комнат."""
+        with closing(self._conn.execute("SELECT count(*) FROM spill")) as cur:
+            return int(cur.fetchone()[0])
+
+    def put(self, room_id: str, data: bytes, touched: float) -> None:
+        """Сохраняет снимок комнаты и время последнего обращения к ней."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO spill VALUES (?, ?, ?)",
+                (room_id, data, touched),
+            )
+
+    def pop(self, room_id: str) -> bytes | None:
+        """Забирает снимок комнаты из хранилища."""
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM spill WHERE room_id = ?", (room_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "DELETE FROM spill WHERE room_id = ?", (room_id,)
+            )
+        return bytes(row[0])
+
+    def expired(self, before: float) -> list[str]:
+        """Возвращает комнаты, к которым не обращались с момента `before`."""
+        with closing(
+            self._conn.execute(
+                "SELECT room_id FROM spill WHERE touched < ?", (before,)
+            )
+        ) as cur:
+            return [row[0] for row in cur]
+
+    def close(self) -> None:
+        """Закрывает базу данных."""
+        self._conn.close()
+
+
+def room_size(game: "MauGame") -> int:
+    """Быстро оценивает объём комнаты без сборки снимка.
+
+    Растёт вместе с журналом команд и картами на руках игроков.
+    """
+    cards = sum(len(pl.hand) for pl in game.pm.iter_all())
+    return _ROOM_BYTES + _CARD_BYTES * cards + len(game.journal.data)
+
+
+class Eviction:
+    """Политика выгрузки неактивных комнат.
+
+    Следит за временем последнего обращения к каждой комнате в памяти
+    в порядке LRU.
+    Выгружает комнаты, к которым не обращались дольше `idle_ttl`,
+    а также самые давние комнаты сверх ограничений количества и объёма.
+    Объём комнаты оценивается через `room_size` и пересчитывается
+    при проверке, если к комнате обращались с прошлого раза.
+
+    Args:
+        spill: Куда выгружать комнаты, по умолчанию в память.
+        idle_ttl: Через сколько секунд без обращений выгружать комнату.
+        reap_after: Через сколько секунд без обращений удалять комнату.
+        max_rooms: Наибольшее число комнат в памяти, 0 без ограничений.
+        max_bytes: Наибольший объём комнат в памяти, 0 без ограничений.
+        interval: Как часто проверять комнаты, в секундах.
+
+    """
+
+    __slots__ = (
+        "spill",
+        "idle_ttl",
+        "reap_after",
+        "max_rooms",
+        "max_bytes",
+        "interval",
+        "lock",
+        "_access",
+        "_sizes",
+        "_dirty",
+        "_total",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        spill: SpillStore | None = None,
+        *,
+        idle_ttl: float = 600,
+        reap_after: float = 86_400,
+        max_rooms: int = 0,
+        max_bytes: int = 0,
+        interval: float = 10,
+    ) -> None:
+        self.spill: SpillStore = spill or MemorySpill()
+        self.idle_ttl = idle_ttl
+        self.reap_after = reap_after
+        self.max_rooms = max_rooms
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.lock = RLock()
+        self._access: OrderedDict[str, float] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._total = 0
+
+    def __len__(self) -> int:
+        """Количество комнат в памяти."""
+        return len(self._access)
+
+    @property
+    def total_bytes(self) -> int:
+        """Объём измеренных комнат в памяти."""
+        return self._total
+
+    def touch(self, room_id: str, now: float) -> None:
+        """Отмечает обращение к комнате.
+
+        Объём комнаты после этого нужно измерить заново.
+        """
+        with self.lock:
+            self._access[room_id] = now
+            self._access.move_to_end(room_id)
+            self._dirty.add(room_id)
+
+    def forget(self, room_id: str) -> None:
+        """Перестаёт следить за комнатой."""
+        with self.lock:
+            self._access.pop(room_id, None)
+            self._dirty.discard(room_id)
+            self._total -= self._sizes.pop(room_id, 0)
+
+    def set_size(self, room_id: str, size: int) -> None:
+        """Запоминает объём комнаты."""
+        with self.lock:
+            self._total += size - self._sizes.get(room_id, 0)
+            self._sizes[room_id] = size
+
+    def dirty(self) -> list[str]:
+        """Забирает комнаты, объём которых нужно измерить заново."""
+        with self.lock:
+            res = list(self._dirty)
+            self._dirty.clear()
+            return res
+
+    def touched(self, room_id: str) -> float | None:
+        """Время последнего обращения к комнате."""
+        return self._access.get(room_id)
+
+    def stale(self, now: float) -> list[str]:
+        """Комнаты в памяти, которые пора удалить полностью."""
+        with self.lock:
+            return self._idle(now - self.reap_after)
+
+    def candidates(self, now: float) -> list[str]:
+        """Комнаты, которые пора выгрузить, от самых давних.
+
+        В список входят неактивные комнаты и комнаты сверх ограничений.
+        """
+        with self.lock:
+            res = self._idle(now - self.idle_ttl)
+            count = len(self._access) - len(res)
+            total = self._total - sum(self._sizes.get(r, 0) for r in res)
+            rooms = iter(list(self._access)[len(res) :])
+            while (self.max_rooms and count > self.max_rooms) or (
+                self.max_bytes and total > self.max_bytes
+            ):
+                room_id = next(rooms, None)
+                if room_id is None:
+                    break
+                res.append(room_id)
+                count -= 1
+                total -= self._sizes.get(room_id, 0)
+            return res
+
+    def _idle(self, before: float) -> list[str]:
+        res = []
+        for room_id, touched in self._access.items():
+            if touched >= before:
+                break
+            res.append(room_id)
+        return res
@@ -0,0 +1,102 @@
+"""Доступные действия игрока.
+
+Клиенты по состоянию игры решают, какие кнопки показать игроку,
+боты выбирают ход, а команды проверяют запросы.
+`MauGame.legal_actions` считает доступные действия один раз
+для каждого состояния игры и отдаёт всем один и тот же результат.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from mau.deck.behavior import take_bluff
+from mau.deck.card import CardColor
+from mau.enums import GameState
+
+if TYPE_CHECKING:
+    from mau.game.game import MauGame
+    from mau.game.player import Player
+
+# Состояния, в которых игрок может взять карты или завершить ход
+_TAKE_STATES = (
+    GameState.NEXT,
+    GameState.CONTINUE,
+    GameState.TAKE,
+    GameState.SHOTGUN,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LegalActions:
+    """Действия, доступные игроку в текущем состоянии игры.
+
+    - play: Индексы карт руки, которые можно разыграть.
+    - take: Можно ли взять карты или завершить ход, если уже брал.
+    - check_bluff: Можно ли проверить предыдущего игрока на блеф.
+    - colors: Цвета, которые можно выбрать для дикой карты.
+    - twist: ID игроков, с которыми можно обменяться руками.
+    - shoot: Можно ли выстрелить из револьвера.
+    """
+
+    play: tuple[int, ...] = ()
+    take: bool = False
+    check_bluff: bool = False
+    colors: tuple[CardColor, ...] = ()
+    twist: tuple[str, ...] = ()
+    shoot: bool = False
+
+    def __bool__(self) -> bool:
+        """Есть ли у игрока хоть одно действие."""
+        return bool(
+            self.play
+            or self.take
+            or self.check_bluff
+            or self.colors
+            or self.twist
+            or self.shoot
+        )
+
+
+NO_ACTIONS = LegalActions()
+
+
+def can_check_bluff(game: "MauGame") -> bool:
+    """Можно ли проверить игрока, положившего дикую карту взятия.
+
+    Проверка доступна, только пока эта карта лежит наверху колоды,
+    а взятие по ней ещё не состоялось.
+    """
+    return (
+        game.state == GameState.NEXT
+        and game.bluff_state is not None
+        and game.take_counter > 0
+        and take_bluff in game.deck.top.behavior.use
+    )
+
+
+def legal_actions(game: "MauGame", player: "Player") -> LegalActions:
+    """Считает действия, доступные игроку.
+
+    Разыгрывать карты могут все, кому `MauGame.can_play` разрешает
+    ходить, остальные действия доступны только текущему игроку.
+    """
+    if not game.started or not game.can_play(player.user_id):
+        return NO_ACTIONS
+
+    play = tuple(i for i, _ in player.cover_cards().cover)
+    if player != game.player:
+        return LegalActions(play=play) if play else NO_ACTIONS
+
+    state = game.state
+    if state == GameState.CHOOSE_COLOR:
+        return LegalActions(colors=tuple(game.deck.colors))
+    if state == GameState.TWIST_HAND:
+        return LegalActions(
+            twist=tuple(pl.user_id for pl in game.pm.iter() if pl != player)
+        )
+    return LegalActions(
+        play=play,
+        take=state in _TAKE_STATES,
+        check_bluff=can_check_bluff(game),
+        shoot=state == GameState.SHOTGUN,
+    )
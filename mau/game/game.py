@@ -1,20 +1,26 @@
 """Игровая сессия."""
 
-from random import choice
+from contextlib import AbstractContextManager
+from threading import RLock
+from typing import Self
 
 from loguru import logger
 
+from mau import log
 from mau.deck.card import CardColor, MauCard
 from mau.deck.deck import Deck
 from mau.enums import GameState
-from mau.events import EventHandler, GameEvents
+from mau.events import EventHandler, GameEvents, event_batch
+from mau.game.actions import LegalActions, legal_actions
+from mau.game.journal import CommandLog, Op, game_action, replay
+from mau.game.pipeline import TurnPipeline, build_pipeline
 from mau.game.player import BaseUser, Player
 from mau.game.player_manager import GameReverse, PlayerManager
 from mau.game.shotgun import Shotgun
+from mau.game.snapshot import dump_game, load_game
 from mau.game.timer import GameTimer
-from mau.rules import GameRules, RuleSet
-
-_MIN_SHOTGUN_TAKE_COUNTER = 3
+from mau.rng import GameRandom
+from mau.rules import RuleSet
 
 
 class MauGame:
@@ -22,6 +28,24 @@ class MauGame:
 
     Каждая отдельная игра привязывается к конкретному чату.
     Предоставляет методы для обработки карт и очерёдности ходов.
+
+    Сама игра не потокобезопасна.
+    Если к игре обращаются из нескольких потоков, все её изменения
+    должны выполняться под замком `lock`:
+
+    ```py
+    with game.lock:
+        game.process_turn(player, card_index)
+    ```
+
+    Все случайные решения игры принимает её генератор `rng`,
+    засеянный значением `seed`, а действия записываются в журнал
+    `journal`.
+    По ним игру можно повторить через `MauGame.replay`.
+
+    Номер версии `version` только растёт: после каждого действия
+    и перед каждым событием игры.
+    По нему запоминаются доступные действия игроков `legal_actions`.
     """
 
     def __init__(
@@ -30,9 +54,14 @@ class MauGame:
         event_handler: EventHandler,
         room_id: str,
         owner: BaseUser,
+        seed: int | None = None,
     ) -> None:
         self.room_id = room_id
+        self.rng = GameRandom(seed)
+        self.journal = CommandLog(self.rng.seed, room_id, owner, player_manager)
         self.rules = RuleSet()
+        # Ход собирается заново при каждом начале игры
+        self.pipeline: TurnPipeline = build_pipeline(self.rules.state)
         self.pm = player_manager
         self.deck = Deck()
         self.event_handler: EventHandler = event_handler
@@ -46,8 +75,53 @@ class MauGame:
         self.take_counter: int = 0
         self.start_cards = 7
         self.state: GameState = GameState.NEXT
-        self.shotgun = Shotgun()
+        self.shotgun = Shotgun(self.rng)
         self.timer = GameTimer()
+        self.lock = RLock()
+        self.version = 0
+        self._actions: dict[str, LegalActions] = {}
+        self._actions_key = (-1, -1)
+
+    @classmethod
+    def restore(cls, data: bytes, event_handler: EventHandler) -> Self:
+        """Восстанавливает игру из снимка.
+
+        Обработчик событий не входит в снимок, потому передаётся заново.
+        """
+        return load_game(cls, data, event_handler)
+
+    @classmethod
+    def replay(
+        cls,
+        journal: bytes,
+        event_handler: EventHandler,
+        snapshot: bytes | None = None,
+    ) -> Self:
+        """Повторяет игру по её журналу команд.
+
+        Журнал восстановленной игры повторяется поверх её снимка `snapshot`.
+        Все события игры заново отправляются в обработчик.
+        """
+        base = (
+            None if snapshot is None else cls.restore(snapshot, event_handler)
+        )
+        return replay(cls, journal, event_handler, base)
+
+    def snapshot(self) -> bytes:
+        """Сохраняет полное состояние игры в компактный снимок.
+
+        В снимок входят игроки и их порядок, колода, правила, таймер,
+        револьвер, состояние хода, генератор случайных чисел и журнал.
+        Его можно сохранить или передать в другой процесс.
+        """
+        return dump_game(self)
+
+    def batch(self) -> AbstractContextManager[None]:
+        """Объединяет события одного действия игрока в пакет.
+
+        Используется, если обработчик событий поддерживает пакеты.
+        """
+        return event_batch(self.event_handler)
 
     @property
     def player(self) -> Player:
@@ -59,6 +133,11 @@ class MauGame:
         """Возвращает владельца игры."""
         return self.pm.get(self._owner_id)
 
+    @property
+    def owner_id(self) -> str:
+        """Возвращает ID владельца игры."""
+        return self._owner_id
+
     def is_owner(self, player: Player) -> bool:
         """Проверяет что игрок является владельцем комнаты."""
         return player.user_id == self._owner_id
@@ -69,85 +148,73 @@ class MauGame:
         if player is None:
             return False
 
-        return self.player == player or self.rules.status(
-            GameRules.intervention
-        )
+        return self.player == player or self.pipeline.intervention
 
-    def can_cover(self, player: Player, card: MauCard) -> bool:
-        """Проверяет может ли текущая карта покрыть верхнюю из колоды."""
-        top = self.deck.top
+    def legal_actions(self, player: Player) -> LegalActions:
+        """Возвращает действия, доступные игроку.
 
-        if (
-            self.rules.status(GameRules.intervention)
-            and card != top
-            and player != self.player
-        ):
-            return False
+        Результат запоминается до следующего изменения игры или правил.
+        """
+        key = (self.version, self.rules.state)
+        if key != self._actions_key:
+            self._actions.clear()
+            self._actions_key = key
+        res = self._actions.get(player.user_id)
+        if res is None:
+            res = self._actions[player.user_id] = legal_actions(self, player)
+        return res
 
-        # Для режима побочного выброса
-        if (
-            self.state == GameState.CONTINUE
-            and self.rules.status(GameRules.side_effect)
-            and card.cost == top.cost
-        ):
-            return True
-
-        # Совмещение нескольких карт
-        return (
-            (top.behavior.on_counter and self.take_counter > 0)
-            and not top.behavior.on_counter
-            and not self.rules.status(GameRules.deferred_take)
-        )
+    def can_cover(self, player: Player, card: MauCard) -> bool:
+        """Проверяет может ли текущая карта покрыть верхнюю из колоды."""
+        return self.pipeline.can_cover(self, player, card)
 
+    @game_action(Op.TAKE)
     def take_cards(self) -> None:
         """Взятие карт игроков.
 
         Используется когда игрок хочет взять карты.
         """
-        if (
-            self.rules.status(GameRules.take_until_cover)
-            and self.take_counter == 0
-        ):
-            self.take_counter = self.deck.count_until_cover()
-
-        if (
-            self.take_counter > _MIN_SHOTGUN_TAKE_COUNTER
-            and (self.rules.status(GameRules.shotgun))
-            and self.state != GameState.SHOTGUN
-        ):
-            self.set_state(GameState.SHOTGUN)
+        self.pipeline.take(self)
 
     # управление игрой
     # ================
 
+    @game_action(Op.START)
     def start(self, deck: Deck) -> None:
         """Начинает новую игру в чате."""
-        logger.info("Start new game in chat {}", self.room_id)
+        if log.INFO:
+            logger.info("Start new game in chat {}", self.room_id)
         self.deck = deck
+        self.deck.rng = self.rng
         self.deck.shuffle()
+        self.pipeline = build_pipeline(self.rules.state)
 
         wild_color = (
-            choice(self.deck.colors)
-            if self.rules.status(GameRules.special_wild)
+            self.rng.choice(self.deck.palette)
+            if self.pipeline.special_wild
             else CardColor.BLACK
         )
         self.deck.set_wild(wild_color)
 
-        self.pm.start()
+        self.pm.start(self.rng)
         self.timer.start()
         self.started = True
         self.owner.dispatch(GameEvents.GAME_START)
         self.deck.top(self)
 
+    @game_action(Op.END)
     def end(self) -> None:
         """Завершает текущую игру."""
         self.pm.end()
+        self.timer.stop()
         self.started = False
         self.owner.dispatch(GameEvents.GAME_END)
 
+    @game_action(Op.JOIN)
     def join_player(self, user: BaseUser) -> Player | None:
         """Добавляет игрока в игру."""
-        logger.info("Joining {} in game with id {}", user, self.room_id)
+        if log.INFO:
+            logger.info("Joining {} in game with id {}", user, self.room_id)
         player = self.pm.get_or_none(user.id)
         if player is not None:
             return player
@@ -162,23 +229,28 @@ class MauGame:
             player.on_join()
         return player
 
+    @game_action(Op.LEAVE)
     def leave_player(self, player: Player) -> None:
         """Удаляет пользователя из игры."""
-        logger.info("Leaving {} game with id {}", player, self.room_id)
+        if log.INFO:
+            logger.info("Leaving {} game with id {}", player, self.room_id)
         if not self.started:
             self.pm.remove(player.user_id)
+            if self.is_owner(player) and len(self.pm):
+                self._owner_id = self.pm.cur(0).user_id
             return
 
         is_win = len(player.hand) == 0
         player.dispatch(GameEvents.GAME_LEAVE, is_win)
         self.pm.leave(player, is_win)
 
-        if is_win and self.rules.status(GameRules.one_winner):
+        if is_win and self.pipeline.one_winner:
             self.end()
             return
 
         if player == self.player:
             self.take_counter = 0
+            self.bluff_state = None
 
         player.on_leave()
 
@@ -192,21 +264,24 @@ class MauGame:
     # управление состоянием игры
     # ==========================
 
+    @game_action(Op.SHOT)
     def shot(self) -> bool:
         """Выстрелить из револьвера."""
-        if not self.rules.status(GameRules.shotgun):
+        if not self.pipeline.shotgun:
             return False
 
         res = self.shotgun.shot()
         if res:
-            self.shotgun = Shotgun()
+            self.shotgun = Shotgun(self.rng)
         return res
 
+    @game_action(Op.STATE)
     def set_state(self, state: GameState) -> None:
         """Устанавливает новое состояние для игры."""
         self.state = state
         self.player.dispatch(GameEvents.GAME_STATE, state)
 
+    @game_action(Op.REVERSE)
     def set_reverse(self, reverse: GameReverse | None = None) -> None:
         """Устанавливает порядок ходов."""
         self.pm.set_reverse(reverse)
@@ -215,41 +290,63 @@ class MauGame:
     # Обработка ходов
     # ===============
 
+    @game_action(Op.SKIP)
+    def skip_turn(self) -> None:
+        """Пропускает ход текущего игрока, например по истечении времени.
+
+        Если игрок ещё не брал карты, он берёт карты по счётчику.
+        Цвет выбирается случайно, а обмен руками пропускается.
+        """
+        if not self.started:
+            return
+
+        player = self.player
+        if log.INFO:
+            logger.info("Skip turn for {}", player)
+        if self.state == GameState.CHOOSE_COLOR:
+            player.choose_color(self.rng.choice(self.deck.colors))
+            return
+        if self.state == GameState.TWIST_HAND:
+            player.end_turn()
+            return
+
+        if self.state == GameState.NEXT:
+            self.take_cards()
+        if self.state in (GameState.NEXT, GameState.SHOTGUN):
+            player.take_cards()
+        if self.state in (GameState.TAKE, GameState.CONTINUE):
+            self.next_turn()
+
+    @game_action(Op.PLAY)
     def process_turn(self, player: Player, card_index: int) -> None:
         """Обрабатываем текущий ход.
 
         Сначала применяется действие карты.
         А уже после она ложится на верх колоды.
+        Разыгрывается собственная копия карты, чтобы действие могло
+        выбрать ей цвет, не затрагивая общий экземпляр.
         """
-        card = player.hand.pop(card_index)
-        logger.info("Playing card {}", card)
+        card = player.hand.pop(card_index).overlay()
+        if log.INFO:
+            logger.info("Playing card {}", card)
         card(self)
 
         self.deck.top.on_cover(self)
         self.deck.put_top(card)
         player.dispatch(GameEvents.PLAYER_PUT, card)
 
-        if self.state == GameState.NEXT and self.rules.status(
-            GameRules.side_effect
-        ):
-            self.state = GameState.CONTINUE
-            return
-
-        if self.state not in (GameState.NEXT, GameState.TAKE):
-            return
-
-        if self.rules.status(GameRules.random_color):
-            player.choose_color(choice(self.deck.colors))
-        else:
-            player.end_turn()
+        self.pipeline.finish_turn(self, player)
 
+    @game_action(Op.NEXT)
     def next_turn(self) -> None:
         """Передаёт ход следующему игроку."""
         if not self.started:
-            logger.info("Game ended -> stop process turn")
+            if log.INFO:
+                logger.info("Game ended -> stop process turn")
             return
 
-        logger.info("Next Player!")
+        if log.INFO:
+            logger.info("Next Player!")
         # Shotgun надо сбрасывать вручную
         if self.state != GameState.SHOTGUN:
             self.state = GameState.NEXT
@@ -0,0 +1,158 @@
+"""Рука игрока.
+
+Хранит карты игрока вместе с индексом для быстрого поиска карт,
+которыми можно покрыть верхнюю карту колоды.
+"""
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+from heapq import merge
+
+from mau.deck.card import CardColor, MauCard
+
+# Запись индекса: отрицательная стоимость, порядковый номер, карта.
+# Благодаря порядковому номеру карты никогда не сравниваются между собой,
+# а карты с равной стоимостью идут в порядке добавления в руку.
+_Entry = tuple[int, int, MauCard]
+
+
+class Hand:
+    """Рука игрока.
+
+    Ведёт себя как список карт, но дополнительно поддерживает индекс.
+    Карты распределены по цвету и по виду (поведение и значение),
+    а внутри каждой группы упорядочены по убыванию стоимости.
+    Индекс обновляется при добавлении и удалении карт, потому поиск
+    покрывающих карт не требует полного обхода и сортировки руки.
+    """
+
+    __slots__ = (
+        "_cards",
+        "_seqs",
+        "_next_seq",
+        "_by_cost",
+        "_by_color",
+        "_by_kind",
+        "_positions",
+    )
+
+    def __init__(self, cards: Iterable[MauCard] = ()) -> None:
+        self._cards: list[MauCard] = []
+        self._seqs: list[int] = []
+        self._next_seq = 0
+        self._by_cost: list[_Entry] = []
+        self._by_color: dict[CardColor, list[_Entry]] = {}
+        self._by_kind: dict[tuple[str, int], list[_Entry]] = {}
+        self._positions: dict[int, int] | None = None
+        self.extend(cards)
+
+    # Изменение руки
+    # ==============
+
+    def append(self, card: MauCard) -> None:
+        """Добавляет карту в руку."""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._cards.append(card)
+        self._seqs.append(seq)
+
+        entry = (-card.cost, seq, card)
+        insort(self._by_cost, entry)
+        insort(self._by_color.setdefault(card.color, []), entry)
+        insort(self._by_kind.setdefault(_kind(card), []), entry)
+        self._positions = None
+
+    def extend(self, cards: Iterable[MauCard]) -> None:
+        """Добавляет несколько карт в руку."""
+        for card in cards:
+            self.append(card)
+
+    def pop(self, index: int = -1) -> MauCard:
+        """Забирает карту из руки по индексу."""
+        card = self._cards.pop(index)
+        entry = (-card.cost, self._seqs.pop(index), card)
+        _discard(self._by_cost, entry)
+        _discard(self._by_color[card.color], entry)
+        _discard(self._by_kind[_kind(card)], entry)
+        self._positions = None
+        return card
+
+    def clear(self) -> None:
+        """Очищает руку игрока."""
+        self._cards.clear()
+        self._seqs.clear()
+        self._by_cost.clear()
+        self._by_color.clear()
+        self._by_kind.clear()
+        self._positions = None
+
+    # Поиск карт
+    # ==========
+
+    def _indexed(self, entries: Iterable[_Entry]) -> list[tuple[int, MauCard]]:
+        if self._positions is None:
+            self._positions = {seq: i for i, seq in enumerate(self._seqs)}
+        return [(self._positions[seq], card) for _, seq, card in entries]
+
+    def by_cost(self) -> list[tuple[int, MauCard]]:
+        """Возвращает индексы и карты по убыванию стоимости."""
+        return self._indexed(self._by_cost)
+
+    def with_cost(self, cost: int) -> list[tuple[int, MauCard]]:
+        """Возвращает индексы и карты с указанной стоимостью."""
+        start = bisect_left(self._by_cost, (-cost,))
+        end = bisect_left(self._by_cost, (-cost + 1,))
+        return self._indexed(self._by_cost[start:end])
+
+    def cover(
+        self, top: MauCard, wild_color: CardColor
+    ) -> list[tuple[int, MauCard]]:
+        """Возвращает карты, которыми можно покрыть верхнюю карту.
+
+        Совпадает с проверкой `MauCard.can_cover`: подходят карты
+        цвета верхней карты, дикого цвета и того же вида.
+        Карты идут по убыванию стоимости.
+        """
+        groups = [
+            self._by_color.get(top.color, []),
+            self._by_kind.get(_kind(top), []),
+        ]
+        if wild_color != top.color:
+            groups.append(self._by_color.get(wild_color, []))
+
+        entries: list[_Entry] = []
+        last_seq = -1
+        for entry in merge(*groups):
+            # Одна карта может попасть сразу в несколько групп
+            if entry[1] != last_seq:
+                entries.append(entry)
+                last_seq = entry[1]
+        return self._indexed(entries)
+
+    # Поведение списка
+    # ================
+
+    def __len__(self) -> int:
+        """Возвращает количество карт в руке."""
+        return len(self._cards)
+
+    def __iter__(self) -> Iterator[MauCard]:
+        """Проходится по картам в порядке руки."""
+        return iter(self._cards)
+
+    def __getitem__(self, index: int) -> MauCard:
+        """Возвращает карту по индексу в руке."""
+        return self._cards[index]
+
+    def __repr__(self) -> str:
+        """Представление руки в виде списка карт."""
+        return f"Hand({self._cards!r})"
+
+
+def _kind(card: MauCard) -> tuple[str, int]:
+    return (card.behavior.name, card.value)
+
+
+def _discard(entries: list[_Entry], entry: _Entry) -> None:
+    i = bisect_left(entries, entry[:2])
+    del entries[i]
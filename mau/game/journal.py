@@ -0,0 +1,549 @@
+"""Журнал команд игры.
+
+Каждая игра записывает действия игроков и игры в компактный
+двоичный журнал, который только дополняется.
+Вместе с начальным значением генератора случайных чисел журнал
+полностью определяет игру: `replay` повторяет её ход в ход,
+включая события в обработчике.
+Потому игру можно восстановить после сбоя или приложить к отчёту
+об ошибке несколько сотен байт вместо всей игры.
+
+Записываются только внешние действия.
+Действия, которые игра выполняет внутри другого действия,
+например `next_turn` после розыгрыша карты, повторяются сами.
+Изменения правил, числа начальных карт и открытости комнаты
+записываются перед следующим действием после изменения.
+После каждого внешнего действия увеличивается `MauGame.version`.
+Прямые изменения других полей игры в журнал не попадают.
+События сессий от `SessionManager` также не повторяются,
+а время таймера при повторе берётся из текущих часов.
+
+Формат записи: номер команды `Op` и её аргументы.
+Игроки записываются номером места в порядке присоединения,
+владелец комнаты всегда занимает место 0.
+Перед кодами карт колоды записывается таблица имён поведений,
+как и в снимке игры, потому журнал читается в другом процессе,
+даже если поведения там зарегистрированы в другом порядке.
+Если команда вернула `ValueError`, после неё записывается `Op.FAILED`.
+
+Журнал игры, восстановленной из снимка, начинается с версии снимка
+`CommandLog.base`, а не с начала игры.
+Такой журнал повторяется поверх того же снимка.
+"""
+
+import struct
+from collections.abc import Callable, Iterator
+from enum import IntEnum
+from functools import wraps
+from itertools import zip_longest
+from typing import TYPE_CHECKING, Any, Concatenate, ParamSpec, TypeVar, cast
+
+from mau.deck.behavior import behavior_id, get_behavior
+from mau.deck.card import (
+    CardColor,
+    MauCard,
+    pack_cards,
+    packed_behavior,
+    repack_behavior,
+)
+from mau.deck.deck import Deck, PackedDeck, RandomDeck
+from mau.enums import GameState
+from mau.rules import RuleSet
+
+if TYPE_CHECKING:
+    from mau.events import EventHandler
+    from mau.game.game import MauGame
+    from mau.game.player import BaseUser, Player
+    from mau.game.player_manager import PlayerManager
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+_G = TypeVar("_G", bound="MauGame")
+
+JOURNAL_MAGIC = b"MAUJ"
+JOURNAL_VERSION = 3
+
+_DECK_KINDS: tuple[type[Deck], ...] = (Deck, PackedDeck, RandomDeck)
+_NONE = 0xFFFF
+_U16 = struct.Struct("<H")
+_SETTINGS = struct.Struct("<BIBB")
+
+
+class Op(IntEnum):
+    """Команды журнала."""
+
+    SETTINGS = 0
+    JOIN = 1
+    LEAVE = 2
+    START = 3
+    END = 4
+    PLAY = 5
+    TAKE = 6
+    NEXT = 7
+    SHOT = 8
+    STATE = 9
+    REVERSE = 10
+    SKIP = 11
+    DRAW = 12
+    COLOR = 13
+    TWIST = 14
+    BLUFF = 15
+    END_TURN = 16
+    FAILED = 17
+
+
+# Метод и аргументы команды: p - игрок, i - число, c - цвет,
+# s - состояние игры, r - направление или None, u - пользователь, d - колода
+_GAME_OPS: dict[Op, tuple[str, str]] = {
+    Op.JOIN: ("join_player", "u"),
+    Op.LEAVE: ("leave_player", "p"),
+    Op.START: ("start", "d"),
+    Op.END: ("end", ""),
+    Op.PLAY: ("process_turn", "pi"),
+    Op.TAKE: ("take_cards", ""),
+    Op.NEXT: ("next_turn", ""),
+    Op.SHOT: ("shot", ""),
+    Op.STATE: ("set_state", "s"),
+    Op.REVERSE: ("set_reverse", "r"),
+    Op.SKIP: ("skip_turn", ""),
+}
+# Первый аргумент команд игрока - сам игрок
+_PLAYER_OPS: dict[Op, tuple[str, str]] = {
+    Op.DRAW: ("take_cards", "p"),
+    Op.COLOR: ("choose_color", "pc"),
+    Op.TWIST: ("twist_hand", "pp"),
+    Op.BLUFF: ("check_bluff", "p"),
+    Op.END_TURN: ("end_turn", "p"),
+}
+_OPS = _GAME_OPS | _PLAYER_OPS
+
+
+def _str(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("<H", len(data)) + data
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes, pos: int = 0) -> None:
+        self.data = data
+        self.pos = pos
+
+    def unpack(self, fmt: str) -> tuple[int, ...]:
+        res = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return res
+
+    def str(self) -> str:
+        (size,) = self.unpack("<H")
+        value = self.data[self.pos : self.pos + size].decode()
+        self.pos += size
+        return value
+
+    def cards(self) -> list[int]:
+        # Таблица поведений: номер в журнале и имя
+        (behaviors,) = self.unpack("<B")
+        remap: dict[int, int] = {}
+        for _ in range(behaviors):
+            (bid,) = self.unpack("<B")
+            local = behavior_id(self.str())
+            if local != bid:
+                remap[bid] = local
+        (count,) = self.unpack("<H")
+        codes = self.unpack(f"<{count}I")
+        if remap:
+            return [repack_behavior(code, remap) for code in codes]
+        return list(codes)
+
+
+Settings = tuple[int, int, bool]
+# Аргументы команды: числа, игроки по номеру места, пользователь, колода
+Args = tuple[Any, ...]
+
+
+class CommandLog:
+    """Журнал команд одной игры.
+
+    Заголовок журнала собирается только при сохранении,
+    а `data` содержит одни команды.
+
+    Args:
+        seed: Начальное значение генератора случайных чисел игры.
+        room_id: ID комнаты игры.
+        owner: Владелец комнаты.
+        pm: Менеджер игроков с ограничениями числа игроков.
+        base: Версия игры, с которой начинается журнал.
+
+    """
+
+    __slots__ = (
+        "seed",
+        "room_id",
+        "owner",
+        "min_players",
+        "max_players",
+        "base",
+        "data",
+        "active",
+        "_seats",
+        "_settings",
+    )
+
+    def __init__(
+        self,
+        seed: int,
+        room_id: str,
+        owner: "BaseUser",
+        pm: "PlayerManager",
+        base: int = 0,
+    ) -> None:
+        self.seed = seed
+        self.room_id = room_id
+        self.owner = owner
+        self.min_players = pm.min_players
+        self.max_players = pm.max_players
+        self.base = base
+        self.data = bytearray()
+        self.active = False
+        self._seats: dict[str, int] = {owner.id: 0}
+        self._settings: Settings = (0, 7, True)
+
+    def __bytes__(self) -> bytes:
+        """Возвращает журнал с заголовком для сохранения или передачи."""
+        return self.header() + self.data
+
+    def header(self) -> bytes:
+        """Возвращает заголовок журнала."""
+        res = bytearray(JOURNAL_MAGIC)
+        res += struct.pack(
+            "<BQBBQ",
+            JOURNAL_VERSION,
+            self.seed,
+            self.min_players,
+            self.max_players,
+            self.base,
+        )
+        owner = self.owner
+        for value in (self.room_id, owner.id, owner.name, owner.username):
+            res += _str(value)
+        # Места игроков, занятые до начала журнала
+        seats = self.seats if self.base else []
+        res += _U16.pack(len(seats))
+        for user_id in seats:
+            res += _str(user_id)
+        return bytes(res)
+
+    @property
+    def seats(self) -> list[str]:
+        """ID игроков по номерам мест."""
+        return list(self._seats)
+
+    @property
+    def settings(self) -> Settings:
+        """Последние записанные правила, число карт и открытость комнаты."""
+        return self._settings
+
+    @classmethod
+    def resume(
+        cls,
+        game: "MauGame",
+        owner: "BaseUser",
+        seats: list[str],
+        settings: Settings,
+    ) -> "CommandLog":
+        """Начинает журнал восстановленной игры с её текущей версии."""
+        journal = cls(game.rng.seed, game.room_id, owner, game.pm, game.version)
+        journal._seats = {user_id: i for i, user_id in enumerate(seats)}
+        journal._settings = settings
+        return journal
+
+    @classmethod
+    def load(cls, data: bytes) -> "CommandLog":
+        """Загружает журнал, чтобы продолжить его запись."""
+        header = _header(data)
+        journal = cls(
+            header.seed, header.room_id, header.owner, header.pm, header.base
+        )
+        journal.data = bytearray(data[header.pos :])
+        seats = journal._seats
+        for user_id in header.seats:
+            seats.setdefault(user_id, len(seats))
+        for op, args in _entries(data, header.pos):
+            if op == Op.SETTINGS:
+                journal._settings = (args[0], args[1], bool(args[2]))
+            elif op == Op.JOIN:
+                seats.setdefault(args[0].id, len(seats))
+        return journal
+
+    def record(self, game: "MauGame", op: Op, args: tuple[object, ...]) -> None:
+        """Записывает команду в журнал."""
+        settings = (game.rules.state, game.start_cards, game.open)
+        if settings != self._settings:
+            self._settings = settings
+            self.data += _SETTINGS.pack(Op.SETTINGS, *settings)
+        self.data.append(op)
+        # Необязательные аргументы записываются как None
+        for kind, arg in zip_longest(_OPS[op][1], args):
+            self._write(kind, arg)
+
+    def _write(self, kind: str, arg: object) -> None:
+        if kind == "p":
+            player = cast("Player", arg)
+            self.data += _U16.pack(self._seats[player.user_id])
+        elif kind == "u":
+            user = cast("BaseUser", arg)
+            self._seats.setdefault(user.id, len(self._seats))
+            for value in (user.id, user.name, user.username):
+                self.data += _str(value)
+        elif kind == "d":
+            deck = cast("Deck", arg)
+            codes = (
+                deck.packed
+                if isinstance(deck, PackedDeck)
+                else pack_cards(deck.cards)
+            )
+            behaviors = sorted({packed_behavior(code) for code in codes})
+            self.data += struct.pack(
+                "<BB", _DECK_KINDS.index(type(deck)), len(behaviors)
+            )
+            for bid in behaviors:
+                self.data.append(bid)
+                self.data += _str(get_behavior(bid).name)
+            self.data += struct.pack(f"<H{len(codes)}I", len(codes), *codes)
+        else:
+            code = _NONE if arg is None else cast("int", arg)
+            self.data += _U16.pack(code)
+
+
+def game_action(
+    op: Op,
+) -> Callable[
+    [Callable[Concatenate[_G, _P], _R]], Callable[Concatenate[_G, _P], _R]
+]:
+    """Записывает вызов метода игры в её журнал.
+
+    События внешнего действия отправляются одним пакетом `MauGame.batch`.
+    """
+
+    def decorator(
+        method: Callable[Concatenate[_G, _P], _R],
+    ) -> Callable[Concatenate[_G, _P], _R]:
+        @wraps(method)
+        def wrapper(game: _G, /, *args: _P.args, **kwargs: _P.kwargs) -> _R:
+            journal = game.journal
+            if journal.active:
+                return method(game, *args, **kwargs)
+            journal.record(game, op, (*args, *kwargs.values()))
+            journal.active = True
+            try:
+                with game.batch():
+                    return method(game, *args, **kwargs)
+            except ValueError:
+                journal.data.append(Op.FAILED)
+                raise
+            finally:
+                journal.active = False
+                game.version += 1
+
+        return wrapper
+
+    return decorator
+
+
+_PL = TypeVar("_PL", bound="Player")
+
+
+def player_action(
+    op: Op,
+) -> Callable[
+    [Callable[Concatenate[_PL, _P], _R]], Callable[Concatenate[_PL, _P], _R]
+]:
+    """Записывает вызов метода игрока в журнал его игры.
+
+    События внешнего действия отправляются одним пакетом `MauGame.batch`.
+    """
+
+    def decorator(
+        method: Callable[Concatenate[_PL, _P], _R],
+    ) -> Callable[Concatenate[_PL, _P], _R]:
+        @wraps(method)
+        def wrapper(player: _PL, /, *args: _P.args, **kwargs: _P.kwargs) -> _R:
+            game = player.game
+            journal = game.journal
+            if journal.active:
+                return method(player, *args, **kwargs)
+            journal.record(game, op, (player, *args, *kwargs.values()))
+            journal.active = True
+            try:
+                with game.batch():
+                    return method(player, *args, **kwargs)
+            except ValueError:
+                journal.data.append(Op.FAILED)
+                raise
+            finally:
+                journal.active = False
+                game.version += 1
+
+        return wrapper
+
+    return decorator
+
+
+# Чтение журнала
+# ==============
+
+
+class _Header:
+    __slots__ = ("seed", "room_id", "owner", "pm", "base", "seats", "pos")
+
+    def __init__(  # noqa: PLR0913
+        self,
+        seed: int,
+        room_id: str,
+        owner: "BaseUser",
+        pm: "PlayerManager",
+        pos: int,
+        *,
+        base: int,
+        seats: list[str],
+    ) -> None:
+        self.seed = seed
+        self.room_id = room_id
+        self.owner = owner
+        self.pm = pm
+        self.base = base
+        self.seats = seats
+        self.pos = pos
+
+
+def _header(data: bytes) -> _Header:
+    from mau.game.player import BaseUser  # noqa: PLC0415
+    from mau.game.player_manager import PlayerManager  # noqa: PLC0415
+
+    if data[:4] != JOURNAL_MAGIC:
+        raise ValueError("Not a game journal")
+    r = _Reader(data, len(JOURNAL_MAGIC))
+    version, seed, min_players, max_players, base = r.unpack("<BQBBQ")
+    if version != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version {version}")
+    room_id = r.str()
+    owner = BaseUser(r.str(), r.str(), r.str())
+    seats = [r.str() for _ in range(r.unpack("<H")[0])]
+    pm = PlayerManager(min_players, max_players)
+    return _Header(seed, room_id, owner, pm, r.pos, base=base, seats=seats)
+
+
+def _read_deck(r: _Reader) -> Deck:
+    (kind,) = r.unpack("<B")
+    deck = _DECK_KINDS[kind]()
+    codes = r.cards()
+    if isinstance(deck, PackedDeck):
+        deck.packed.extend(codes)
+    elif codes:
+        deck.cards = [MauCard.unpack(c) for c in codes]
+    return deck
+
+
+def _read_arg(r: _Reader, kind: str) -> Any:  # noqa: ANN401
+    from mau.game.player import BaseUser  # noqa: PLC0415
+    from mau.game.player_manager import GameReverse  # noqa: PLC0415
+
+    if kind == "u":
+        return BaseUser(r.str(), r.str(), r.str())
+    if kind == "d":
+        return _read_deck(r)
+    (value,) = r.unpack("<H")
+    if value == _NONE:
+        return None
+    enum = {"c": CardColor, "s": GameState, "r": GameReverse}.get(kind)
+    return value if enum is None else enum(value)
+
+
+def _entries(data: bytes, pos: int) -> Iterator[tuple[Op, Args]]:
+    r = _Reader(data, pos)
+    while r.pos < len(data):
+        op = Op(r.unpack("<B")[0])
+        if op == Op.SETTINGS:
+            yield op, r.unpack("<IBB")
+        elif op == Op.FAILED:
+            yield op, ()
+        else:
+            yield op, tuple(_read_arg(r, kind) for kind in _OPS[op][1])
+
+
+def entries(data: bytes) -> Iterator[tuple[Op, Args]]:
+    """Проходится по командам журнала.
+
+    Игроки в аргументах представлены номерами мест.
+    """
+    yield from _entries(data, _header(data).pos)
+
+
+def _replay_base(
+    cls: type[_G],
+    header: _Header,
+    event_handler: "EventHandler",
+    base: _G | None,
+) -> tuple[_G, list[str]]:
+    if not header.base:
+        game = cls(
+            header.pm, event_handler, header.room_id, header.owner, header.seed
+        )
+        return game, [header.owner.id]
+    if (
+        base is None
+        or base.room_id != header.room_id
+        or base.version != header.base
+    ):
+        raise ValueError("Journal continues another snapshot")
+    return base, header.seats
+
+
+def replay(
+    cls: type[_G],
+    data: bytes,
+    event_handler: "EventHandler",
+    base: _G | None = None,
+) -> _G:
+    """Повторяет игру по журналу команд.
+
+    Игра проходит те же действия в том же порядке,
+    а её журнал совпадает с исходным байт в байт.
+    Команды, которые вернули `ValueError` в исходной игре,
+    должны вернуть её и при повторе.
+    Журнал, начатый со снимка, повторяется поверх игры `base`,
+    восстановленной из того же снимка.
+    Вернёт исключение, если повтор разошёлся с исходной игрой.
+    """
+    header = _header(data)
+    game, seats = _replay_base(cls, header, event_handler, base)
+    ops = list(_entries(data, header.pos))
+    for i, (op, args) in enumerate(ops):
+        if op == Op.FAILED:
+            continue
+        if op == Op.SETTINGS:
+            rules, start_cards, is_open = args
+            game.rules = RuleSet(rules)
+            game.start_cards = start_cards
+            game.open = bool(is_open)
+            continue
+
+        if op == Op.JOIN and args[0].id not in seats:
+            seats.append(args[0].id)
+        name, kinds = _OPS[op]
+        failed = i + 1 < len(ops) and ops[i + 1][0] == Op.FAILED
+        try:
+            values = [
+                game.pm.get(seats[arg]) if kind == "p" else arg
+                for kind, arg in zip(kinds, args, strict=True)
+            ]
+            target = values.pop(0) if op in _PLAYER_OPS else game
+            getattr(target, name)(*values)
+        except ValueError as e:
+            if not failed:
+                raise ValueError(f"Replay failed at {op.name}: {e}") from e
+        else:
+            if failed:
+                raise ValueError(f"Replay diverged at {op.name}")
+    return game
@@ -0,0 +1,259 @@
+"""Ход игры, собранный под набор правил.
+
+Набор правил не меняется во время игры, потому спрашивать
+`RuleSet` о каждом правиле на каждом ходе незачем.
+`build_pipeline` один раз собирает под набор правил шаги хода
+только из включённых правил:
+
+- can_cover: Проверка карты перед розыгрышем.
+- take: Подготовка взятия карт в `MauGame.take_cards`.
+- after_take: Что делать после взятия в `Player.take_cards`.
+- finish_turn: Завершение хода после розыгрыша карты.
+
+Редкие ветки, например выбор цвета дикой карты, читают готовые флаги.
+Собранные ходы общие для всех игр с тем же набором правил.
+
+Игра собирает ход в `MauGame.start`, потому правила, изменённые
+во время игры, действуют только со следующей игры.
+Поведение игры не отличается от проверки правил через `RuleSet`,
+это сверяет `python -m mau.sim --check-pipeline`.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING
+
+from mau.enums import GameState
+from mau.rules import GameRules, RuleSet
+
+if TYPE_CHECKING:
+    from mau.deck.card import MauCard
+    from mau.game.game import MauGame
+    from mau.game.player import Player
+
+CoverCheck = Callable[["MauGame", "Player", "MauCard"], bool]
+TakeStep = Callable[["MauGame"], None]
+PlayerStep = Callable[["MauGame", "Player"], None]
+
+# Сколько карт нужно взять, чтобы вместо этого выстрелить из револьвера
+_MIN_SHOTGUN_TAKE_COUNTER = 3
+
+
+def reference_can_cover(
+    game: "MauGame", player: "Player", card: "MauCard"
+) -> bool:
+    """Проверяет карту, спрашивая каждое правило у `RuleSet`.
+
+    Несобранный вариант `TurnPipeline.can_cover`, с ним сверяется
+    собранный ход.
+    """
+    top = game.deck.top
+    rules = game.rules
+
+    if (
+        rules.status(GameRules.intervention)
+        and card != top
+        and player != game.player
+    ):
+        return False
+
+    # Для режима побочного выброса
+    if (
+        game.state == GameState.CONTINUE
+        and rules.status(GameRules.side_effect)
+        and card.cost == top.cost
+    ):
+        return True
+
+    # Совмещение нескольких карт
+    if (
+        (top.behavior.on_counter and game.take_counter > 0)
+        and not card.behavior.on_counter
+        and not rules.status(GameRules.deferred_take)
+    ):
+        return False
+
+    return top.can_cover(card, game.deck.wild_color)
+
+
+def _cover(game: "MauGame", player: "Player", card: "MauCard") -> bool:  # noqa: ARG001
+    return game.deck.top.can_cover(card, game.deck.wild_color)
+
+
+def _cover_counter(
+    game: "MauGame",
+    player: "Player",  # noqa: ARG001
+    card: "MauCard",
+) -> bool:
+    top = game.deck.top
+    # Совмещение нескольких карт
+    if (
+        top.behavior.on_counter
+        and game.take_counter > 0
+        and not card.behavior.on_counter
+    ):
+        return False
+    return top.can_cover(card, game.deck.wild_color)
+
+
+def _with_side_effect(inner: CoverCheck) -> CoverCheck:
+    def cover(game: "MauGame", player: "Player", card: "MauCard") -> bool:
+        # Для режима побочного выброса
+        if game.state == GameState.CONTINUE and card.cost == game.deck.top.cost:
+            return True
+        return inner(game, player, card)
+
+    return cover
+
+
+def _with_intervention(inner: CoverCheck) -> CoverCheck:
+    def cover(game: "MauGame", player: "Player", card: "MauCard") -> bool:
+        if card != game.deck.top and player != game.player:
+            return False
+        return inner(game, player, card)
+
+    return cover
+
+
+# Взятие карт
+# ===========
+
+
+def _take(game: "MauGame") -> None:
+    """Ничего не делает."""
+
+
+def _with_take_until_cover(inner: TakeStep) -> TakeStep:
+    def take(game: "MauGame") -> None:
+        if game.take_counter == 0:
+            game.take_counter = game.deck.count_until_cover()
+        inner(game)
+
+    return take
+
+
+def _with_shotgun(inner: TakeStep) -> TakeStep:
+    def take(game: "MauGame") -> None:
+        inner(game)
+        if (
+            game.take_counter > _MIN_SHOTGUN_TAKE_COUNTER
+            and game.state != GameState.SHOTGUN
+        ):
+            game.set_state(GameState.SHOTGUN)
+
+    return take
+
+
+def _stay(game: "MauGame", player: "Player") -> None:
+    """Ничего не делает."""
+
+
+def _auto_skip(game: "MauGame", player: "Player") -> None:
+    if len(player.cover_cards().cover) == 0:
+        game.next_turn()
+
+
+# Завершение хода
+# ===============
+
+
+def _end_turn(game: "MauGame", player: "Player") -> None:  # noqa: ARG001
+    player.end_turn()
+
+
+def _random_color(game: "MauGame", player: "Player") -> None:
+    player.choose_color(game.rng.choice(game.deck.colors))
+
+
+def _finish(inner: PlayerStep) -> PlayerStep:
+    def finish(game: "MauGame", player: "Player") -> None:
+        if game.state in (GameState.NEXT, GameState.TAKE):
+            inner(game, player)
+
+    return finish
+
+
+def _finish_side_effect(inner: PlayerStep) -> PlayerStep:
+    def finish(game: "MauGame", player: "Player") -> None:
+        # Игрок может продолжить ход картами той же стоимости
+        if game.state == GameState.NEXT:
+            game.state = GameState.CONTINUE
+        elif game.state == GameState.TAKE:
+            inner(game, player)
+
+    return finish
+
+
+@dataclass(frozen=True, slots=True)
+class TurnPipeline:
+    """Шаги хода и флаги одного набора правил.
+
+    - rules: Битовая маска правил, под которую собран ход.
+    - can_cover: Проверка, может ли карта игрока покрыть верхнюю.
+    - take: Подготовка счётчика и состояния перед взятием карт.
+    - after_take: Действие после того, как игрок взял карты.
+    - finish_turn: Завершение хода после розыгрыша карты.
+    - Остальные поля: включено ли одноимённое правило `GameRules`.
+    """
+
+    rules: int
+    can_cover: CoverCheck
+    take: TakeStep
+    after_take: PlayerStep
+    finish_turn: PlayerStep
+    one_winner: bool
+    auto_skip: bool
+    take_until_cover: bool
+    shotgun: bool
+    special_wild: bool
+    auto_choose_color: bool
+    random_color: bool
+    side_effect: bool
+    intervention: bool
+
+
+@cache
+def build_pipeline(rules: int) -> TurnPipeline:
+    """Собирает шаги хода и флаги под набор правил."""
+    rule_set = RuleSet(rules)
+    can_cover: CoverCheck = (
+        _cover if rule_set.status(GameRules.deferred_take) else _cover_counter
+    )
+    if rule_set.status(GameRules.side_effect):
+        can_cover = _with_side_effect(can_cover)
+    if rule_set.status(GameRules.intervention):
+        can_cover = _with_intervention(can_cover)
+
+    take: TakeStep = _take
+    if rule_set.status(GameRules.take_until_cover):
+        take = _with_take_until_cover(take)
+    if rule_set.status(GameRules.shotgun):
+        take = _with_shotgun(take)
+
+    finish_turn: PlayerStep = (
+        _random_color if rule_set.status(GameRules.random_color) else _end_turn
+    )
+    if rule_set.status(GameRules.side_effect):
+        finish_turn = _finish_side_effect(finish_turn)
+    else:
+        finish_turn = _finish(finish_turn)
+
+    return TurnPipeline(
+        rules=rules,
+        can_cover=can_cover,
+        take=take,
+        after_take=(
+            _auto_skip if rule_set.status(GameRules.auto_skip) else _stay
+        ),
+        finish_turn=finish_turn,
+        one_winner=rule_set.status(GameRules.one_winner),
+        auto_skip=rule_set.status(GameRules.auto_skip),
+        take_until_cover=rule_set.status(GameRules.take_until_cover),
+        shotgun=rule_set.status(GameRules.shotgun),
+        special_wild=rule_set.status(GameRules.special_wild),
+        auto_choose_color=rule_set.status(GameRules.auto_choose_color),
+        random_color=rule_set.status(GameRules.random_color),
+        side_effect=rule_set.status(GameRules.side_effect),
+        intervention=rule_set.status(GameRules.intervention),
+    )
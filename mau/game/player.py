@@ -5,10 +5,12 @@ from typing import TYPE_CHECKING, Self, TypeVar
 
 from loguru import logger
 
+from mau import log
 from mau.deck.card import CardColor
 from mau.enums import GameState
 from mau.events import Event, GameEvents
-from mau.rules import GameRules
+from mau.game.hand import Hand
+from mau.game.journal import Op, player_action
 
 if TYPE_CHECKING:
     from mau.deck.card import MauCard
@@ -49,7 +51,7 @@ class Player:
     def __init__(
         self, game: "MauGame", user_id: str, user_name: str, user_mention: str
     ) -> None:
-        self.hand: list[MauCard] = []
+        self.hand: Hand = Hand()
         self.game: MauGame = game
         self.user_id = user_id
         self._user_name = user_name
@@ -93,34 +95,36 @@ class Player:
         Также можно напрямую вызвать метод или через класс игры.
         """
         e = Event(self.game, self.user_id, event_type, data)
+        # Обработчик видит игру уже после изменения
+        self.game.version += 1
         self.game.event_handler.dispatch(e)
         return e
 
+    @player_action(Op.DRAW)
     def take_cards(self) -> None:
         """Игрок берёт заданное количество карт согласно счётчику."""
         take_counter = self.game.take_counter or 1
-        logger.debug("{} Draw {} cards", self._user_name, take_counter)
+        if log.DEBUG:
+            logger.debug("{} Draw {} cards", self._user_name, take_counter)
 
-        for card in self.game.deck.take(take_counter):
-            self.hand.append(card)
+        self.hand.extend(self.game.deck.take_many(take_counter))
         self.game.take_counter = 0
+        self.game.bluff_state = None
         self.dispatch(GameEvents.PLAYER_TAKE, take_counter)
         self.game.set_state(GameState.TAKE)
 
-        if (
-            self.game.rules.status(GameRules.auto_skip)
-            and len(self.cover_cards().cover) == 0
-        ):
-            self.game.next_turn()
+        self.game.pipeline.after_take(self.game, self)
 
     def cover_cards(self) -> SortedCards:
         """Возвращает отсортированный список карт из руки пользователя.
 
         Карты делятся на те, которыми он может покрыть и которыми не может
         покрыть текущую верхнюю карту.
+        Подходящие карты берутся из индекса руки, а не полным перебором.
         """
         top = self.game.deck.top
-        logger.debug("Last card was {}", top)
+        if log.DEBUG:
+            logger.debug("Last card was {}", top)
         # Если мы сейчас в состоянии выбора цвета, револьвера. обмена руками
         # то нам сейчас карты нне очень важны
         if not self.can_play or self.game.state not in (
@@ -132,48 +136,58 @@ class Player:
                 [], [(i, card) for i, card in enumerate(self.hand)]
             )
 
-        cover: list[tuple[int, MauCard]] = []
-        uncover: list[tuple[int, MauCard]] = []
-        for i, card in enumerate(self.hand):
-            if self.game.can_cover(self, card):
-                cover.append((i, card))
-            else:
-                uncover.append((i, card))
+        candidates = self.hand.cover(top, self.game.deck.wild_color)
+        if (
+            self.game.state == GameState.CONTINUE
+            and self.game.pipeline.side_effect
+        ):
+            # Побочный выброс позволяет покрыть картой той же стоимости
+            same_cost = dict(self.hand.with_cost(top.cost))
+            same_cost.update(candidates)
+            candidates = sorted(
+                same_cost.items(), key=lambda c: (-c[1].cost, c[0])
+            )
 
+        cover = [c for c in candidates if self.game.can_cover(self, c[1])]
+        cover_ids = {i for i, _ in cover}
         return SortedCards(
-            cover=sorted(cover, key=lambda c: c[1].cost, reverse=True),
-            uncover=sorted(uncover, key=lambda c: c[1].cost, reverse=True),
+            cover=cover,
+            uncover=[c for c in self.hand.by_cost() if c[0] not in cover_ids],
         )
 
     def on_join(self) -> None:
         """Берёт начальный набор карт для игры."""
-        logger.debug("{} Draw first hand for player", self._user_name)
-        self.hand = list(self.game.deck.take(self.game.start_cards))
+        if log.DEBUG:
+            logger.debug("{} Draw first hand for player", self._user_name)
+        self.hand = Hand(self.game.deck.take_many(self.game.start_cards))
         self.dispatch(GameEvents.PLAYER_TAKE, self.game.start_cards)
 
     def on_leave(self) -> None:
         """Действия игрока при выходе из игры."""
-        logger.debug("{} Leave from game", self._user_name)
+        if log.DEBUG:
+            logger.debug("{} Leave from game", self._user_name)
         for card in self.hand:
             self.game.deck.put(card)
-        self.hand = []
+        self.hand = Hand()
 
+    @player_action(Op.TWIST)
     def twist_hand(self, other_player: Self) -> None:
         """Меняет местами руки для двух игроков."""
-        logger.info("Switch hand between {} and {}", self, other_player)
-        player_hand = self.hand.copy()
-        self.hand = other_player.hand.copy()
-        other_player.hand = player_hand
+        if log.INFO:
+            logger.info("Switch hand between {} and {}", self, other_player)
+        self.hand, other_player.hand = other_player.hand, self.hand
         self.dispatch(GameEvents.GAME_SELECT_PLAYER, other_player.user_id)
         self.end_turn()
 
+    @player_action(Op.BLUFF)
     def check_bluff(self) -> None:
         """Проверка предыдущего игрока на блеф.
 
         По правилам, если прошлый игрок блефовал, то он берёт 4 карты.
         Если же игрок не блефовал, текущий игрок берёт уже 6 карт.
         """
-        logger.info("{} call bluff {}", self, self.game.bluff_state)
+        if log.INFO:
+            logger.info("{} call bluff {}", self, self.game.bluff_state)
         if self.game.bluff_state is None or not self.game.bluff_state[1]:
             self.game.take_counter += 2
             self.take_cards()
@@ -183,6 +197,7 @@ class Player:
         self.dispatch(GameEvents.PLAYER_BLUFF)
         self.end_turn()
 
+    @player_action(Op.END_TURN)
     def end_turn(self) -> None:
         """Игрок завершает текущий ход."""
         if len(self.hand) == 1:
@@ -193,6 +208,7 @@ class Player:
 
         self.game.next_turn()
 
+    @player_action(Op.COLOR)
     def choose_color(self, color: CardColor) -> None:
         """Устанавливаем цвет для последней карты."""
         self.game.deck.top.color = color
@@ -8,6 +8,7 @@ from random import shuffle
 
 from mau.events import GameEvents
 from mau.game.player import Player
+from mau.rng import GameRandom
 
 
 class GameReverse(IntEnum):
@@ -77,6 +78,10 @@ class PlayerManager:
             if storage_player is not None:
                 yield storage_player
 
+    def iter_all(self) -> Iterator[Player]:
+        """Проходится по всем игрокам хранилища, включая выбывших."""
+        yield from self._storage.values()
+
     def iter_others(self) -> Iterator[tuple[int, Player]]:
         """Возвращает индекс и ID всех игроков, кроме текущего."""
         yield from (
@@ -97,17 +102,20 @@ class PlayerManager:
         self._players.append(player.user_id)
 
     def remove(self, user_id: str) -> None:
-        """Удаляет игрока из хранилища."""
+        """Удаляет игрока из хранилища и очереди ходов."""
         self._storage.pop(user_id)
+        if user_id in self._players:
+            self._players.remove(user_id)
 
     def leave(self, player: Player, winner: bool) -> None:
         """Игрок покидает игру при выигрыше или поражении."""
         self._players.remove(player.user_id)
         self.results[player.user_id] = GameResult(winner, player.count_cost())
 
-    def start(self) -> None:
+    def start(self, rng: GameRandom | None = None) -> None:
         """Подготавливает игроков к началу новой игры.
 
+        Порядок игроков перемешивается генератором игры, если он передан.
         Вернёт исключение, если игроков недостаточно для игры.
         """
         if len(self._players) < self.min_players:
@@ -115,7 +123,10 @@ class PlayerManager:
 
         self.results = {}
         self._cp = 0
-        shuffle(self._players)
+        if rng is None:
+            shuffle(self._players)
+        else:
+            rng.shuffle(self._players)
         for player in self.iter(self._players):
             player.on_join()
 
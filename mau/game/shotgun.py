@@ -2,17 +2,20 @@
 
 from random import randint
 
+from mau.rng import GameRandom
+
 
 class Shotgun:
     """Револьвер.
 
     8 патронов, один из них заряжен.
     Используется в специальном режиме игры.
+    Заряженный патрон выбирается генератором игры, если он передан.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rng: GameRandom | None = None) -> None:
         self._cur = 0
-        self._lose = randint(1, 8)
+        self._lose = randint(1, 8) if rng is None else rng.randint(1, 8)
 
     @property
     def cur(self) -> int:
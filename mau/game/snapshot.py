@@ -0,0 +1,312 @@
+"""Снимки игры.
+
+Сохраняет полное состояние игры в компактный двоичный снимок и
+восстанавливает игру из него.
+Снимок не содержит обработчик событий и функции поведения карт,
+потому его можно передать в другой процесс или сохранить на диск.
+
+Карты сохраняются в упакованном виде, а поведение карт - по
+идентификатору из реестра поведений.
+Идентификаторы в разных процессах могут отличаться, потому вместе
+с ними записываются имена поведений.
+При восстановлении идентификаторы сопоставляются с реестром по именам,
+а снимок с незнакомым поведением не восстанавливается.
+
+Генератор случайных чисел также входит в снимок,
+потому восстановленная игра продолжается так же, как исходная.
+Команды журнала в снимок не входят, иначе снимок рос бы с каждым ходом.
+Сохраняются только места игроков и настройки журнала, а журнал
+восстановленной игры начинается с версии снимка.
+Палитра колоды сохраняется отдельно от оставшихся цветов.
+Версия игры `MauGame.version` сохраняется, чтобы она только росла
+и после восстановления.
+"""
+
+import struct
+from typing import TYPE_CHECKING, TypeVar
+
+from mau.deck.behavior import behavior_id, get_behavior
+from mau.deck.card import CardColor, MauCard, packed_behavior, repack_behavior
+from mau.deck.deck import Deck, PackedDeck, RandomDeck
+from mau.enums import GameState
+from mau.game.hand import Hand
+from mau.game.journal import CommandLog
+from mau.game.pipeline import build_pipeline
+from mau.game.player import BaseUser, Player
+from mau.game.player_manager import GameResult, GameReverse, PlayerManager
+from mau.game.timer import GameTimer
+from mau.rules import RuleSet
+
+if TYPE_CHECKING:
+    from mau.events import EventHandler
+    from mau.game.game import MauGame
+
+_G = TypeVar("_G", bound="MauGame")
+
+SNAPSHOT_MAGIC = b"MAUS"
+SNAPSHOT_VERSION = 4
+
+_DECK_KINDS: tuple[type[Deck], ...] = (Deck, PackedDeck, RandomDeck)
+_NO_COLOR = 0xFF
+
+
+class _Writer:
+    __slots__ = ("buf", "behaviors")
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+        self.behaviors: set[int] = set()
+
+    def pack(self, fmt: str, *values: int) -> None:
+        self.buf += struct.pack(fmt, *values)
+
+    def str(self, value: str) -> None:
+        data = value.encode()
+        self.pack("<H", len(data))
+        self.buf += data
+
+    def cards(self, codes: list[int]) -> None:
+        self.pack(f"<H{len(codes)}I", len(codes), *codes)
+        self.behaviors.update(packed_behavior(code) for code in codes)
+
+
+class _Reader:
+    __slots__ = ("data", "pos", "remap")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+        # Идентификаторы поведений снимка, отличные от реестра процесса
+        self.remap: dict[int, int] = {}
+
+    def unpack(self, fmt: str) -> tuple[int, ...]:
+        res = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return res
+
+    def u8(self) -> int:
+        return self.unpack("<B")[0]
+
+    def str(self) -> str:
+        (size,) = self.unpack("<H")
+        value = self.data[self.pos : self.pos + size].decode()
+        self.pos += size
+        return value
+
+    def cards(self) -> list[int]:
+        (count,) = self.unpack("<H")
+        codes = self.unpack(f"<{count}I")
+        if self.remap:
+            return [repack_behavior(code, self.remap) for code in codes]
+        return list(codes)
+
+
+def _dump_deck(w: _Writer, deck: Deck) -> None:
+    w.pack("<B", _DECK_KINDS.index(type(deck)))
+    if isinstance(deck, PackedDeck):
+        w.cards(list(deck.packed))
+        w.cards(list(deck.packed_used))
+    else:
+        w.cards([card.pack() for card in deck.cards])
+        w.cards([card.pack() for card in deck.used_cards])
+    w.cards([] if deck._top is None else [deck._top.pack()])
+
+    for colors in (deck._palette, deck._colors):
+        w.pack("<B", _NO_COLOR if colors is None else len(colors))
+        for color in colors or []:
+            w.pack("<B", color)
+    w.pack("<B", _NO_COLOR if deck._wild_color is None else deck._wild_color)
+
+
+def _load_colors(r: _Reader) -> list[CardColor] | None:
+    count = r.u8()
+    if count == _NO_COLOR:
+        return None
+    return [CardColor(r.u8()) for _ in range(count)]
+
+
+def _load_deck(r: _Reader) -> Deck:
+    kind = _DECK_KINDS[r.u8()]
+    cards = r.cards()
+    used = r.cards()
+    deck = kind()
+    if isinstance(deck, PackedDeck):
+        deck.packed.extend(cards)
+        deck.packed_used.extend(used)
+    else:
+        deck.cards = [MauCard.unpack(c) for c in cards]
+        deck.used_cards = [MauCard.unpack(c) for c in used]
+    top = r.cards()
+    deck._top = MauCard.unpack(top[0]).overlay() if top else None
+
+    deck._palette = _load_colors(r)
+    deck._colors = _load_colors(r)
+    wild = r.u8()
+    deck._wild_color = None if wild == _NO_COLOR else CardColor(wild)
+    return deck
+
+
+def dump_game(game: "MauGame") -> bytes:
+    """Сохраняет игру в двоичный снимок."""
+    w = _Writer()
+    w.str(game.room_id)
+    w.str(game._owner_id)
+    w.pack("<QQQ", game.rng.seed, game.rng.state, game.version)
+
+    w.pack(
+        "<IBBHBB",
+        game.rules.state,
+        game.started | (game.open << 1),
+        game.state,
+        game.take_counter,
+        game.start_cards,
+        game.bluff_state is not None,
+    )
+    if game.bluff_state is not None:
+        w.str(game.bluff_state[0])
+        w.pack("<B", game.bluff_state[1])
+
+    w.pack("<BB", game.shotgun._cur, game.shotgun._lose)
+    timer = game.timer
+    w.pack(
+        "<qqIIII",
+        timer._start,
+        timer._turn,
+        timer._ticks,
+        timer._tick_limit,
+        timer._turn_limit,
+        timer._game_limit,
+    )
+
+    pm = game.pm
+    players = list(pm.iter_all())
+    index = {pl.user_id: i for i, pl in enumerate(players)}
+    w.pack(
+        "<BBHBB",
+        pm.min_players,
+        pm.max_players,
+        pm._cp,
+        pm.reverse,
+        len(players),
+    )
+    for pl in players:
+        w.str(pl.user_id)
+        w.str(pl.name)
+        w.str(pl.mention)
+        w.cards([card.pack() for card in pl.hand])
+
+    w.pack(
+        f"<B{len(pm._players)}B",
+        len(pm._players),
+        *(index[u] for u in pm._players),
+    )
+    w.pack("<B", len(pm.results))
+    for user_id, result in pm.results.items():
+        w.str(user_id)
+        w.pack("<BI", result.winner, result.score)
+    w.pack("<B", len(pm.player_cost))
+    for user_id, cost in pm.player_cost.items():
+        w.str(user_id)
+        w.pack("<i", cost)
+
+    _dump_deck(w, game.deck)
+    journal = game.journal
+    for value in (journal.owner.id, journal.owner.name, journal.owner.username):
+        w.str(value)
+    w.pack("<IBBH", *journal.settings, len(journal.seats))
+    for user_id in journal.seats:
+        w.str(user_id)
+
+    header = _Writer()
+    header.buf += SNAPSHOT_MAGIC
+    header.pack("<BB", SNAPSHOT_VERSION, len(w.behaviors))
+    for bid in sorted(w.behaviors):
+        header.pack("<B", bid)
+        header.str(get_behavior(bid).name)
+    return bytes(header.buf + w.buf)
+
+
+def _load_players(r: _Reader, game: "MauGame") -> PlayerManager:
+    min_players, max_players, cp, reverse, count = r.unpack("<BBHBB")
+    pm = PlayerManager(min_players, max_players)
+    pm._cp = cp
+    pm.reverse = GameReverse(reverse)
+    players: list[Player] = []
+    for _ in range(count):
+        pl = Player(game, r.str(), r.str(), r.str())
+        pl.hand = Hand(MauCard.unpack(c) for c in r.cards())
+        pm._storage[pl.user_id] = pl
+        players.append(pl)
+
+    order = r.unpack(f"<{r.u8()}B")
+    pm._players = [players[i].user_id for i in order]
+    for _ in range(r.u8()):
+        user_id = r.str()
+        winner, score = r.unpack("<BI")
+        pm.results[user_id] = GameResult(bool(winner), score)
+    for _ in range(r.u8()):
+        user_id = r.str()
+        pm.player_cost[user_id] = r.unpack("<i")[0]
+    return pm
+
+
+def load_game(cls: type[_G], data: bytes, event_handler: "EventHandler") -> _G:
+    """Восстанавливает игру из двоичного снимка.
+
+    Вернёт исключение, если снимок повреждён, имеет другую версию или
+    ссылается на незарегистрированные поведения.
+    """
+    if data[:4] != SNAPSHOT_MAGIC:
+        raise ValueError("Not a game snapshot")
+
+    r = _Reader(data)
+    r.pos = len(SNAPSHOT_MAGIC)
+    version, behaviors = r.unpack("<BB")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    for _ in range(behaviors):
+        bid = r.u8()
+        local = behavior_id(r.str())
+        if local != bid:
+            r.remap[bid] = local
+
+    room_id = r.str()
+    owner = BaseUser(r.str(), "", "")
+    seed, rng_state, version = r.unpack("<QQQ")
+    game = cls(PlayerManager(), event_handler, room_id, owner, seed)
+
+    rules, flags, state, take_counter, start_cards, has_bluff = r.unpack(
+        "<IBBHBB"
+    )
+    game.rules = RuleSet(rules)
+    game.pipeline = build_pipeline(rules)
+    game.started = bool(flags & 1)
+    game.open = bool(flags & 2)
+    game.state = GameState(state)
+    game.take_counter = take_counter
+    game.start_cards = start_cards
+    if has_bluff:
+        game.bluff_state = (r.str(), bool(r.u8()))
+
+    game.shotgun._cur, game.shotgun._lose = r.unpack("<BB")
+    start, turn, ticks, tick_limit, turn_limit, game_limit = r.unpack("<qqIIII")
+    game.timer = GameTimer(tick_limit, turn_limit, game_limit)
+    game.timer._start = start
+    game.timer._turn = turn
+    game.timer._ticks = ticks
+
+    game.pm = _load_players(r, game)
+    game.deck = _load_deck(r)
+    game.deck.rng = game.rng
+    # Новая игра уже потратила генератор на свой револьвер
+    game.rng.state = rng_state
+    game.version = version
+    journal_owner = BaseUser(r.str(), r.str(), r.str())
+    rules, start_cards, is_open, seats = r.unpack("<IBBH")
+    game.journal = CommandLog.resume(
+        game,
+        journal_owner,
+        [r.str() for _ in range(seats)],
+        (rules, start_cards, bool(is_open)),
+    )
+    return game
@@ -2,11 +2,17 @@
 
 Используется как для подсчёта потраченного времени.
 так и для предупреждения о прошедших лимитах.
+
+Таймер можно привязать к общему планировщику сроков,
+тогда превышение времени на ход или игру будет замечено сразу,
+а не только при следующем ходе.
 """
 
+from collections.abc import Callable, Hashable
 from dataclasses import dataclass
 from enum import IntEnum
 from time import time
+from typing import Protocol
 
 
 class TimerAlert(IntEnum):
@@ -37,6 +43,18 @@ class TimerStat:
     alert: TimerAlert | None
 
 
+class Deadlines(Protocol):
+    """Планировщик сроков, например `mau.scheduler.TimerWheel`."""
+
+    def schedule(
+        self, key: Hashable, delay: float, callback: Callable[[], None]
+    ) -> None:
+        """Устанавливает срок через `delay` секунд, заменяя прежний."""
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменяет срок по ключу."""
+
+
 class GameTimer:
     """Игровой таймер.
 
@@ -46,6 +64,10 @@ class GameTimer:
     После достижения лимитов будет выведено предупреждение.
     Обработка предупреждений происходит на стороне клиента.
 
+    Если таймер привязан к планировщику через `bind`, то ограничения
+    времени на ход и игру регистрируются в нём как сроки.
+    По истечении срока вызывается обработчик с видом предупреждения.
+
     Args:
         tick_limit: Ограничение на общее количество ходов.
         turn_limit: Ограничение времени на ход.
@@ -64,11 +86,74 @@ class GameTimer:
         self._turn_limit = turn_limit
         self._game_limit = game_limit
 
+        self._deadlines: Deadlines | None = None
+        self._key: Hashable = None
+        self._on_alert: Callable[[TimerAlert], None] | None = None
+
+    def set_limits(
+        self, tick_limit: int = 0, turn_limit: int = 0, game_limit: int = 0
+    ) -> None:
+        """Устанавливает новые ограничения таймера.
+
+        Сроки в планировщике обновятся со следующим ходом.
+        """
+        self._tick_limit = tick_limit
+        self._turn_limit = turn_limit
+        self._game_limit = game_limit
+
+    def bind(
+        self,
+        deadlines: Deadlines,
+        key: Hashable,
+        on_alert: Callable[[TimerAlert], None],
+    ) -> None:
+        """Привязывает таймер к планировщику сроков.
+
+        Ключи сроков составляются из `key` и вида предупреждения.
+        Если таймер уже запущен, например после восстановления игры,
+        сроки устанавливаются на оставшееся время.
+        """
+        self._deadlines = deadlines
+        self._key = key
+        self._on_alert = on_alert
+        if self._start:
+            now = int(time())
+            self._schedule(TimerAlert.GAME, self._game_limit, now - self._start)
+            self._schedule(TimerAlert.TURN, self._turn_limit, now - self._turn)
+
+    def _schedule(self, alert: TimerAlert, limit: int, spent: int = 0) -> None:
+        if self._deadlines is None or self._on_alert is None or not limit:
+            return
+        on_alert = self._on_alert
+        self._deadlines.schedule(
+            (self._key, alert), max(limit - spent, 0), lambda: on_alert(alert)
+        )
+
+    def rearm(self, alert: TimerAlert) -> None:
+        """Заново устанавливает срок на полное время.
+
+        Нужен, если обработчик истёкшего срока не смог сменить ход,
+        иначе игра больше никогда не получит этот срок.
+        """
+        if alert == TimerAlert.TURN:
+            self._schedule(alert, self._turn_limit)
+        elif alert == TimerAlert.GAME:
+            self._schedule(alert, self._game_limit)
+
+    def stop(self) -> None:
+        """Отменяет сроки таймера в планировщике."""
+        if self._deadlines is None:
+            return
+        self._deadlines.cancel((self._key, TimerAlert.TURN))
+        self._deadlines.cancel((self._key, TimerAlert.GAME))
+
     def start(self) -> None:
         """Сбрасывает таймер."""
         self._start = int(time())
-        self._turn = int(time())
-        self.ticks = 0
+        self._turn = self._start
+        self._ticks = 0
+        self._schedule(TimerAlert.GAME, self._game_limit)
+        self._schedule(TimerAlert.TURN, self._turn_limit)
 
     def tick(self) -> TimerStat:
         """Обновление таймера.
@@ -80,14 +165,15 @@ class GameTimer:
         Предупреждения выставляются в таком порядке: игрок, счётчик, игра.
         """
         now = int(time())
+        alert: TimerAlert | None = None
 
         turn_delta = now - self._turn
         self._turn = now
+        self._schedule(TimerAlert.TURN, self._turn_limit)
         if self._turn_limit and turn_delta > self._turn_limit:
             alert = TimerAlert.TURN
 
         self._ticks += 1
-        alert: TimerAlert | None = None
         if self._tick_limit and self._ticks > self._tick_limit:
             alert = TimerAlert.TICKS
 
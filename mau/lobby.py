@@ -0,0 +1,295 @@
+"""Индексы комнат для лобби.
+
+Менеджер сессий находит комнату только по её ID.
+Чтобы показать список открытых лобби, найти комнату для быстрой игры
+или собрать статистику, пришлось бы обходить все игры.
+`RoomIndex` поддерживает такие выборки без обхода:
+
+- Открытые лобби со свободными местами, от самых заполненных.
+- Начатые игры.
+- Комнаты по набору правил и по владельцу.
+- Количество комнат, лобби, игр и игроков.
+
+Менеджер сессий отмечает комнату при каждом обращении к ней
+и при каждом событии её игры, а индекс перечитывает отмеченные комнаты
+перед следующей выборкой.
+Потому выборка стоит столько, сколько комнат изменилось с прошлой.
+
+```py
+room_id = sm.lobby.quick_join(rules=GameRules.shotgun)
+print(sm.lobby.stats())
+```
+"""
+
+from collections.abc import Callable, Hashable, Iterator
+from dataclasses import dataclass
+from threading import RLock
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from mau.game.game import MauGame
+
+_K = TypeVar("_K", bound=Hashable)
+
+
+@dataclass(frozen=True, slots=True)
+class RoomInfo:
+    """Сведения о комнате в индексе.
+
+    - room_id: ID комнаты.
+    - owner_id: ID владельца комнаты.
+    - started: Идёт ли игра.
+    - open: Можно ли присоединиться к комнате.
+    - players: Количество игроков.
+    - max_players: Наибольшее количество игроков.
+    - rules: Битовая маска правил `GameRules`.
+    """
+
+    room_id: str
+    owner_id: str
+    started: bool
+    open: bool
+    players: int
+    max_players: int
+    rules: int
+
+    @property
+    def free(self) -> int:
+        """Сколько игроков ещё могут присоединиться к лобби.
+
+        Для начатых и закрытых комнат всегда 0.
+        """
+        if self.started or not self.open:
+            return 0
+        return max(self.max_players - self.players, 0)
+
+
+@dataclass(frozen=True, slots=True)
+class LobbyStats:
+    """Количество комнат по видам.
+
+    - rooms: Всего комнат.
+    - lobbies: Открытых лобби со свободными местами.
+    - started: Начатых игр.
+    - players: Игроков во всех комнатах.
+    """
+
+    rooms: int
+    lobbies: int
+    started: int
+    players: int
+
+
+def room_info(game: "MauGame") -> RoomInfo:
+    """Собирает сведения о комнате из игры."""
+    return RoomInfo(
+        room_id=game.room_id,
+        owner_id=game.owner_id,
+        started=game.started,
+        open=game.open,
+        players=len(game.pm),
+        max_players=game.pm.max_players,
+        rules=game.rules.state,
+    )
+
+
+def _add(index: dict[_K, dict[str, None]], key: _K, room_id: str) -> None:
+    index.setdefault(key, {})[room_id] = None
+
+
+def _discard(index: dict[_K, dict[str, None]], key: _K, room_id: str) -> None:
+    rooms = index.get(key)
+    if rooms is None:
+        return
+    rooms.pop(room_id, None)
+    if not rooms:
+        del index[key]
+
+
+class RoomIndex:
+    """Индексы комнат менеджера сессий.
+
+    Лобби разложены по набору правил, затем по числу свободных мест,
+    а внутри - в порядке поступления, потому быстрая игра находит
+    самое заполненное лобби с нужными правилами без обхода других.
+    Выборки перечитывают комнаты, отмеченные через `touch`.
+    Комнаты читаются без замка игры, потому во время действия игрока
+    сведения о его комнате могут отстать до следующей выборки.
+    Выгруженные комнаты остаются в индексе как были до выгрузки.
+
+    Args:
+        load: Возвращает игру комнаты или `None`, если её нет в памяти.
+
+    """
+
+    __slots__ = (
+        "_load",
+        "_lock",
+        "_rooms",
+        "_dirty",
+        "_free",
+        "_lobbies",
+        "_started",
+        "_by_rules",
+        "_by_owner",
+        "_players",
+    )
+
+    def __init__(self, load: Callable[[str], "MauGame | None"]) -> None:
+        self._load = load
+        self._lock = RLock()
+        self._rooms: dict[str, RoomInfo] = {}
+        self._dirty: dict[str, None] = {}
+        # Правила -> свободные места -> ID лобби
+        self._free: dict[int, dict[int, dict[str, None]]] = {}
+        self._lobbies = 0
+        self._started: dict[str, None] = {}
+        self._by_rules: dict[int, dict[str, None]] = {}
+        self._by_owner: dict[str, dict[str, None]] = {}
+        self._players = 0
+
+    def __len__(self) -> int:
+        """Количество комнат в индексе."""
+        self.refresh()
+        return len(self._rooms)
+
+    def __contains__(self, room_id: str) -> bool:
+        """Есть ли комната в индексе."""
+        self.refresh()
+        return room_id in self._rooms
+
+    # Обновление индекса
+    # ==================
+
+    def touch(self, room_id: str) -> None:
+        """Отмечает, что комната могла измениться."""
+        self._dirty[room_id] = None
+
+    def update(self, game: "MauGame") -> None:
+        """Сразу обновляет сведения о комнате."""
+        with self._lock:
+            self._dirty.pop(game.room_id, None)
+            self._put(room_info(game))
+
+    def remove(self, room_id: str) -> None:
+        """Удаляет комнату из индекса."""
+        with self._lock:
+            self._dirty.pop(room_id, None)
+            info = self._rooms.pop(room_id, None)
+            if info is not None:
+                self._unlink(info)
+
+    def refresh(self) -> None:
+        """Перечитывает все отмеченные комнаты."""
+        if not self._dirty:
+            return
+        with self._lock:
+            while self._dirty:
+                # Другие потоки могут отмечать комнаты во время обхода
+                room_id, _ = self._dirty.popitem()
+                if room_id not in self._rooms:
+                    continue
+                game = self._load(room_id)
+                if game is not None:
+                    self._put(room_info(game))
+
+    def _put(self, info: RoomInfo) -> None:
+        old = self._rooms.get(info.room_id)
+        if old == info:
+            return
+        if old is not None:
+            self._unlink(old)
+        self._rooms[info.room_id] = info
+        self._players += info.players
+        if info.free:
+            _add(self._free.setdefault(info.rules, {}), info.free, info.room_id)
+            self._lobbies += 1
+        if info.started:
+            self._started[info.room_id] = None
+        _add(self._by_rules, info.rules, info.room_id)
+        _add(self._by_owner, info.owner_id, info.room_id)
+
+    def _unlink(self, info: RoomInfo) -> None:
+        self._players -= info.players
+        if info.free:
+            by_free = self._free[info.rules]
+            _discard(by_free, info.free, info.room_id)
+            if not by_free:
+                del self._free[info.rules]
+            self._lobbies -= 1
+        self._started.pop(info.room_id, None)
+        _discard(self._by_rules, info.rules, info.room_id)
+        _discard(self._by_owner, info.owner_id, info.room_id)
+
+    # Выборки
+    # =======
+
+    def get(self, room_id: str) -> RoomInfo | None:
+        """Возвращает сведения о комнате."""
+        self.refresh()
+        return self._rooms.get(room_id)
+
+    def _buckets(self, rules: int | None) -> list[dict[int, dict[str, None]]]:
+        if rules is None:
+            return list(self._free.values())
+        by_free = self._free.get(rules)
+        return [] if by_free is None else [by_free]
+
+    def lobbies(self, rules: int | None = None) -> Iterator[RoomInfo]:
+        """Открытые лобби со свободными местами, от самых заполненных.
+
+        Если указаны правила, возвращает только лобби с этими правилами.
+        """
+        self.refresh()
+        with self._lock:
+            buckets = self._buckets(rules)
+            frees = sorted({free for by_free in buckets for free in by_free})
+            rooms = [
+                self._rooms[room_id]
+                for free in frees
+                for by_free in buckets
+                for room_id in by_free.get(free, ())
+            ]
+        yield from rooms
+
+    def quick_join(self, rules: int | None = None) -> str | None:
+        """Возвращает ID самого заполненного лобби для быстрой игры."""
+        self.refresh()
+        with self._lock:
+            buckets = self._buckets(rules)
+            best: dict[str, None] | None = None
+            best_free = 0
+            for by_free in buckets:
+                free = min(by_free)
+                if best is None or free < best_free:
+                    best, best_free = by_free[free], free
+            return None if best is None else next(iter(best))
+
+    def started(self) -> list[str]:
+        """ID комнат с начатыми играми."""
+        self.refresh()
+        with self._lock:
+            return list(self._started)
+
+    def by_rules(self, rules: int) -> list[str]:
+        """ID комнат с указанным набором правил."""
+        self.refresh()
+        with self._lock:
+            return list(self._by_rules.get(rules, ()))
+
+    def by_owner(self, user_id: str) -> list[str]:
+        """ID комнат, владельцем которых является пользователь."""
+        self.refresh()
+        with self._lock:
+            return list(self._by_owner.get(user_id, ()))
+
+    def stats(self) -> LobbyStats:
+        """Количество комнат, лобби, начатых игр и игроков."""
+        self.refresh()
+        with self._lock:
+            return LobbyStats(
+                rooms=len(self._rooms),
+                lobbies=self._lobbies,
+                started=len(self._started),
+                players=self._players,
+            )
@@ -0,0 +1,151 @@
+"""Журнал движка.
+
+Обёртка над loguru для горячих участков движка.
+Отладочные и информационные сообщения пишутся только под проверкой флага:
+
+```py
+if log.DEBUG:
+    logger.debug("Take {} cards: {}", count, cards)
+```
+
+Если уровень выключен, вызов loguru и подготовка аргументов пропускаются,
+остаётся только проверка флага.
+Начальный уровень берётся из переменной окружения `MAU_LOG_LEVEL`,
+по умолчанию пишутся все сообщения.
+Ошибки и предупреждения пишутся в loguru напрямую, без флагов.
+
+Для нагруженных серверов журнал можно писать пакетами в фоновом потоке,
+см. `use_background_sink`.
+"""
+
+import os
+import sys
+from queue import Empty, SimpleQueue
+from threading import Thread
+from time import monotonic
+from typing import TextIO
+
+from loguru import logger
+
+OFF = "OFF"
+
+DEBUG = True
+INFO = True
+
+_DEBUG_LEVEL = 10
+_INFO_LEVEL = 20
+
+
+def set_level(level: str) -> None:
+    """Устанавливает наименьший уровень сообщений движка.
+
+    Принимает название уровня loguru или `OFF`, чтобы выключить
+    все отладочные и информационные сообщения.
+    """
+    global DEBUG, INFO  # noqa: PLW0603
+    no = sys.maxsize if level == OFF else logger.level(level).no
+    DEBUG = no <= _DEBUG_LEVEL
+    INFO = no <= _INFO_LEVEL
+
+
+def enable(level: str = "DEBUG") -> None:
+    """Включает журнал движка с указанного уровня."""
+    logger.enable("mau")
+    set_level(level)
+
+
+def disable() -> None:
+    """Полностью выключает журнал движка."""
+    logger.disable("mau")
+    set_level(OFF)
+
+
+class BackgroundSink:
+    """Пакетная запись журнала в фоновом потоке.
+
+    Вызывающий поток только кладёт готовое сообщение в очередь.
+    Фоновый поток собирает сообщения в пакеты и записывает каждый пакет
+    в поток вывода одной операцией.
+    Пакет записывается, когда в нём набралось `batch_size` сообщений
+    или с первого сообщения прошло `interval` миллисекунд.
+
+    Args:
+        stream: Куда записывать журнал.
+        batch_size: Наибольшее количество сообщений в пакете.
+        interval: Как долго копить пакет, в миллисекундах.
+
+    """
+
+    __slots__ = ("_stream", "_batch_size", "_interval", "_queue", "_writer")
+
+    def __init__(
+        self, stream: TextIO, batch_size: int = 512, interval: int = 100
+    ) -> None:
+        self._stream = stream
+        self._batch_size = batch_size
+        self._interval = interval / 1000
+        self._queue: SimpleQueue[str | None] = SimpleQueue()
+        self._writer = Thread(
+            target=self._write_loop, name="mau-log-writer", daemon=True
+        )
+        self._writer.start()
+
+    def __call__(self, message: str) -> None:
+        """Передаёт сообщение на запись."""
+        self._queue.put(message)
+
+    def close(self) -> None:
+        """Записывает оставшиеся сообщения и останавливает запись."""
+        self._queue.put(None)
+        self._writer.join()
+
+    def _collect(self, first: str) -> tuple[list[str], bool]:
+        batch = [first]
+        deadline = monotonic() + self._interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                message = self._queue.get(timeout=timeout)
+            except Empty:
+                break
+            if message is None:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    def _write_loop(self) -> None:
+        while (message := self._queue.get()) is not None:
+            batch, stop = self._collect(message)
+            self._stream.write("".join(batch))
+            self._stream.flush()
+            if stop:
+                break
+
+
+def use_background_sink(
+    stream: TextIO = sys.stderr,
+    level: str = "DEBUG",
+    *,
+    batch_size: int = 512,
+    interval: int = 100,
+) -> tuple[int, BackgroundSink]:
+    """Направляет сообщения движка в фоновую пакетную запись.
+
+    Возвращает идентификатор обработчика loguru и сам обработчик.
+    Перед закрытием обработчика его нужно убрать из loguru:
+
+    ```py
+    handler_id, sink = log.use_background_sink()
+    ...
+    logger.remove(handler_id)
+    sink.close()
+    ```
+    """
+    sink = BackgroundSink(stream, batch_size, interval)
+    handler_id = logger.add(sink, level=level, filter="mau")
+    return handler_id, sink
+
+
+set_level(os.environ.get("MAU_LOG_LEVEL", "DEBUG"))
@@ -0,0 +1,363 @@
+"""Подбор игроков.
+
+Вместо поиска открытой комнаты пользователь встаёт в очередь подбора,
+а `Matchmaker` сам собирает из ожидающих комнаты и начинает в них игры.
+Пользователь может попросить набор правил `GameRules`, тогда он
+попадёт только в комнату с этими правилами.
+
+Полные комнаты собираются сразу.
+Если полной комнаты не набралось за `fill_wait` секунд, игра начинается
+с теми, кто есть, но не меньше `min_players`.
+Кто прождал дольше `max_wait`, теряет свои правила и попадает
+в первую же комнату, потому ожидание ограничено, если в очереди
+вообще есть с кем играть.
+
+```py
+mm = Matchmaker(sm, max_players=4)
+mm.enqueue(user, rules=GameRules.shotgun | GameRules.one_winner)
+asyncio.create_task(sm.run_timers())
+```
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from itertools import islice
+from threading import Lock
+from time import monotonic
+from typing import Any
+from uuid import uuid4
+
+from loguru import logger
+
+from mau import log
+from mau.deck.deck import Deck
+from mau.deck.presets import CLASSIC
+from mau.game.game import MauGame
+from mau.game.player import BaseUser
+from mau.session import SessionManager
+
+
+@dataclass(slots=True)
+class _Ticket:
+    user: BaseUser
+    rules: int | None
+    since: float
+    queued: bool = True
+    overdue: bool = False
+
+
+def _new_room_id() -> str:
+    return f"mm-{uuid4().hex}"
+
+
+class Matchmaker:
+    """Очередь подбора игроков для менеджера сессий.
+
+    Ожидающие разложены по очередям с одинаковыми правилами.
+    Постановка в очередь стоит O(log n), отмена O(1), а подбор
+    смотрит только на начало каждой очереди.
+    Пользователи без правил и те, кто ждёт дольше `max_wait`,
+    дополняют любые комнаты.
+
+    Комнаты собираются через `SessionManager.create` и `join`,
+    а события одной комнаты отправляются одним пакетом.
+    Пользователь в игре не может встать в очередь.
+    Очередь не мешает пользователю самому войти в другую игру,
+    тогда при сборке комнаты он покидает очередь.
+    Если без него игроков не хватает, остальные возвращаются в очередь,
+    а комната не создаётся.
+
+    Args:
+        sm: Менеджер сессий, в котором создаются комнаты.
+        deck: Возвращает колоду для новой игры.
+        min_players: Наименьшее количество игроков в комнате.
+        max_players: Наибольшее количество игроков в комнате.
+        fill_wait: Сколько секунд ждать полную комнату.
+        max_wait: Через сколько секунд пользователь теряет свои правила.
+        rules: Правила комнат для пользователей без своих правил.
+        room_id: Возвращает ID для новой комнаты.
+        interval: Как часто подбирать игроков в колесе таймеров
+            менеджера, 0 чтобы вызывать `match` вручную.
+
+    """
+
+    __slots__ = (
+        "_sm",
+        "_deck",
+        "min_players",
+        "max_players",
+        "fill_wait",
+        "max_wait",
+        "rules",
+        "_room_id",
+        "interval",
+        "_lock",
+        "_tickets",
+        "_queues",
+        "_any",
+        "_overdue",
+        "_deadlines",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        sm: SessionManager[Any],
+        *,
+        deck: Callable[[], Deck] = CLASSIC.deck,
+        min_players: int = 2,
+        max_players: int = 8,
+        fill_wait: float = 5,
+        max_wait: float = 30,
+        rules: int = 0,
+        room_id: Callable[[], str] = _new_room_id,
+        interval: float = 1,
+    ) -> None:
+        if not 1 < min_players <= max_players:
+            raise ValueError("Invalid player limits")
+        self._sm = sm
+        self._deck = deck
+        self.min_players = min_players
+        self.max_players = max_players
+        self.fill_wait = fill_wait
+        self.max_wait = max_wait
+        self.rules = rules
+        self._room_id = room_id
+        self.interval = interval
+        self._lock = Lock()
+        self._tickets: dict[str, _Ticket] = {}
+        self._queues: dict[int, dict[str, _Ticket]] = {}
+        self._any: dict[str, _Ticket] = {}
+        self._overdue: dict[str, _Ticket] = {}
+        self._deadlines: list[tuple[float, str]] = []
+        self._schedule()
+
+    def __len__(self) -> int:
+        """Количество пользователей в очереди."""
+        return len(self._tickets)
+
+    def __contains__(self, user_id: str) -> bool:
+        """Стоит ли пользователь в очереди."""
+        return user_id in self._tickets
+
+    # Очередь
+    # =======
+
+    def enqueue(
+        self, user: BaseUser, rules: int | None = None, now: float | None = None
+    ) -> None:
+        """Ставит пользователя в очередь подбора.
+
+        Вернёт исключение, если пользователь уже в игре или в очереди.
+        """
+        now = monotonic() if now is None else now
+        if self._sm.storage.get_player(user.id) is not None:
+            raise ValueError("User already in game")
+        ticket = _Ticket(user, rules, now)
+        with self._lock:
+            if user.id in self._tickets:
+                raise ValueError("User already in queue")
+            self._tickets[user.id] = ticket
+            self._queue(ticket)[user.id] = ticket
+            if rules is not None:
+                heappush(self._deadlines, (now + self.max_wait, user.id))
+
+    def cancel(self, user_id: str) -> bool:
+        """Убирает пользователя из очереди.
+
+        Возвращает `False`, если пользователя нет в очереди
+        или для него уже собирается комната.
+        """
+        with self._lock:
+            ticket = self._tickets.get(user_id)
+            if ticket is None or not ticket.queued:
+                return False
+            del self._tickets[user_id]
+            self._unqueue(ticket)
+            return True
+
+    def _queue(self, ticket: _Ticket) -> dict[str, _Ticket]:
+        if ticket.overdue:
+            return self._overdue
+        if ticket.rules is None:
+            return self._any
+        return self._queues.setdefault(ticket.rules, {})
+
+    def _unqueue(self, ticket: _Ticket) -> None:
+        queue = self._queue(ticket)
+        queue.pop(ticket.user.id, None)
+        if ticket.rules is not None and not ticket.overdue and not queue:
+            del self._queues[ticket.rules]
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, user_id = heappop(self._deadlines)
+            ticket = self._tickets.get(user_id)
+            # Пользователь мог выйти из очереди и встать в неё снова
+            if ticket is None or ticket.overdue or not ticket.queued:
+                continue
+            if ticket.since + self.max_wait > now:
+                continue
+            self._unqueue(ticket)
+            ticket.overdue = True
+            self._overdue[user_id] = ticket
+
+    # Подбор
+    # ======
+
+    def _take(
+        self, queue: dict[str, _Ticket], group: list[_Ticket], count: int
+    ) -> None:
+        for user_id in list(islice(queue, count)):
+            ticket = queue.pop(user_id)
+            ticket.queued = False
+            group.append(ticket)
+
+    def _fill(self, group: list[_Ticket]) -> None:
+        for queue in (self._overdue, self._any):
+            if len(group) < self.max_players:
+                self._take(queue, group, self.max_players - len(group))
+
+    def _ready(self, queue: dict[str, _Ticket], now: float) -> bool:
+        return bool(queue) and (
+            next(iter(queue.values())).since + self.fill_wait <= now
+        )
+
+    def _groups(self, now: float) -> list[tuple[int, list[_Ticket]]]:
+        self._expire(now)
+        groups: list[tuple[int, list[_Ticket]]] = []
+        spare = len(self._overdue) + len(self._any)
+        for rules, queue in list(self._queues.items()):
+            while len(queue) >= self.max_players or (
+                self._ready(queue, now)
+                and len(queue) + spare >= self.min_players
+            ):
+                group: list[_Ticket] = []
+                self._take(queue, group, self.max_players)
+                self._fill(group)
+                spare = len(self._overdue) + len(self._any)
+                groups.append((rules, group))
+            if not queue:
+                del self._queues[rules]
+
+        while spare >= self.max_players or (
+            spare >= self.min_players
+            and (self._ready(self._overdue, now) or self._ready(self._any, now))
+        ):
+            group = []
+            self._fill(group)
+            spare -= len(group)
+            groups.append((self.rules, group))
+        return groups
+
+    def match(self, now: float | None = None) -> list[MauGame]:
+        """Собирает комнаты из ожидающих и начинает в них игры.
+
+        Возвращает начатые игры.
+        """
+        now = monotonic() if now is None else now
+        with self._lock:
+            groups = self._groups(now)
+
+        games: list[MauGame] = []
+        for rules, group in groups:
+            game = self._open(rules, group)
+            if game is not None:
+                games.append(game)
+        if log.INFO and games:
+            logger.info(
+                "Matched {} rooms, {} users waiting", len(games), len(self)
+            )
+        return games
+
+    def _free_users(self, group: list[_Ticket]) -> list[_Ticket]:
+        storage = self._sm.storage
+        free: list[_Ticket] = []
+        for ticket in group:
+            # Пользователь сам вошёл в другую игру, пока ждал
+            if storage.get_player(ticket.user.id) is not None:
+                self._done(ticket)
+            else:
+                free.append(ticket)
+        return free
+
+    def _create(
+        self, room_id: str, group: list[_Ticket]
+    ) -> tuple[MauGame, _Ticket] | None:
+        while group:
+            ticket = group.pop(0)
+            try:
+                game = self._sm.create(
+                    room_id, ticket.user, self.min_players, self.max_players
+                )
+            except ValueError:
+                # Пользователь успел попасть в другую игру
+                self._done(ticket)
+            else:
+                return game, ticket
+        return None
+
+    def _open(self, rules: int, group: list[_Ticket]) -> MauGame | None:
+        group = self._free_users(group)
+        if len(group) < self.min_players:
+            self._requeue(group)
+            return None
+
+        room_id = self._room_id()
+        created = self._create(room_id, group)
+        if created is None:
+            return None
+
+        game, owner = created
+        joined = [owner]
+        with game.lock, game.batch():
+            for ticket in group:
+                try:
+                    player = self._sm.join(room_id, ticket.user)
+                except ValueError:
+                    player = None
+                if player is None:
+                    self._done(ticket)
+                    continue
+                joined.append(ticket)
+
+            if len(joined) < self.min_players:
+                self._sm.remove(room_id)
+                self._requeue(joined)
+                return None
+            game.rules.state = rules
+            game.start(self._deck())
+
+        with self._lock:
+            for ticket in joined:
+                self._tickets.pop(ticket.user.id, None)
+        if log.DEBUG:
+            logger.debug("Start room {} with {} users", room_id, len(joined))
+        return game
+
+    def _done(self, ticket: _Ticket) -> None:
+        with self._lock:
+            self._tickets.pop(ticket.user.id, None)
+
+    def _requeue(self, group: list[_Ticket]) -> None:
+        with self._lock:
+            for ticket in group:
+                ticket.queued = True
+                self._queue(ticket)[ticket.user.id] = ticket
+                if ticket.rules is not None and not ticket.overdue:
+                    deadline = ticket.since + self.max_wait
+                    heappush(self._deadlines, (deadline, ticket.user.id))
+
+    # Колесо таймеров
+    # ===============
+
+    def _schedule(self) -> None:
+        if self.interval <= 0:
+            return
+        self._sm.timers.schedule(("mau", "match"), self.interval, self._tick)
+
+    def _tick(self) -> None:
+        try:
+            self.match()
+        finally:
+            self._schedule()
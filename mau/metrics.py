@@ -0,0 +1,300 @@
+"""Метрики движка.
+
+Количество вызовов и гистограммы задержек для основных действий
+менеджера сессий, игры и игроков.
+По умолчанию метрики выключены и ничего не стоят: методы движка
+оборачиваются замерами только при первом вызове `enable()`.
+Дальше `enable()` и `disable()` только переключают флаги действий,
+потому замеры можно включать для отдельных действий по названию,
+а выключенное действие стоит одну проверку флага.
+
+```py
+metrics.enable("game.process_turn", "game.next_turn")
+...
+print(metrics.render())
+metrics.disable()
+```
+
+Время обработки событий замеряется отдельно от действий игры,
+потому видно, сколько времени занимает сам движок,
+а сколько обработчик событий.
+Счётчики и гистограммы защищены замками, потому метрики можно
+обновлять из нескольких потоков вместе с менеджером сессий.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import wraps
+from importlib import import_module
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
+# Границы корзин гистограмм задержек в секундах
+LATENCY_BUCKETS = (
+    0.000_005,
+    0.000_01,
+    0.000_025,
+    0.000_05,
+    0.000_1,
+    0.000_25,
+    0.000_5,
+    0.001,
+    0.002_5,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+# Замеряемые методы: модуль, класс, метод и название метрики
+_TARGETS = (
+    ("mau.session", "SessionManager", "create", "session.create"),
+    ("mau.session", "SessionManager", "join", "session.join"),
+    ("mau.session", "SessionManager", "leave", "session.leave"),
+    ("mau.session", "SessionManager", "remove", "session.remove"),
+    ("mau.game.game", "MauGame", "start", "game.start"),
+    ("mau.game.game", "MauGame", "process_turn", "game.process_turn"),
+    ("mau.game.game", "MauGame", "next_turn", "game.next_turn"),
+    ("mau.game.player", "Player", "take_cards", "player.take_cards"),
+    ("mau.game.player", "Player", "dispatch", "events.dispatch"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class HistogramSnapshot:
+    """Снимок гистограммы.
+
+    - bounds: Верхние границы корзин, последняя корзина без границы.
+    - counts: Количество значений в каждой корзине, не накопительно.
+    - total: Сумма всех значений.
+    - count: Количество значений.
+    """
+
+    bounds: tuple[float, ...]
+    counts: tuple[int, ...]
+    total: float
+    count: int
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsSnapshot:
+    """Снимок всех метрик."""
+
+    counters: dict[str, int]
+    histograms: dict[str, HistogramSnapshot]
+
+
+class Histogram:
+    """Гистограмма с заранее заданными корзинами.
+
+    Значение попадает в первую корзину, граница которой не меньше его.
+    Значения больше последней границы попадают в отдельную корзину.
+    """
+
+    __slots__ = ("bounds", "counts", "total", "count", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        """Добавляет значение в гистограмму."""
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def clear(self) -> None:
+        """Обнуляет гистограмму."""
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.total = 0.0
+            self.count = 0
+
+    def snapshot(self) -> HistogramSnapshot:
+        """Возвращает неизменяемую копию гистограммы."""
+        with self._lock:
+            return HistogramSnapshot(
+                self.bounds, tuple(self.counts), self.total, self.count
+            )
+
+
+class Metrics:
+    """Хранилище счётчиков и гистограмм."""
+
+    __slots__ = ("counters", "histograms", "_lock")
+
+    def __init__(self) -> None:
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = Lock()
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Увеличивает счётчик."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def histogram(self, name: str) -> Histogram:
+        """Возвращает гистограмму, создавая её при первом обращении."""
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram())
+        return hist
+
+    def observe(self, name: str, value: float) -> None:
+        """Добавляет значение в гистограмму."""
+        self.histogram(name).observe(value)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Возвращает копию всех метрик."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = list(self.histograms.items())
+        return MetricsSnapshot(
+            counters, {name: h.snapshot() for name, h in histograms}
+        )
+
+    def reset(self) -> None:
+        """Обнуляет все метрики."""
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+            histograms = list(self.histograms.values())
+        for hist in histograms:
+            hist.clear()
+
+    def render(self, prefix: str = "mau") -> str:
+        """Представляет метрики в текстовом формате Prometheus.
+
+        Гистограммы задержек выводятся в секундах.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot.counters.items()):
+            metric = _metric_name(prefix, name, "total")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        for name, hist in sorted(snapshot.histograms.items()):
+            metric = _metric_name(prefix, name, "seconds")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(hist.bounds, hist.counts, strict=False):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.count}')
+            lines.append(f"{metric}_sum {hist.total}")
+            lines.append(f"{metric}_count {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(prefix: str, name: str, suffix: str) -> str:
+    return f"{prefix}_{name.replace('.', '_')}_{suffix}"
+
+
+registry = Metrics()
+
+# Названия всех замеряемых действий
+NAMES = frozenset(name for *_, name in _TARGETS)
+
+# Действия, для которых сейчас собираются метрики
+_active: frozenset[str] = frozenset()
+_installed = False
+_switch_lock = Lock()
+
+
+def _timed(func: Callable[..., Any], name: str) -> Callable[..., Any]:
+    hist = registry.histogram(name)
+    calls = f"{name}.calls"
+    errors = f"{name}.errors"
+    # Счётчик вызовов выводится рядом с гистограммой даже без вызовов
+    registry.inc(calls, 0)
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        if name not in _active:
+            return func(*args, **kwargs)
+        registry.inc(calls)
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            registry.inc(errors)
+            raise
+        finally:
+            hist.observe(perf_counter() - start)
+
+    return wrapper
+
+
+def _install() -> None:
+    global _installed  # noqa: PLW0603
+    if _installed:
+        return
+    for module, cls_name, attr, name in _TARGETS:
+        cls = getattr(import_module(module), cls_name)
+        setattr(cls, attr, _timed(cls.__dict__[attr], name))
+    _installed = True
+
+
+def _names(names: tuple[str, ...]) -> frozenset[str]:
+    if not names:
+        return NAMES
+    unknown = set(names) - NAMES
+    if unknown:
+        raise ValueError(f"Unknown metrics {', '.join(sorted(unknown))}")
+    return frozenset(names)
+
+
+def enabled(name: str | None = None) -> bool:
+    """Включены ли метрики действия, или хотя бы одного без названия."""
+    return bool(_active) if name is None else name in _active
+
+
+def enable(*names: str) -> None:
+    """Включает сбор метрик для действий движка.
+
+    Без названий включает все действия из `NAMES`.
+    """
+    global _active  # noqa: PLW0603
+    selected = _names(names)
+    with _switch_lock:
+        _install()
+        _active = _active | selected
+
+
+def disable(*names: str) -> None:
+    """Выключает сбор метрик для действий движка.
+
+    Без названий выключает все действия.
+    Собранные значения сохраняются до вызова `reset()`.
+    """
+    global _active  # noqa: PLW0603
+    selected = _names(names)
+    with _switch_lock:
+        _active = _active - selected
+
+
+def snapshot() -> MetricsSnapshot:
+    """Возвращает копию всех метрик."""
+    return registry.snapshot()
+
+
+def reset() -> None:
+    """Обнуляет все метрики."""
+    registry.reset()
+
+
+def render() -> str:
+    """Представляет метрики в текстовом формате Prometheus."""
+    return registry.render()
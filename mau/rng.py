@@ -0,0 +1,72 @@
+"""Генератор случайных чисел игры.
+
+Каждая игра владеет своим генератором, засеянным при создании игры.
+Потому игру можно повторить ход в ход по начальному значению
+и журналу команд, см. `mau.game.journal`.
+
+В отличие от `random.Random` всё состояние генератора умещается
+в одно 64-битное число, которое дёшево сохранить в снимок игры.
+Последовательность чисел не зависит от версии Python.
+"""
+
+from collections.abc import MutableSequence, Sequence
+from random import getrandbits
+from typing import TypeVar
+
+_T = TypeVar("_T")
+
+_MASK = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+
+
+def new_seed() -> int:
+    """Возвращает случайное начальное значение для новой игры."""
+    return getrandbits(64)
+
+
+class GameRandom:
+    """Генератор SplitMix64.
+
+    Args:
+        seed: Начальное значение, по умолчанию случайное.
+
+    """
+
+    __slots__ = ("seed", "state")
+
+    def __init__(self, seed: int | None = None) -> None:
+        self.seed = new_seed() if seed is None else seed & _MASK
+        self.state = self.seed
+
+    def next(self) -> int:
+        """Возвращает следующее 64-битное число."""
+        self.state = z = (self.state + _GAMMA) & _MASK
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+        return z ^ (z >> 31)
+
+    def randbelow(self, n: int) -> int:
+        """Возвращает случайное число от 0 до `n` не включительно.
+
+        Число получается умножением со сдвигом за один шаг генератора.
+        Смещение распределения не больше `n / 2**64`.
+        """
+        if n <= 0:
+            raise ValueError("Upper bound must be positive")
+        return (self.next() * n) >> 64
+
+    def randint(self, a: int, b: int) -> int:
+        """Возвращает случайное число от `a` до `b` включительно."""
+        return a + self.randbelow(b - a + 1)
+
+    def choice(self, seq: Sequence[_T]) -> _T:
+        """Выбирает случайный элемент последовательности."""
+        if not seq:
+            raise ValueError("Can`t choose from an empty sequence")
+        return seq[self.randbelow(len(seq))]
+
+    def shuffle(self, seq: MutableSequence[_T]) -> None:
+        """Перемешивает последовательность на месте."""
+        for i in range(len(seq) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            seq[i], seq[j] = seq[j], seq[i]
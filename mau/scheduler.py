@@ -0,0 +1,203 @@
+"""Планировщик таймеров.
+
+Общее колесо таймеров для ограничений времени во всех комнатах.
+Комнаты сами регистрируют и отменяют свои сроки при смене хода,
+потому клиенту не нужно опрашивать каждую комнату.
+
+Колесо разбито на ячейки по `resolution` секунд.
+Таймер попадает в ячейку своего срока, а каждый шаг колеса проверяет
+только одну ячейку.
+Потому добавление, отмена и шаг колеса стоят O(1) и не зависят
+от общего количества таймеров.
+Таймеры со сроком дальше одного оборота колеса ждут в куче
+и переходят на колесо, когда до срока остаётся меньше оборота.
+Их добавление стоит O(log n), а на колесе они не проверяются
+лишний раз.
+
+Колесо можно использовать из нескольких потоков.
+Обработчики таймеров вызываются без замка колеса, потому могут
+сами устанавливать и отменять таймеры.
+
+```py
+wheel = TimerWheel()
+wheel.schedule(("room", TimerAlert.TURN), 60, on_timeout)
+asyncio.create_task(wheel.run())
+```
+"""
+
+import asyncio
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from heapq import heapify, heappop, heappush
+from itertools import count
+from math import ceil
+from threading import Lock
+from time import monotonic
+
+from loguru import logger
+
+
+@dataclass(slots=True)
+class _Timer:
+    deadline: int
+    callback: Callable[[], None]
+    far: bool = False
+
+
+# Срок, порядок добавления, ключ и таймер в куче дальних таймеров
+_FarEntry = tuple[int, int, Hashable, _Timer]
+
+
+class TimerWheel:
+    """Колесо таймеров.
+
+    Каждый таймер привязывается к ключу, у одного ключа может быть
+    только один таймер.
+    Повторная установка таймера по ключу заменяет предыдущий.
+
+    Args:
+        resolution: Длительность одной ячейки колеса в секундах.
+        size: Количество ячеек колеса.
+
+    """
+
+    __slots__ = (
+        "_resolution",
+        "_slots",
+        "_timers",
+        "_far",
+        "_far_count",
+        "_seq",
+        "_tick",
+        "_origin",
+        "_lock",
+    )
+
+    def __init__(self, resolution: float = 0.1, size: int = 1024) -> None:
+        if resolution <= 0 or size <= 0:
+            raise ValueError("Resolution and size must be positive")
+        self._resolution = resolution
+        self._slots: list[dict[Hashable, _Timer]] = [{} for _ in range(size)]
+        self._timers: dict[Hashable, _Timer] = {}
+        self._far: list[_FarEntry] = []
+        self._far_count = 0
+        self._seq = count()
+        self._tick = 0
+        self._origin = monotonic()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        """Количество установленных таймеров."""
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Установлен ли таймер с таким ключом."""
+        return key in self._timers
+
+    @property
+    def resolution(self) -> float:
+        """Длительность одной ячейки колеса в секундах."""
+        return self._resolution
+
+    def schedule(
+        self,
+        key: Hashable,
+        delay: float,
+        callback: Callable[[], None],
+        now: float | None = None,
+    ) -> None:
+        """Устанавливает таймер через `delay` секунд.
+
+        Таймер сработает не раньше указанного времени и не позже
+        следующего шага колеса после него.
+        Срок отсчитывается от текущего времени, а не от последнего шага,
+        потому отставшее колесо не сокращает таймеры.
+        """
+        now = monotonic() if now is None else now
+        ticks = max(1, ceil(delay / self._resolution))
+        start = int((now - self._origin) / self._resolution)
+        with self._lock:
+            self._cancel(key)
+            timer = _Timer(max(start, self._tick) + ticks, callback)
+            self._timers[key] = timer
+            if timer.deadline - self._tick < len(self._slots):
+                self._slots[timer.deadline % len(self._slots)][key] = timer
+                return
+            timer.far = True
+            self._far_count += 1
+            heappush(self._far, (timer.deadline, next(self._seq), key, timer))
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменяет таймер, возвращает был ли такой таймер."""
+        with self._lock:
+            return self._cancel(key)
+
+    def _cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        if not timer.far:
+            del self._slots[timer.deadline % len(self._slots)][key]
+            return True
+        # Запись остаётся в куче и пропускается, когда до неё дойдёт очередь
+        self._far_count -= 1
+        if len(self._far) > 2 * self._far_count + 64:
+            self._far = [e for e in self._far if self._timers.get(e[2]) is e[3]]
+            heapify(self._far)
+        return True
+
+    def _pull_far(self) -> None:
+        # Переносит на колесо таймеры, до срока которых меньше оборота
+        horizon = self._tick + len(self._slots)
+        while self._far and self._far[0][0] < horizon:
+            _, _, key, timer = heappop(self._far)
+            if self._timers.get(key) is not timer:
+                continue
+            timer.far = False
+            self._far_count -= 1
+            self._slots[timer.deadline % len(self._slots)][key] = timer
+
+    def advance(self, now: float | None = None) -> int:
+        """Продвигает колесо до указанного момента.
+
+        Вызывает все истёкшие таймеры и возвращает их количество.
+        Время берётся из `time.monotonic`.
+        Таймеры, установленные внутри обработчиков, сработают
+        не раньше следующего шага.
+        """
+        now = monotonic() if now is None else now
+        target = int((now - self._origin) / self._resolution)
+        fired = 0
+        while due := self._next_due(target):
+            for key, timer in due:
+                try:
+                    timer.callback()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Timer {} callback failed", key)
+            fired += len(due)
+        return fired
+
+    def _next_due(self, target: int) -> list[tuple[Hashable, _Timer]]:
+        # Снимает с колеса таймеры ближайшего шага, где они есть
+        with self._lock:
+            while self._tick < target:
+                self._tick += 1
+                self._pull_far()
+                slot = self._slots[self._tick % len(self._slots)]
+                due = [
+                    (key, timer)
+                    for key, timer in slot.items()
+                    if timer.deadline <= self._tick
+                ]
+                for key, _ in due:
+                    del slot[key]
+                    del self._timers[key]
+                if due:
+                    return due
+            return []
+
+    async def run(self) -> None:
+        """Продвигает колесо в цикле asyncio, пока задачу не отменят."""
+        while True:
+            await asyncio.sleep(self._resolution)
+            self.advance()
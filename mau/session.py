@@ -5,17 +5,83 @@
 Он уже и будет руководить всеми играми и игроками.
 """
 
-from typing import Generic, TypeVar
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from functools import partial
+from threading import Lock
+from time import time
+from typing import Any, Generic, TypeVar
 
 from loguru import logger
 
-from mau.events import EventHandler, GameEvents
+from mau import log
+from mau.events import Event, EventHandler, GameEvents, event_batch
+from mau.eviction import Eviction, room_size
 from mau.game.game import MauGame
 from mau.game.player import BaseUser, Player
 from mau.game.player_manager import PlayerManager
+from mau.game.timer import TimerAlert
+from mau.lobby import RoomIndex
+from mau.scheduler import TimerWheel
+from mau.storage import MemoryStorage, SessionStorage
 
 _H = TypeVar("_H", bound=EventHandler)
 
+TimeoutHandler = Callable[[MauGame, TimerAlert], None]
+
+
+@dataclass(frozen=True, slots=True)
+class RoomImage:
+    """Комната, выгруженная из менеджера сессий.
+
+    - room_id: ID комнаты.
+    - data: Снимок игры `MauGame.snapshot`.
+    - players: Пользователи, отмеченные активными игроками комнаты.
+    """
+
+    room_id: str
+    data: bytes
+    players: tuple[str, ...]
+
+
+def skip_on_timeout(game: MauGame, alert: TimerAlert) -> None:
+    """Обработчик истечения времени по умолчанию.
+
+    По истечении времени на ход пропускает ход текущего игрока.
+    По истечении времени на игру завершает игру.
+    """
+    if alert == TimerAlert.TURN:
+        game.skip_turn()
+    elif alert == TimerAlert.GAME:
+        game.end()
+
+
+class _RoomHandler:
+    """Отмечает комнату изменённой при каждом событии её игры.
+
+    Комната отмечается в хранилище и в индексе лобби.
+    Передаёт события и пакеты событий обработчику менеджера.
+    """
+
+    __slots__ = ("_handler", "_storage", "_lobby")
+
+    def __init__(
+        self, handler: EventHandler, storage: SessionStorage, lobby: RoomIndex
+    ) -> None:
+        self._handler = handler
+        self._storage = storage
+        self._lobby = lobby
+
+    def dispatch(self, event: Event[Any]) -> None:
+        room_id = event.game.room_id
+        self._storage.mark_dirty(room_id)
+        self._lobby.touch(room_id)
+        self._handler.dispatch(event)
+
+    def batch(self) -> AbstractContextManager[None]:
+        return event_batch(self._handler)
+
 
 class SessionManager(Generic[_H]):
     """Менеджер сессий.
@@ -26,33 +92,163 @@ class SessionManager(Generic[_H]):
 
     При создании применяет обработчик событий, который будет использоваться
     для взаимодействия с игровыми событиями.
+    Если хранилище не указано, все игры хранятся в памяти.
+    При создании менеджер загружает из хранилища ранее сохранённые игры.
+
+    Каждое обращение к игре через менеджер и каждое событие игры
+    отмечают её изменённой, чтобы хранилище могло сохранить её позже.
+    Накопленные изменения сохраняются колесом таймеров каждые
+    `flush_interval` секунд.
+
+    Менеджер владеет общим колесом таймеров для всех игр.
+    Ограничения времени на ход и игру регистрируются в нём как сроки,
+    а по их истечении вызывается `on_timeout`.
+    Колесо нужно продвигать через `run_timers` или `timers.advance()`.
+
+    Менеджер можно использовать из нескольких потоков вместе
+    с потокобезопасным хранилищем, например `ShardedStorage`.
+    Действия менеджера с игрой выполняются под замком комнаты
+    `MauGame.lock`, а проверка и отметка активных игроков под общим
+    замком менеджера.
+    Замки берутся в таком порядке: сначала комната, потом игроки.
+
+    С политикой `eviction` менеджер выгружает неактивные комнаты
+    и загружает их обратно при следующем обращении, см. `mau.eviction`.
+    Потому не стоит хранить ссылку на игру дольше одного обращения.
+
+    Для списка лобби, быстрой игры и статистики менеджер ведёт индекс
+    комнат `lobby`, см. `mau.lobby`.
+    Игры менеджера отправляют события через обработчик, который
+    отмечает комнату в хранилище и индексе и передаёт событие
+    `event_handler`.
     """
 
-    __slots__ = ("_games", "_players", "_event_handler", "_active_players")
+    __slots__ = (
+        "_storage",
+        "_handler",
+        "_timers",
+        "_on_timeout",
+        "_players_lock",
+        "_eviction",
+        "_lobby",
+        "_flush_interval",
+    )
 
     def __init__(
         self,
         event_handler: _H,
+        storage: SessionStorage | None = None,
+        on_timeout: TimeoutHandler = skip_on_timeout,
+        eviction: Eviction | None = None,
+        flush_interval: float = 1,
     ) -> None:
-        self._games: dict[str, MauGame] = {}
-        self._active_players: dict[str, str] = {}
-        self._event_handler = event_handler
+        self._storage: SessionStorage = storage or MemoryStorage()
+        self._timers = TimerWheel()
+        self._on_timeout = on_timeout
+        self._players_lock = Lock()
+        self._eviction = eviction
+        self._flush_interval = flush_interval
+        self._lobby = RoomIndex(self._storage.get_game)
+        self._handler = _RoomHandler(event_handler, self._storage, self._lobby)
+        self._storage.load(self._handler)
+        now = time()
+        for game in self._storage.games():
+            self._bind_timer(game)
+            self._lobby.update(game)
+            if eviction is not None:
+                eviction.touch(game.room_id, now)
+        if eviction is not None:
+            self._schedule_sweep()
+        self._schedule_flush()
+
+    @property
+    def storage(self) -> SessionStorage:
+        """Хранилище игр и активных игроков."""
+        return self._storage
+
+    @property
+    def timers(self) -> TimerWheel:
+        """Общее колесо таймеров для всех игр."""
+        return self._timers
+
+    @property
+    def lobby(self) -> RoomIndex:
+        """Индекс комнат для списка лобби и статистики."""
+        return self._lobby
+
+    async def run_timers(self) -> None:
+        """Продвигает колесо таймеров в цикле asyncio."""
+        await self._timers.run()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_interval <= 0:
+            return
+        self._timers.schedule(
+            ("mau", "flush"), self._flush_interval, self._flush_tick
+        )
+
+    def _flush_tick(self) -> None:
+        try:
+            self._storage.flush()
+        finally:
+            self._schedule_flush()
+
+    def _bind_timer(self, game: MauGame) -> None:
+        game.timer.bind(
+            self._timers, game.room_id, partial(self._timeout, game.room_id)
+        )
+
+    def _timeout(self, room_id: str, alert: TimerAlert) -> None:
+        # Срабатывание таймера не считается обращением к комнате
+        game = self._storage.get_game(room_id)
+        if game is None:
+            return
+        self._storage.mark_dirty(room_id)
+        self._lobby.touch(room_id)
+        with game.lock:
+            if not game.started:
+                return
+            if log.INFO:
+                logger.info("Timeout {} in room {}", alert.name, room_id)
+            version = game.version
+            failed = True
+            try:
+                self._on_timeout(game, alert)
+                failed = False
+            finally:
+                # Обработчик не сменил ход, потому новый срок не установлен
+                if game.started and (failed or game.version == version):
+                    game.timer.rearm(alert)
 
     def player(self, user_id: str) -> Player | None:
         """Возвращает игрока напрямую из хранилища по ID пользователя."""
-        game_id = self._active_players.get(user_id)
+        game_id = self._storage.get_player(user_id)
         if game_id is None:
             return None
-        game = self._games.get(game_id)
+        game = self.room(game_id)
         if game is None:
-            self._active_players.pop(user_id)
+            self._storage.remove_player(user_id)
             return None
-
         return game.pm.get(user_id)
 
     def room(self, room_id: str) -> MauGame | None:
-        """Возвращает игру напрямую из хранилища по ID комнаты."""
-        return self._games.get(room_id)
+        """Возвращает игру напрямую из хранилища по ID комнаты.
+
+        Выгруженная комната загружается обратно.
+        """
+        game = self._load(room_id)
+        if game is not None:
+            self._storage.mark_dirty(room_id)
+            self._lobby.touch(room_id)
+            if self._eviction is not None:
+                self._eviction.touch(room_id, time())
+        return game
+
+    def _load(self, room_id: str) -> MauGame | None:
+        game = self._storage.get_game(room_id)
+        if game is None and self._eviction is not None:
+            return self._rehydrate(room_id)
+        return game
 
     def join(self, room_id: str, user: BaseUser) -> Player | None:
         """Присоединиться к игре.
@@ -60,21 +256,29 @@ class SessionManager(Generic[_H]):
         Записывает игрока в список активных игроков.
         Полезно для блокировки активных игроков, чтобы один игрок
         не мог участвовать сразу в нескольких играх.
+        Если игрок не смог присоединиться, отметка снимается.
         """
-        active_game = self._active_players.get(user.id)
-        if active_game is not None:
-            raise ValueError("User already in game")
-
         game = self.room(room_id)
         if game is None:
             raise ValueError("game not found")
-        self._active_players[user.id] = room_id
-        player = game.join_player(user)
-        if player is None:
-            return None
 
-        player.dispatch(GameEvents.SESSION_JOIN)
-        return player
+        with game.lock:
+            with self._players_lock:
+                if self._storage.get_player(user.id) is not None:
+                    raise ValueError("User already in game")
+                self._storage.add_player(user.id, room_id)
+
+            try:
+                player = game.join_player(user)
+            except ValueError:
+                self._storage.remove_player(user.id)
+                raise
+            if player is None:
+                self._storage.remove_player(user.id)
+                return None
+
+            player.dispatch(GameEvents.SESSION_JOIN)
+            return player
 
     def leave(self, player: Player, room_id: str | None = None) -> None:
         """Выход из игры.
@@ -83,17 +287,21 @@ class SessionManager(Generic[_H]):
         Чтобы игрок мог принять участие в другой игре.
         Если `room_id` не указан, вычисляет его по активным игрокам.
         """
-        room_id = room_id or self._active_players.get(player.user_id)
+        room_id = room_id or self._storage.get_player(player.user_id)
         if room_id is None:
             raise ValueError("User not in game")
 
-        self._active_players.pop(player.user_id)
         game = self.room(room_id)
         if game is None:
+            self._storage.remove_player(player.user_id)
             return
 
-        game.leave_player(player)
-        player.dispatch(GameEvents.SESSION_LEAVE)
+        with game.lock:
+            # Игрок мог остаться от игры до её выгрузки
+            player = game.pm.get_or_none(player.user_id) or player
+            self._storage.remove_player(player.user_id)
+            game.leave_player(player)
+            player.dispatch(GameEvents.SESSION_LEAVE)
 
     def create(
         self,
@@ -101,6 +309,8 @@ class SessionManager(Generic[_H]):
         owner: BaseUser,
         min_players: int = 2,
         max_players: int = 8,
+        *,
+        seed: int | None = None,
     ) -> MauGame:
         """Создает новую игру.
 
@@ -119,15 +329,81 @@ class SessionManager(Generic[_H]):
             max_players: Максимальное число игроков в одной игре.
                 Не рекомендуется изменять, поскольку карт может не хватить
                 на всех игроков.
+            seed: Начальное значение генератора случайных чисел игры,
+                по умолчанию случайное.
 
         """
-        logger.info("User {} Create new game session in {}", owner, room_id)
+        if log.INFO:
+            logger.info("User {} Create new game session in {}", owner, room_id)
         pm = PlayerManager(min_players, max_players)
-        game = MauGame(pm, self._event_handler, room_id, owner)
-        self._games[room_id] = game
+        game = MauGame(pm, self._handler, room_id, owner, seed)
+        with self._players_lock:
+            if self._storage.get_player(owner.id) is not None:
+                raise ValueError("User already in game")
+            self._storage.add_player(owner.id, room_id)
+
+        self._bind_timer(game)
+        self._storage.add_game(game)
+        self._lobby.update(game)
+        if self._eviction is not None:
+            with self._eviction.lock:
+                self._eviction.spill.pop(room_id)
+                self._eviction.touch(room_id, time())
         game.owner.dispatch(GameEvents.SESSION_START)
         return game
 
+    def export_room(self, room_id: str) -> RoomImage:
+        """Выгружает комнату из менеджера.
+
+        Игра и отметки её активных игроков удаляются из хранилища,
+        а сроки таймера отменяются.
+        События при этом не отправляются, поскольку сессия продолжится
+        в другом менеджере после `import_room`.
+        """
+        game = self._load(room_id)
+        if game is None:
+            raise ValueError("game not found")
+
+        with game.lock:
+            self._storage.remove_game(room_id)
+            self._lobby.remove(room_id)
+            game.timer.stop()
+            if self._eviction is not None:
+                self._eviction.forget(room_id)
+            with self._players_lock:
+                players = tuple(
+                    pl.user_id
+                    for pl in game.pm.iter_all()
+                    if self._storage.get_player(pl.user_id) == room_id
+                )
+                for user_id in players:
+                    self._storage.remove_player(user_id)
+            return RoomImage(room_id, game.snapshot(), players)
+
+    def import_room(self, image: RoomImage) -> MauGame:
+        """Загружает выгруженную комнату в менеджер.
+
+        Вернёт исключение, если комната уже есть в менеджере
+        или кто-то из её игроков уже участвует в другой игре.
+        """
+        if self._load(image.room_id) is not None:
+            raise ValueError("Room already exists")
+
+        game = MauGame.restore(image.data, self._handler)
+        with self._players_lock:
+            for user_id in image.players:
+                if self._storage.get_player(user_id) is not None:
+                    raise ValueError("User already in game")
+            for user_id in image.players:
+                self._storage.add_player(user_id, image.room_id)
+
+        self._bind_timer(game)
+        self._storage.add_game(game)
+        self._lobby.update(game)
+        if self._eviction is not None:
+            self._eviction.touch(image.room_id, time())
+        return game
+
     def remove(self, room_id: str) -> None:
         """Полностью завершает игру в для указанной room ID.
 
@@ -135,8 +411,136 @@ class SessionManager(Generic[_H]):
         поскольку очищает хранилище игроков.
         Удаляет игру из хранилища, отправляет событие `SESSION_END`.
         """
-        logger.info("End session in room {}", room_id)
-        game = self._games.pop(room_id)
-        for pl in game.pm.iter():
-            self._active_players.pop(pl.user_id)
-        game.owner.dispatch(GameEvents.SESSION_END)
+        if log.INFO:
+            logger.info("End session in room {}", room_id)
+        game = self._load(room_id)
+        if game is None:
+            raise ValueError("game not found")
+
+        with game.lock:
+            self._storage.remove_game(room_id)
+            self._lobby.remove(room_id)
+            game.timer.stop()
+            if self._eviction is not None:
+                self._eviction.forget(room_id)
+            with self._players_lock:
+                for pl in game.pm.iter_all():
+                    if self._storage.get_player(pl.user_id) == room_id:
+                        self._storage.remove_player(pl.user_id)
+            game.owner.dispatch(GameEvents.SESSION_END)
+
+    # Выгрузка неактивных комнат
+    # ==========================
+
+    def _schedule_sweep(self) -> None:
+        if self._eviction is None:
+            return
+        self._timers.schedule(
+            ("mau", "sweep"), self._eviction.interval, self._sweep_tick
+        )
+
+    def _sweep_tick(self) -> None:
+        try:
+            self.sweep()
+        finally:
+            self._schedule_sweep()
+
+    def _rehydrate(self, room_id: str) -> MauGame | None:
+        if self._eviction is None:
+            return None
+        with self._eviction.lock:
+            # Комнату могли загрузить, пока мы ждали замок
+            game = self._storage.get_game(room_id)
+            if game is not None:
+                return game
+            data = self._eviction.spill.pop(room_id)
+            if data is None:
+                return None
+            game = MauGame.restore(data, self._handler)
+            self._bind_timer(game)
+            self._storage.add_game(game)
+            self._eviction.touch(room_id, time())
+            self._eviction.set_size(room_id, room_size(game))
+        if log.DEBUG:
+            logger.debug("Rehydrate room {}", room_id)
+        return game
+
+    def evict(self, room_id: str) -> bool:
+        """Выгружает комнату из памяти в хранилище снимков.
+
+        Игроки комнаты остаются активными, а сама комната загрузится
+        при следующем обращении через `room()` или `player()`.
+        Возвращает была ли комната выгружена.
+        """
+        return self._evict(room_id, None)
+
+    def _evict(self, room_id: str, seen: float | None) -> bool:
+        eviction = self._eviction
+        if eviction is None:
+            raise ValueError("Eviction is disabled")
+        game = self._storage.get_game(room_id)
+        if game is None:
+            return False
+
+        with game.lock, eviction.lock:
+            touched = eviction.touched(room_id)
+            # К комнате обратились после того, как её выбрали
+            if seen is not None and touched != seen:
+                return False
+            if self._storage.get_game(room_id) is not game:
+                return False
+            data = game.snapshot()
+            game.timer.stop()
+            self._storage.evict_game(room_id)
+            eviction.spill.put(room_id, data, touched or time())
+            eviction.forget(room_id)
+        if log.DEBUG:
+            logger.debug("Evict room {}, {} bytes", room_id, len(data))
+        return True
+
+    def _reap(self, room_id: str) -> None:
+        game = self._load(room_id)
+        if game is None:
+            return
+        with game.lock:
+            if game.started:
+                game.end()
+            self.remove(room_id)
+
+    def sweep(self, now: float | None = None) -> tuple[int, int]:
+        """Выгружает неактивные комнаты и удаляет заброшенные.
+
+        Вызывается колесом таймеров каждые `Eviction.interval` секунд.
+        Заброшенные комнаты загружаются, завершаются и удаляются
+        с событием `SESSION_END`, чтобы освободить их игроков.
+
+        Возвращает количество выгруженных и удалённых комнат.
+        """
+        eviction = self._eviction
+        if eviction is None:
+            raise ValueError("Eviction is disabled")
+        now = time() if now is None else now
+
+        reaped = 0
+        for room_id in eviction.spill.expired(now - eviction.reap_after):
+            self._reap(room_id)
+            reaped += 1
+        for room_id in eviction.stale(now):
+            self._reap(room_id)
+            reaped += 1
+
+        if eviction.max_bytes:
+            for room_id in eviction.dirty():
+                game = self._storage.get_game(room_id)
+                if game is not None:
+                    eviction.set_size(room_id, room_size(game))
+
+        evicted = 0
+        seen = [(r, eviction.touched(r)) for r in eviction.candidates(now)]
+        for room_id, touched in seen:
+            if self._evict(room_id, touched):
+                evicted += 1
+
+        if log.INFO and (evicted or reaped):
+            logger.info("Evicted {} rooms, reaped {} rooms", evicted, reaped)
+        return evicted, reaped
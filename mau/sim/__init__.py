@@ -0,0 +1,17 @@
+"""Симулятор игр.
+
+Проводит множество полных игр между ботами без участия клиентов.
+Используется для подбора игровых правил на основе статистики.
+
+- players: Боты с простыми стратегиями игры.
+- runner: Проведение игр и сбор статистики.
+- batch: Пакетный движок на NumPy для множества игр сразу.
+
+Запуск из командной строки:
+
+```sh
+python -m mau.sim --games 100000 --rules "" --rules take_until_cover,shotgun
+python -m mau.sim --engine batch --bots canonical,canonical,canonical,canonical
+python -m mau.sim --check-pipeline --games 20 --bots random,random,random,random
+```
+"""
@@ -0,0 +1,148 @@
+"""Запуск симулятора из командной строки."""
+
+import argparse
+import sys
+from time import perf_counter
+
+from mau.rules import GameRules
+from mau.sim.players import PLAYERS, CanonicalPlayer
+from mau.sim.runner import (
+    RuleStats,
+    check_pipeline,
+    parse_rules,
+    rule_names,
+    simulate,
+)
+
+
+def _check(rule_sets: list[int], games: int, players: int, seed: int) -> None:
+    from mau.sim.batch import cross_check  # noqa: PLC0415
+
+    failed = False
+    for rules in rule_sets:
+        diff = cross_check(rules, range(seed, seed + games), players)
+        print(  # noqa: T201
+            f"[{rules:#06x}] {rule_names(rules)}: "
+            f"{games - len(diff)}/{games} games match"
+        )
+        for game_seed, expected, got in diff[:10]:
+            print(f"  seed {game_seed}: {expected} != {got}")  # noqa: T201
+        failed |= bool(diff)
+    if failed:
+        sys.exit(1)
+
+
+def _check_pipeline(games: int, bots: list[str], seed: int) -> None:
+    """Сверяет собранный ход со всеми сочетаниями правил."""
+    rule_bits = [rule.value for rule in GameRules]
+    failed = 0
+    for combo in range(1 << len(rule_bits)):
+        rules = sum(bit for i, bit in enumerate(rule_bits) if combo >> i & 1)
+        diff = check_pipeline(rules, games, bots, seed)
+        if diff:
+            failed += 1
+            print(  # noqa: T201
+                f"[{rules:#06x}] {rule_names(rules)}: {diff} mismatches"
+            )
+    print(  # noqa: T201
+        f"{(1 << len(rule_bits)) - failed}/{1 << len(rule_bits)} "
+        "rule sets match"
+    )
+    if failed:
+        sys.exit(1)
+
+
+def main() -> None:
+    """Проводит игры и выводит статистику для каждого набора правил."""
+    parser = argparse.ArgumentParser(prog="python -m mau.sim")
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument(
+        "--rules",
+        action="append",
+        help="Правила через запятую, можно указать несколько раз",
+    )
+    parser.add_argument(
+        "--bots",
+        default="first,first,first,first",
+        help=f"Боты за столом через запятую: {', '.join(PLAYERS)}",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("object", "batch"),
+        default="object",
+        help="batch: пакетный движок на NumPy, только для canonical ботов",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Сверить пакетный движок с MauGame на --games играх",
+    )
+    parser.add_argument(
+        "--check-pipeline",
+        action="store_true",
+        help="Сверить собранный ход с RuleSet на --games играх "
+        "для каждого сочетания правил",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bots = args.bots.split(",")
+    if args.check_pipeline:
+        _check_pipeline(args.games, bots, args.seed)
+        return
+    rule_sets = [parse_rules(r) for r in args.rules or [""]]
+    if (args.engine == "batch" or args.check) and set(bots) != {
+        CanonicalPlayer.name
+    }:
+        parser.error("batch engine plays only canonical bots")
+    if args.engine == "batch" or args.check:
+        from mau.sim.batch import SUPPORTED_RULES  # noqa: PLC0415
+
+        unsupported = [r for r in rule_sets if r & ~SUPPORTED_RULES]
+        if unsupported:
+            parser.error(
+                "batch engine does not support rules: "
+                + ", ".join(f"{r:#06x}" for r in unsupported)
+            )
+    if args.check:
+        _check(rule_sets, args.games, len(bots), args.seed)
+        return
+
+    start = perf_counter()
+    results: dict[int, RuleStats]
+    if args.engine == "batch":
+        # NumPy необязательная зависимость
+        from mau.sim.batch import run_batch  # noqa: PLC0415
+
+        results = {
+            rules: run_batch(rules, args.games, len(bots), seed=args.seed)
+            for rules in rule_sets
+        }
+    else:
+        results = simulate(
+            rule_sets, args.games, bots, workers=args.workers, seed=args.seed
+        )
+    total = perf_counter() - start
+
+    for rules, stats in results.items():
+        takes = ", ".join(f"{k}:{v}" for k, v in sorted(stats.takes.items()))
+        seats = " ".join(f"{r:.1%}" for r in stats.win_rates(len(bots)))
+        print(  # noqa: T201
+            f"[{rules:#06x}] {rule_names(rules)}\n"
+            f"  games: {stats.games} errors: {stats.errors} "
+            f"stalled: {stats.stalled}\n"
+            f"  avg length: {stats.avg_length:.1f} turns\n"
+            f"  take counter: {takes}\n"
+            f"  shotgun deaths: {stats.shotgun_deaths}\n"
+            f"  win rate by seat: {seats}"
+        )
+
+    played = sum(s.games for s in results.values())
+    print(  # noqa: T201
+        f"{played} games in {total:.1f}s ({played / total * 3600:,.0f}/hour)"
+    )
+
+
+if __name__ == "__main__":
+    main()
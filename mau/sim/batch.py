@@ -0,0 +1,604 @@
+"""Пакетный движок на NumPy.
+
+Проводит тысячи игр одновременно: состояние всех игр хранится
+в массивах по строке на игру, а каждый шаг продвигает все игры сразу.
+Руки игроков хранятся как матрицы количества карт каждого типа,
+стопки колоды как массивы типов карт, а курсор, направление ходов
+и счётчик взятия как векторы.
+
+Движок повторяет правила `MauGame` для игры ботов `CanonicalPlayer`.
+Перемешивание колоды выполняется генератором `GameRandom` каждой игры
+так же, как в `MauGame`, потому при одинаковых начальных значениях
+игры совпадают ход в ход.
+Это проверяется через `cross_check`.
+
+Поддерживается только часть правил, см. `SUPPORTED_RULES`.
+Боты никогда не стреляют из револьвера, потому правило `shotgun`
+не влияет на игру.
+
+Требует NumPy: `pip install mau[batch]`.
+"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from random import Random
+
+import numpy as np
+from numpy.typing import NDArray
+
+from mau import log
+from mau.deck.card import CardColor, MauCard
+from mau.deck.deck import deck_colors
+from mau.deck.presets import (
+    BLOCK,
+    CLASSIC,
+    NUMBER,
+    REVERSE,
+    TAKE,
+    WILD_COLOR,
+    WILD_TAKE,
+)
+from mau.enums import GameState
+from mau.game.player import BaseUser
+from mau.rng import GameRandom
+from mau.rules import GameRules, RuleSet
+from mau.session import SessionManager
+from mau.sim.players import CanonicalPlayer
+from mau.sim.runner import NoopEventHandler, RuleStats, play_turn
+
+SUPPORTED_RULES = (
+    GameRules.one_winner
+    | GameRules.auto_skip
+    | GameRules.take_until_cover
+    | GameRules.shotgun
+    | GameRules.deferred_take
+    | GameRules.auto_choose_color
+    | GameRules.intervention
+)
+
+# Действия карт по названию поведения
+_OPS = {
+    b.name: i
+    for i, b in enumerate((NUMBER, BLOCK, REVERSE, TAKE, WILD_COLOR, WILD_TAKE))
+}
+_BLOCK = _OPS[BLOCK.name]
+_REVERSE = _OPS[REVERSE.name]
+_WILD_COLOR = _OPS[WILD_COLOR.name]
+_WILD_TAKE = _OPS[WILD_TAKE.name]
+_TAKE_OPS = (_OPS[TAKE.name], _WILD_TAKE)
+
+_NEXT = GameState.NEXT
+_TAKE = GameState.TAKE
+
+Array = NDArray[np.int64]
+Mask = NDArray[np.bool_]
+
+
+class CardTable:
+    """Свойства каждого типа карт колоды в виде массивов.
+
+    Тип карты - это индекс её упакованного кода среди всех различных
+    кодов колоды, отсортированных по возрастанию.
+    Поддерживаются только поведения классических карт.
+
+    Args:
+        cards: Карты колоды в исходном порядке.
+        wild_color: Дикий цвет колоды.
+
+    """
+
+    __slots__ = (
+        "codes",
+        "deck",
+        "color",
+        "value",
+        "cost",
+        "kind",
+        "op",
+        "on_counter",
+        "take",
+        "prio",
+        "wild",
+        "colors",
+        "color_index",
+        "color_onehot",
+    )
+
+    def __init__(
+        self, cards: Sequence[MauCard], wild_color: CardColor = CardColor.BLACK
+    ) -> None:
+        codes = sorted({card.pack() for card in cards})
+        index = {code: t for t, code in enumerate(codes)}
+        types = [MauCard.unpack(code) for code in codes]
+        unknown = {c.behavior.name for c in types} - _OPS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported card behaviors: {unknown}")
+
+        kinds = {(c.behavior.name, c.value) for c in types}
+        kind_index = {k: i for i, k in enumerate(sorted(kinds))}
+
+        self.codes = np.array(codes, dtype=np.int64)
+        self.deck: list[int] = [index[card.pack()] for card in cards]
+        self.color = np.array([c.color for c in types], dtype=np.int64)
+        self.value = np.array([c.value for c in types], dtype=np.int64)
+        self.cost = np.array([c.cost for c in types], dtype=np.int64)
+        self.kind = np.array(
+            [kind_index[c.behavior.name, c.value] for c in types],
+            dtype=np.int64,
+        )
+        self.op = np.array([_OPS[c.behavior.name] for c in types])
+        self.on_counter = np.array([c.behavior.on_counter for c in types])
+        self.take = np.where(np.isin(self.op, _TAKE_OPS), self.value, 0)
+
+        # Самая дорогая карта, из равных карта с меньшим кодом
+        n = len(types)
+        self.prio = self.cost * n + np.arange(n - 1, -1, -1)
+
+        self.wild = int(wild_color)
+        colors = deck_colors(list(cards))
+        colors.remove(wild_color)
+        self.colors = np.array(colors, dtype=np.int64)
+        self.color_index = np.full(len(CardColor), -1, dtype=np.int64)
+        self.color_index[self.colors] = np.arange(len(colors))
+        self.color_onehot = (self.color[:, None] == self.colors).astype(
+            np.int64
+        )
+
+    def __len__(self) -> int:
+        """Количество различных типов карт."""
+        return len(self.codes)
+
+
+@dataclass(frozen=True, slots=True)
+class GameOutcome:
+    """Итог одной игры для сверки движков.
+
+    - turns: Длина игры в ходах.
+    - error: Игра прервалась из-за ошибки.
+    - winners: Места победителей в порядке выхода из игры.
+    - scores: Стоимость оставшихся карт для каждого места.
+    """
+
+    turns: int
+    error: bool
+    winners: tuple[int, ...]
+    scores: tuple[int, ...]
+
+
+_ERROR = GameOutcome(0, True, (), ())
+
+
+class BatchGames:
+    """Несколько игр, проводимых одновременно.
+
+    Места игроков нумеруются в порядке подключения к игре.
+    Каждый шаг выполняет по одному действию текущего игрока во всех
+    незавершённых играх.
+    Выбор цвета выполняется сразу вместе с дикой картой.
+
+    Args:
+        seeds: Начальные значения генератора случайных чисел каждой игры.
+        rules: Битовая маска правил `GameRules`.
+        players: Количество игроков в каждой игре.
+        max_turns: После скольких ходов игра считается зависшей.
+        table: Таблица карт колоды, по умолчанию классическая колода.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        seeds: Sequence[int],
+        rules: int = 0,
+        players: int = 4,
+        *,
+        max_turns: int = 1000,
+        table: CardTable | None = None,
+        start_cards: int = 7,
+    ) -> None:
+        if rules & ~SUPPORTED_RULES:
+            raise ValueError(f"Rules {rules:#x} not supported by batch engine")
+
+        self.rules = RuleSet(rules)
+        self.table = table or CardTable(CLASSIC.cards)
+        self.max_turns = max_turns
+        self._rngs = [GameRandom(seed) for seed in seeds]
+
+        n = len(seeds)
+        size = len(self.table.deck)
+        self.deck = np.zeros((n, size), dtype=np.int64)
+        self.size = np.zeros(n, dtype=np.int64)
+        self.used = np.zeros((n, size), dtype=np.int64)
+        self.used_size = np.zeros(n, dtype=np.int64)
+        self.hands = np.zeros((n, players, len(self.table)), dtype=np.int16)
+
+        self.order = np.zeros((n, players), dtype=np.int64)
+        self.seat_pos = np.zeros((n, players), dtype=np.int64)
+        self.players = np.full(n, players, dtype=np.int64)
+        self.cp = np.zeros(n, dtype=np.int64)
+        self.back = np.zeros(n, dtype=np.bool_)
+
+        self.state = np.full(n, _NEXT, dtype=np.int64)
+        self.take_counter = np.zeros(n, dtype=np.int64)
+        self.top = np.zeros(n, dtype=np.int64)
+        self.top_color = np.zeros(n, dtype=np.int64)
+        self.bluff = np.zeros(n, dtype=np.bool_)
+        self.bluff_seat = np.zeros(n, dtype=np.int64)
+
+        self.started = np.ones(n, dtype=np.bool_)
+        self.error = np.zeros(n, dtype=np.bool_)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.winners = np.full((n, players), -1, dtype=np.int64)
+        self.n_winners = np.zeros(n, dtype=np.int64)
+        self._takes: list[Array] = []
+
+        for i in range(n):
+            self._deal(i, start_cards)
+        self._start()
+
+    # Начало игры
+    # ===========
+
+    def _deal(self, i: int, start_cards: int) -> None:
+        rng = self._rngs[i]
+        # Игра тратит первое число на револьвер
+        rng.randint(1, 8)
+        cards = list(self.table.deck)
+        rng.shuffle(cards)
+        order = list(range(self.order.shape[1]))
+        rng.shuffle(order)
+        self.order[i] = order
+        self.seat_pos[i, order] = np.arange(len(order))
+
+        hand = np.zeros(len(self.table), dtype=np.int16)
+        for seat in order:
+            hand[:] = 0
+            for _ in range(start_cards):
+                hand[cards.pop()] += 1
+            self.hands[i, seat] = hand
+
+        color = self.table.color
+        for j in range(len(cards) - 1, -1, -1):
+            if color[cards[j]] != self.table.wild:
+                self.top[i] = cards.pop(j)
+                break
+        else:
+            raise ValueError("No suitable card for deck top")
+        self.deck[i, : len(cards)] = cards
+        self.size[i] = len(cards)
+
+    def _start(self) -> None:
+        t = self.table
+        g = np.arange(len(self.top))
+        op = t.op[self.top]
+        self.top_color[:] = t.color[self.top]
+        self.take_counter += t.take[self.top]
+        self._next(g[op == _BLOCK], t.value[self.top[op == _BLOCK]])
+        self._reverse(g[op == _REVERSE])
+
+    # Игроки и ходы
+    # =============
+
+    def _cur(self, g: Array) -> Array:
+        return self.order[g, self.cp[g] % self.players[g]]
+
+    def _next(self, g: Array, n: Array | int = 1) -> None:
+        step = np.where(self.back[g], -n, n)
+        self.cp[g] = (self.cp[g] + step) % self.players[g]
+
+    def _reverse(self, g: Array) -> None:
+        two = self.players[g] == 2  # noqa: PLR2004
+        self._next(g[two])
+        self.back[g[~two]] ^= True
+
+    def _next_turn(self, g: Array) -> None:
+        g = g[self.started[g]]
+        self.state[g] = _NEXT
+        self.ticks[g] += 1
+        self._next(g)
+
+    def _leave(self, i: int, seat: int) -> None:
+        n = int(self.players[i])
+        order = self.order[i, :n].tolist()
+        order.remove(seat)
+        self.order[i, : n - 1] = order
+        self.players[i] = n - 1
+        self.winners[i, self.n_winners[i]] = seat
+        self.n_winners[i] += 1
+
+        if self.rules.status(GameRules.one_winner) or n - 1 <= 1:
+            self.started[i] = False
+        else:
+            self._next_turn(np.array([i]))
+
+    # Карты
+    # =====
+
+    def _covers(self, g: Array) -> Mask:
+        """Какие типы карт кроют верхнюю карту, без учёта счётчика."""
+        t = self.table
+        return (
+            (t.color == self.top_color[g, None])
+            | (t.color == t.wild)
+            | (t.kind == t.kind[self.top[g], None])
+        )
+
+    def _playable(self, g: Array, p: Array) -> Mask:
+        """Какими картами из руки игрок может покрыть верхнюю карту."""
+        t = self.table
+        res = self._covers(g) & (self.hands[g, p] > 0)
+        if not self.rules.status(GameRules.deferred_take):
+            counter = t.on_counter[self.top[g]] & (self.take_counter[g] > 0)
+            res &= ~counter[:, None] | t.on_counter
+        return res
+
+    def _refill(self, i: int) -> None:
+        size, used = self.size[i], self.used_size[i]
+        cards = self.deck[i, :size].tolist() + self.used[i, :used].tolist()
+        self._rngs[i].shuffle(cards)
+        self.deck[i, : len(cards)] = cards
+        self.size[i] = len(cards)
+        self.used_size[i] = 0
+
+    def _take(self, g: Array, p: Array, n: Array) -> Mask:
+        """Игроки берут карты сверху колоды.
+
+        Возвращает маску игр, в которых хватило карт.
+        """
+        for i in np.flatnonzero(self.size[g] < n):
+            self._refill(int(g[i]))
+
+        ok = self.size[g] >= n
+        failed = g[~ok]
+        self.error[failed] = True
+        self.started[failed] = False
+
+        g, p, n = g[ok], p[ok], n[ok]
+        size = self.size[g]
+        for j in range(int(n.max(initial=0))):
+            m = j < n
+            gm = g[m]
+            self.hands[gm, p[m], self.deck[gm, size[m] - 1 - j]] += 1
+        self.size[g] -= n
+        return ok
+
+    def _count_until_cover(self, g: Array) -> Array:
+        deck = self.deck[g]
+        hit = np.take_along_axis(self._covers(g), deck, axis=1)
+        hit &= np.arange(deck.shape[1]) < self.size[g, None]
+        last = deck.shape[1] - 1 - hit[:, ::-1].argmax(axis=1)
+        return np.where(hit.any(axis=1), self.size[g] - last, 1)
+
+    def _auto_color(self, g: Array) -> Array:
+        colors = self.table.colors
+        index = self.table.color_index[self.top_color[g]]
+        return colors[(index + np.where(self.back[g], -1, 1)) % len(colors)]
+
+    def _choose_color(self, g: Array, p: Array) -> Array:
+        counts = self.hands[g, p] @ self.table.color_onehot
+        return self.table.colors[counts.argmax(axis=1)]
+
+    # Действия
+    # ========
+
+    def _play(self, g: Array, p: Array, c: Array) -> None:
+        t = self.table
+        self.hands[g, p, c] -= 1
+        op = t.op[c]
+        self.take_counter[g] += t.take[c]
+
+        w = op == _WILD_TAKE
+        if w.any():
+            gw, pw = g[w], p[w]
+            same = (t.color == self.top_color[gw, None]) & (
+                self.hands[gw, pw] > 0
+            )
+            if not self.rules.status(GameRules.deferred_take):
+                counter = t.on_counter[self.top[gw]]
+                same &= ~counter[:, None] | t.on_counter
+            self.bluff[gw] = same.any(axis=1)
+            self.bluff_seat[gw] = pw
+
+        block = op == _BLOCK
+        self._next(g[block], t.value[c[block]])
+        self._reverse(g[op == _REVERSE])
+
+        color = t.color[c]
+        wild = w | (op == _WILD_COLOR)
+        if wild.any():
+            color[wild] = (
+                self._auto_color(g[wild])
+                if self.rules.status(GameRules.auto_choose_color)
+                else self._choose_color(g[wild], p[wild])
+            )
+
+        self.used[g, self.used_size[g]] = self.top[g]
+        self.used_size[g] += 1
+        self.top[g] = c
+        self.top_color[g] = color
+
+        empty = self.hands[g, p].sum(axis=1) == 0
+        for i in np.flatnonzero(empty):
+            self._leave(int(g[i]), int(p[i]))
+        self._next_turn(g[~empty])
+
+    def _take_turn(self, g: Array, p: Array) -> None:
+        if self.rules.status(GameRules.take_until_cover):
+            z = g[self.take_counter[g] == 0]
+            self.take_counter[z] = self._count_until_cover(z)
+
+        n = np.maximum(self.take_counter[g], 1)
+        self._takes.append(n)
+        ok = self._take(g, p, n)
+        g, p = g[ok], p[ok]
+        self.take_counter[g] = 0
+        self.state[g] = _TAKE
+        if self.rules.status(GameRules.auto_skip):
+            self._next_turn(g[~self._playable(g, p).any(axis=1)])
+
+    def _check_bluff(self, g: Array, p: Array) -> None:
+        honest = ~self.bluff[g]
+        self.take_counter[g[honest]] += 2
+        taker = np.where(honest, p, self.bluff_seat[g])
+        ok = self._take(g, taker, self.take_counter[g])
+        g, p, honest = g[ok], p[ok], honest[ok]
+        self.take_counter[g] = 0
+        self.state[g] = _TAKE
+
+        if self.rules.status(GameRules.auto_skip):
+            # Взявший за блеф игрок не текущий, потому ход сразу переходит
+            skip = ~honest
+            skip[honest] = ~self._playable(g[honest], p[honest]).any(axis=1)
+            self._next_turn(g[skip])
+        self._next_turn(g)
+
+    def step(self) -> int:
+        """Выполняет одно действие во всех незавершённых играх.
+
+        Возвращает количество игр, в которых было выполнено действие.
+        """
+        g = np.flatnonzero(self.started & (self.ticks < self.max_turns))
+        if len(g) == 0:
+            return 0
+        p = self._cur(g)
+
+        bluff = (
+            (self.state[g] == _NEXT)
+            & (self.take_counter[g] > 0)
+            & (self.table.op[self.top[g]] == _WILD_TAKE)
+        )
+        self._check_bluff(g[bluff], p[bluff])
+        rest, rp = g[~bluff], p[~bluff]
+
+        cover = self._playable(rest, rp)
+        has = cover.any(axis=1)
+        card = np.where(cover, self.table.prio, -1).argmax(axis=1)
+        self._play(rest[has], rp[has], card[has])
+
+        rest, rp = rest[~has], rp[~has]
+        taken = self.state[rest] == _TAKE
+        self._next_turn(rest[taken])
+        self._take_turn(rest[~taken], rp[~taken])
+        return len(g)
+
+    def run(self) -> None:
+        """Проводит все игры до конца или до предела ходов."""
+        while self.step():
+            pass
+
+    # Результаты
+    # ==========
+
+    def outcome(self, i: int) -> GameOutcome:
+        """Возвращает итог одной игры."""
+        if self.error[i]:
+            return _ERROR
+        winners = tuple(self.winners[i, : self.n_winners[i]].tolist())
+        scores = self.hands[i].astype(np.int64) @ self.table.cost
+        return GameOutcome(
+            int(self.ticks[i]), False, winners, tuple(scores.tolist())
+        )
+
+    def stats(self) -> RuleStats:
+        """Собирает статистику всех игр, как и симулятор."""
+        ok = ~self.error
+        stats = RuleStats(
+            self.rules.state,
+            games=len(self.ticks),
+            errors=int(self.error.sum()),
+            stalled=int((self.started & ok).sum()),
+            turns=int(self.ticks[ok].sum()),
+        )
+        if self._takes:
+            takes = np.bincount(np.concatenate(self._takes))
+            stats.takes.update(
+                {n: int(c) for n, c in enumerate(takes.tolist()) if c}
+            )
+
+        first = self.winners[:, 0]
+        won = np.flatnonzero(ok & (first >= 0))
+        seats = np.bincount(self.seat_pos[won, first[won]])
+        stats.seat_wins.update(
+            {i: int(c) for i, c in enumerate(seats.tolist()) if c}
+        )
+        return stats
+
+
+def run_batch(  # noqa: PLR0913
+    rules: int,
+    games: int,
+    players: int = 4,
+    *,
+    seed: int = 0,
+    max_turns: int = 1000,
+    chunk: int = 10_000,
+) -> RuleStats:
+    """Проводит игры пакетами по `chunk` игр.
+
+    Игра с номером `i` использует начальное значение `seed + i`.
+    """
+    stats = RuleStats(rules)
+    for start in range(0, games, chunk):
+        seeds = range(seed + start, seed + min(games, start + chunk))
+        batch = BatchGames(seeds, rules, players, max_turns=max_turns)
+        batch.run()
+        stats.merge(batch.stats())
+    return stats
+
+
+def play_outcome(
+    seed: int, rules: int, players: int = 4, max_turns: int = 1000
+) -> GameOutcome:
+    """Проводит одну игру через `MauGame` и возвращает её итог.
+
+    Генератор случайных чисел игры засеивается `seed`.
+    """
+    sm = SessionManager(NoopEventHandler())
+    users = [BaseUser(f"check:{i}", f"bot {i}", "") for i in range(players)]
+    game = sm.create("check", users[0], max_players=players, seed=seed)
+    for user in users[1:]:
+        sm.join("check", user)
+    game.rules = RuleSet(rules)
+    bot = CanonicalPlayer(Random(seed))
+    stats = RuleStats(rules)
+
+    try:
+        game.start(CLASSIC.deck())
+        while game.started and game.timer.stat().ticks < max_turns:
+            play_turn(sm, game, bot, stats)
+    except ValueError:
+        return _ERROR
+
+    if game.started:
+        game.end()
+    results = game.pm.results
+    seats = {user.id: i for i, user in enumerate(users)}
+    return GameOutcome(
+        game.timer.stat().ticks,
+        False,
+        tuple(seats[uid] for uid, res in results.items() if res.winner),
+        tuple(results[u.id].score for u in users),
+    )
+
+
+def cross_check(
+    rules: int,
+    seeds: Iterable[int],
+    players: int = 4,
+    max_turns: int = 1000,
+) -> list[tuple[int, GameOutcome, GameOutcome]]:
+    """Сверяет пакетный движок с `MauGame` на одних и тех же играх.
+
+    Возвращает расхождения: начальное значение, итог `MauGame`
+    и итог пакетного движка.
+    """
+    log.disable()
+    seeds = list(seeds)
+    batch = BatchGames(seeds, rules, players, max_turns=max_turns)
+    batch.run()
+    res = []
+    for i, seed in enumerate(seeds):
+        expected = play_outcome(seed, rules, players, max_turns)
+        got = batch.outcome(i)
+        if expected != got:
+            res.append((seed, expected, got))
+    return res
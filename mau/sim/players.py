@@ -0,0 +1,165 @@
+"""Боты для симулятора.
+
+Каждый бот принимает решения за одного игрока.
+Бот не изменяет игру сам, он только выбирает действие,
+а применяет его симулятор так же, как это делает клиент.
+"""
+
+from collections import Counter
+from random import Random
+
+from mau.deck.card import CardColor, MauCard
+from mau.game.player import Player
+
+
+class ScriptedPlayer:
+    """Базовый бот.
+
+    Играет первой подходящей картой, всегда проверяет на блеф,
+    выбирает самый частый цвет в руке и никогда не стреляет.
+
+    Args:
+        rng: Генератор случайных чисел бота.
+
+    """
+
+    name = "first"
+
+    def __init__(self, rng: Random) -> None:
+        self.rng = rng
+
+    def choose_card(
+        self,
+        player: Player,  # noqa: ARG002
+        cover: list[tuple[int, MauCard]],
+    ) -> int | None:
+        """Выбирает индекс карты в руке или `None`, чтобы взять карты."""
+        if not cover:
+            return None
+        return cover[0][0]
+
+    def choose_color(self, player: Player) -> CardColor:
+        """Выбирает цвет для дикой карты."""
+        colors = player.game.deck.colors
+        counter = Counter(c.color for c in player.hand if c.color in colors)
+        if not counter:
+            return colors[0]
+        return counter.most_common(1)[0][0]
+
+    def choose_target(self, player: Player) -> Player:
+        """Выбирает игрока для обмена руками."""
+        others = [pl for _, pl in player.game.pm.iter_others()]
+        return min(others, key=lambda pl: len(pl.hand))
+
+    def should_shoot(self, player: Player) -> bool:  # noqa: ARG002
+        """Стрелять из револьвера или взять карты."""
+        return False
+
+    def should_check_bluff(self, player: Player) -> bool:  # noqa: ARG002
+        """Проверять ли предыдущего игрока на блеф."""
+        return True
+
+
+class RandomPlayer(ScriptedPlayer):
+    """Бот, принимающий все решения случайно."""
+
+    name = "random"
+
+    def choose_card(
+        self,
+        player: Player,  # noqa: ARG002
+        cover: list[tuple[int, MauCard]],
+    ) -> int | None:
+        """Играет случайной подходящей картой."""
+        if not cover:
+            return None
+        return self.rng.choice(cover)[0]
+
+    def choose_color(self, player: Player) -> CardColor:
+        """Выбирает случайный цвет."""
+        return self.rng.choice(player.game.deck.colors)
+
+    def choose_target(self, player: Player) -> Player:
+        """Выбирает случайного игрока для обмена руками."""
+        return self.rng.choice([pl for _, pl in player.game.pm.iter_others()])
+
+    def should_shoot(self, player: Player) -> bool:  # noqa: ARG002
+        """Стреляет в половине случаев."""
+        return self.rng.random() < 0.5  # noqa: PLR2004
+
+    def should_check_bluff(self, player: Player) -> bool:  # noqa: ARG002
+        """Проверяет на блеф в половине случаев."""
+        return self.rng.random() < 0.5  # noqa: PLR2004
+
+
+class GreedyPlayer(ScriptedPlayer):
+    """Бот, избавляющийся от самых дорогих карт.
+
+    Стреляет из револьвера, если на кону больше карт, чем у него в руке.
+    """
+
+    name = "greedy"
+
+    def should_shoot(self, player: Player) -> bool:
+        """Стреляет, когда брать карты слишком дорого."""
+        return player.game.take_counter > len(player.hand)
+
+
+class CautiousPlayer(ScriptedPlayer):
+    """Бот, придерживающий дорогие карты напоследок."""
+
+    name = "cautious"
+
+    def choose_card(
+        self,
+        player: Player,  # noqa: ARG002
+        cover: list[tuple[int, MauCard]],
+    ) -> int | None:
+        """Играет самой дешёвой подходящей картой."""
+        if not cover:
+            return None
+        return cover[-1][0]
+
+    def should_check_bluff(self, player: Player) -> bool:  # noqa: ARG002
+        """Не рискует проверять на блеф."""
+        return False
+
+
+class CanonicalPlayer(ScriptedPlayer):
+    """Бот, решения которого не зависят от порядка карт в руке.
+
+    Играет самой дорогой подходящей картой, а из равных по стоимости
+    выбирает карту с меньшим упакованным кодом.
+    Выбирает самый частый цвет в руке, а из равных самый младший.
+    Так же играет пакетный движок, потому бот используется для сверки.
+    """
+
+    name = "canonical"
+
+    def choose_card(
+        self,
+        player: Player,  # noqa: ARG002
+        cover: list[tuple[int, MauCard]],
+    ) -> int | None:
+        """Играет самой дорогой картой с наименьшим кодом."""
+        if not cover:
+            return None
+        return min(cover, key=lambda c: (-c[1].cost, c[1].pack()))[0]
+
+    def choose_color(self, player: Player) -> CardColor:
+        """Выбирает самый частый цвет, а из равных самый младший."""
+        colors = player.game.deck.colors
+        counter = Counter(c.color for c in player.hand if c.color in colors)
+        return max(colors, key=lambda c: (counter[c], -c))
+
+
+PLAYERS: dict[str, type[ScriptedPlayer]] = {
+    bot.name: bot
+    for bot in (
+        ScriptedPlayer,
+        RandomPlayer,
+        GreedyPlayer,
+        CautiousPlayer,
+        CanonicalPlayer,
+    )
+}
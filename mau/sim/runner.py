@@ -0,0 +1,300 @@
+"""Проведение игр и сбор статистики.
+
+Игры проводятся через `SessionManager` и `MauGame` теми же вызовами,
+что делают клиенты.
+Игры с разными наборами правил распределяются по процессам,
+а результаты собираются в общую статистику для каждого набора правил.
+"""
+
+import random
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from random import Random
+from typing import Any
+
+from loguru import logger
+
+from mau import log
+from mau.deck.presets import CLASSIC, WILD_TAKE
+from mau.enums import GameState
+from mau.events import Event
+from mau.game.game import MauGame
+from mau.game.pipeline import reference_can_cover
+from mau.game.player import BaseUser
+from mau.rules import GameRules, RuleSet
+from mau.session import SessionManager
+from mau.sim.players import PLAYERS, ScriptedPlayer
+
+
+class NoopEventHandler:
+    """Обработчик событий, который ничего не делает."""
+
+    def dispatch(self, event: Event[Any]) -> None:
+        """Пропускает событие."""
+
+
+@dataclass(slots=True)
+class RuleStats:
+    """Статистика игр для одного набора правил.
+
+    - games: Сколько игр проведено.
+    - errors: Сколько игр прервались из-за ошибки движка.
+    - stalled: Сколько игр не закончились за отведённое число ходов.
+    - turns: Суммарная длина игр в ходах.
+    - shotgun_deaths: Сколько игроков выбыло от выстрела револьвера.
+    - takes: Сколько раз игроки брали по N карт.
+    - seat_wins: Сколько раз побеждал игрок на каждом месте.
+    """
+
+    rules: int
+    games: int = 0
+    errors: int = 0
+    stalled: int = 0
+    turns: int = 0
+    shotgun_deaths: int = 0
+    takes: Counter[int] = field(default_factory=Counter)
+    seat_wins: Counter[int] = field(default_factory=Counter)
+
+    @property
+    def avg_length(self) -> float:
+        """Средняя длина игры в ходах."""
+        return self.turns / self.games if self.games else 0.0
+
+    def win_rates(self, players: int) -> list[float]:
+        """Доля побед для каждого места в порядке ходов."""
+        return [self.seat_wins[i] / (self.games or 1) for i in range(players)]
+
+    def merge(self, other: "RuleStats") -> None:
+        """Добавляет статистику других игр с теми же правилами."""
+        self.games += other.games
+        self.errors += other.errors
+        self.stalled += other.stalled
+        self.turns += other.turns
+        self.shotgun_deaths += other.shotgun_deaths
+        self.takes.update(other.takes)
+        self.seat_wins.update(other.seat_wins)
+
+
+def _take(game: MauGame, stats: RuleStats) -> None:
+    player = game.player
+    if game.state != GameState.SHOTGUN:
+        game.take_cards()
+        if game.state == GameState.SHOTGUN:
+            return
+    stats.takes[game.take_counter or 1] += 1
+    player.take_cards()
+
+
+def play_turn(
+    sm: SessionManager[NoopEventHandler],
+    game: MauGame,
+    bot: ScriptedPlayer,
+    stats: RuleStats,
+) -> None:
+    """Выполняет одно действие текущего игрока за бота."""
+    player = game.player
+    state = game.state
+
+    if state == GameState.CHOOSE_COLOR:
+        player.choose_color(bot.choose_color(player))
+    elif state == GameState.TWIST_HAND:
+        player.twist_hand(bot.choose_target(player))
+    elif state == GameState.SHOTGUN:
+        if not bot.should_shoot(player):
+            _take(game, stats)
+        elif game.shot():
+            stats.shotgun_deaths += 1
+            sm.leave(player, game.room_id)
+            if game.started:
+                game.set_state(GameState.NEXT)
+        else:
+            game.next_turn()
+    elif (
+        state == GameState.NEXT
+        and game.take_counter > 0
+        and game.bluff_state is not None
+        and game.deck.top.behavior.name == WILD_TAKE.name
+        and bot.should_check_bluff(player)
+    ):
+        player.check_bluff()
+    else:
+        card_index = bot.choose_card(player, player.cover_cards().cover)
+        if card_index is not None:
+            game.process_turn(player, card_index)
+        elif state in (GameState.TAKE, GameState.CONTINUE):
+            game.next_turn()
+        else:
+            _take(game, stats)
+
+
+def play_game(
+    sm: SessionManager[NoopEventHandler],
+    room_id: str,
+    rules: int,
+    bots: Sequence[ScriptedPlayer],
+    max_turns: int = 1000,
+) -> RuleStats:
+    """Проводит одну полную игру между ботами.
+
+    Каждый бот играет за одного игрока.
+    Возвращает статистику одной игры.
+    """
+    stats = RuleStats(rules, games=1)
+    users = [
+        BaseUser(f"{room_id}:{i}", f"bot {i}", "") for i in range(len(bots))
+    ]
+    game = sm.create(room_id, users[0], max_players=len(bots))
+    for user in users[1:]:
+        sm.join(room_id, user)
+    game.rules = RuleSet(rules)
+
+    try:
+        game.start(CLASSIC.deck())
+        seats = {pl.user_id: i for i, pl in enumerate(game.pm.iter())}
+        by_user = {user.id: bot for user, bot in zip(users, bots, strict=True)}
+        while game.started and game.timer.stat().ticks < max_turns:
+            play_turn(sm, game, by_user[game.player.user_id], stats)
+    except ValueError:
+        logger.exception("Game {} failed", room_id)
+        stats.errors += 1
+    else:
+        if game.started:
+            stats.stalled += 1
+            game.end()
+        stats.turns += game.timer.stat().ticks
+        winners = [u for u, res in game.pm.results.items() if res.winner]
+        if winners:
+            stats.seat_wins[seats[winners[0]]] += 1
+
+    sm.remove(room_id)
+    return stats
+
+
+def run_games(
+    rules: int,
+    games: int,
+    bots: Sequence[str],
+    seed: int,
+    max_turns: int = 1000,
+) -> RuleStats:
+    """Проводит несколько игр подряд в текущем процессе.
+
+    Глобальный генератор случайных чисел засеивается `seed`,
+    а каждый бот получает свой генератор.
+    """
+    log.disable()
+    random.seed(seed)
+    rng = Random(seed)
+    sm = SessionManager(NoopEventHandler())
+    stats = RuleStats(rules)
+    for i in range(games):
+        players = [PLAYERS[name](Random(rng.random())) for name in bots]
+        stats.merge(play_game(sm, str(i), rules, players, max_turns))
+    return stats
+
+
+def simulate(  # noqa: PLR0913
+    rule_sets: Iterable[int],
+    games: int,
+    bots: Sequence[str],
+    *,
+    workers: int | None = None,
+    chunk: int = 500,
+    seed: int = 0,
+) -> dict[int, RuleStats]:
+    """Проводит игры для каждого набора правил в пуле процессов.
+
+    Args:
+        rule_sets: Битовые маски правил `GameRules`.
+        games: Сколько игр провести для каждого набора правил.
+        bots: Названия ботов для каждого места за столом.
+        workers: Количество процессов, по умолчанию по числу ядер.
+        chunk: Сколько игр проводит процесс за одно задание.
+        seed: Начальное значение для генераторов случайных чисел.
+
+    """
+    results: dict[int, RuleStats] = {}
+    with ProcessPoolExecutor(workers) as pool:
+        futures = []
+        for rules in rule_sets:
+            results[rules] = RuleStats(rules)
+            for n, start in enumerate(range(0, games, chunk)):
+                count = min(chunk, games - start)
+                futures.append(
+                    pool.submit(
+                        run_games, rules, count, bots, hash((seed, rules, n))
+                    )
+                )
+        for future in futures:
+            res = future.result()
+            results[res.rules].merge(res)
+    return results
+
+
+def _pipeline_mismatches(game: MauGame) -> int:
+    pipeline = game.pipeline
+    res = sum(
+        getattr(pipeline, rule.name or "") != game.rules.status(rule)
+        for rule in GameRules
+        if hasattr(pipeline, rule.name or "")
+    )
+    for player in game.pm.iter():
+        for card in player.hand:
+            if game.can_cover(player, card) != reference_can_cover(
+                game, player, card
+            ):
+                res += 1
+    return res
+
+
+def check_pipeline(
+    rules: int,
+    games: int,
+    bots: Sequence[str],
+    seed: int = 0,
+    max_turns: int = 300,
+) -> int:
+    """Сверяет собранный ход игры с проверкой правил через `RuleSet`.
+
+    Перед каждым действием ботов проверяет каждую карту каждого игрока.
+    Возвращает количество расхождений.
+    """
+    log.disable()
+    rng = Random(seed)
+    sm = SessionManager(NoopEventHandler())
+    stats = RuleStats(rules)
+    res = 0
+    for i in range(games):
+        room_id = str(i)
+        players = [PLAYERS[name](Random(rng.random())) for name in bots]
+        users = [BaseUser(f"{i}:{n}", "", "") for n in range(len(bots))]
+        by_user = dict(zip((u.id for u in users), players, strict=True))
+        game = sm.create(room_id, users[0], len(bots), len(bots), seed=i)
+        for user in users[1:]:
+            sm.join(room_id, user)
+        game.rules = RuleSet(rules)
+        try:
+            game.start(CLASSIC.deck())
+            while game.started and game.timer.stat().ticks < max_turns:
+                res += _pipeline_mismatches(game)
+                play_turn(sm, game, by_user[game.player.user_id], stats)
+        except ValueError:
+            logger.exception("Game {} failed", room_id)
+        sm.remove(room_id)
+    return res
+
+
+def parse_rules(value: str) -> int:
+    """Преобразует список названий правил через запятую в битовую маску."""
+    mask = 0
+    for name in filter(None, (v.strip() for v in value.split(","))):
+        mask |= GameRules[name]
+    return mask
+
+
+def rule_names(mask: int) -> str:
+    """Возвращает названия правил из битовой маски."""
+    names = [rule.name or "" for rule in GameRules if mask & rule]
+    return ",".join(names) or "-"
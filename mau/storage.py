@@ -0,0 +1,543 @@
+"""Хранилище сессий.
+
+Предоставляет интерфейс хранилища для игр и активных игроков,
+которым пользуется менеджер сессий.
+
+- `MemoryStorage`: Хранит всё в памяти процесса.
+- `SQLiteStorage`: Дополнительно сохраняет игры в SQLite, чтобы они
+  пережили перезапуск бота.
+- `ShardedStorage`: Потокобезопасное хранилище из нескольких шардов.
+"""
+
+import sqlite3
+from collections.abc import Callable, Iterator
+from contextlib import closing
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Lock, Thread
+from time import monotonic
+from typing import TYPE_CHECKING, Protocol
+from zlib import crc32
+
+from loguru import logger
+
+from mau import log
+
+if TYPE_CHECKING:
+    from mau.events import EventHandler
+    from mau.game.game import MauGame
+
+
+class GameCodec(Protocol):
+    """Преобразует игру в байты и обратно для постоянного хранилища."""
+
+    def dump(self, game: "MauGame") -> bytes:
+        """Сохраняет игру в байты."""
+
+    def load(self, data: bytes, event_handler: "EventHandler") -> "MauGame":
+        """Восстанавливает игру из байтов."""
+
+
+class SnapshotCodec:
+    """Сохраняет игры при помощи снимков `MauGame.snapshot`."""
+
+    def dump(self, game: "MauGame") -> bytes:
+        """Сохраняет игру в байты."""
+        return game.snapshot()
+
+    def load(self, data: bytes, event_handler: "EventHandler") -> "MauGame":
+        """Восстанавливает игру из байтов."""
+        from mau.game.game import MauGame  # noqa: PLC0415
+
+        return MauGame.restore(data, event_handler)
+
+
+class SessionStorage(Protocol):
+    """Интерфейс хранилища сессий.
+
+    Хранит игры по ID комнаты и комнаты активных игроков по ID
+    пользователя.
+    Менеджер сессий сообщает хранилищу об изменении игры через
+    `mark_dirty`, чтобы хранилище могло сохранить игру позже,
+    и периодически вызывает `flush`.
+    """
+
+    def load(self, event_handler: "EventHandler") -> None:
+        """Загружает ранее сохранённые игры."""
+
+    def get_game(self, room_id: str) -> "MauGame | None":
+        """Возвращает игру по ID комнаты."""
+
+    def add_game(self, game: "MauGame") -> None:
+        """Добавляет игру в хранилище."""
+
+    def remove_game(self, room_id: str) -> "MauGame":
+        """Удаляет игру из хранилища и возвращает её."""
+
+    def evict_game(self, room_id: str) -> "MauGame":
+        """Убирает игру из памяти, сохраняя её копию, если она есть."""
+
+    def games(self) -> Iterator["MauGame"]:
+        """Проходится по всем играм хранилища."""
+
+    def get_player(self, user_id: str) -> str | None:
+        """Возвращает ID комнаты активного игрока."""
+
+    def players(self) -> Iterator[tuple[str, str]]:
+        """Проходится по активным игрокам и их комнатам."""
+
+    def add_player(self, user_id: str, room_id: str) -> None:
+        """Отмечает пользователя активным игроком комнаты."""
+
+    def remove_player(self, user_id: str) -> None:
+        """Снимает отметку активного игрока."""
+
+    def mark_dirty(self, room_id: str) -> None:
+        """Отмечает что игра в комнате была изменена."""
+
+    def flush(self) -> None:
+        """Сохраняет накопленные изменения."""
+
+    def close(self) -> None:
+        """Сохраняет оставшиеся изменения и закрывает хранилище."""
+
+
+class MemoryStorage:
+    """Хранилище сессий в памяти.
+
+    Игры и игроки хранятся в обычных словарях.
+    Все данные теряются при перезапуске.
+    """
+
+    __slots__ = ("_games", "_players")
+
+    def __init__(self) -> None:
+        self._games: dict[str, MauGame] = {}
+        self._players: dict[str, str] = {}
+
+    def load(self, event_handler: "EventHandler") -> None:
+        """Загружать нечего, все данные хранятся в памяти."""
+
+    def get_game(self, room_id: str) -> "MauGame | None":
+        """Возвращает игру по ID комнаты."""
+        return self._games.get(room_id)
+
+    def add_game(self, game: "MauGame") -> None:
+        """Добавляет игру в хранилище."""
+        self._games[game.room_id] = game
+
+    def remove_game(self, room_id: str) -> "MauGame":
+        """Удаляет игру из хранилища и возвращает её."""
+        return self._games.pop(room_id)
+
+    def evict_game(self, room_id: str) -> "MauGame":
+        """Убирает игру из памяти, других копий у неё нет."""
+        return self._games.pop(room_id)
+
+    def games(self) -> Iterator["MauGame"]:
+        """Проходится по всем играм хранилища."""
+        yield from self._games.values()
+
+    def get_player(self, user_id: str) -> str | None:
+        """Возвращает ID комнаты активного игрока."""
+        return self._players.get(user_id)
+
+    def players(self) -> Iterator[tuple[str, str]]:
+        """Проходится по активным игрокам и их комнатам."""
+        yield from self._players.items()
+
+    def add_player(self, user_id: str, room_id: str) -> None:
+        """Отмечает пользователя активным игроком комнаты."""
+        self._players[user_id] = room_id
+
+    def remove_player(self, user_id: str) -> None:
+        """Снимает отметку активного игрока."""
+        self._players.pop(user_id, None)
+
+    def mark_dirty(self, room_id: str) -> None:
+        """Игры в памяти не нужно отдельно сохранять."""
+
+    def flush(self) -> None:
+        """Сохранять нечего, все данные хранятся в памяти."""
+
+    def close(self) -> None:
+        """Закрывать нечего, все данные хранятся в памяти."""
+
+
+# Пакет изменений для записи: игры, удалённые игры, игроки, удалённые игроки
+_Batch = tuple[
+    list[tuple[str, bytes]],
+    list[str],
+    list[tuple[str, str]],
+    list[str],
+]
+
+# Версия игры и настройки комнаты, которые меняются без новой версии
+_SaveKey = tuple[int, int, int, bool, str]
+
+
+def _save_key(game: "MauGame") -> _SaveKey:
+    return (
+        game.version,
+        game.rules.state,
+        game.start_cards,
+        game.open,
+        game.owner_id,
+    )
+
+
+_SCHEMA = (
+    (
+        "CREATE TABLE IF NOT EXISTS games "
+        "(room_id TEXT PRIMARY KEY, data BLOB NOT NULL)"
+    ),
+    (
+        "CREATE TABLE IF NOT EXISTS players "
+        "(user_id TEXT PRIMARY KEY, room_id TEXT NOT NULL)"
+    ),
+)
+
+
+class SQLiteStorage(MemoryStorage):
+    """Хранилище сессий с отложенной записью в SQLite.
+
+    Рабочие данные хранятся в памяти, как и в `MemoryStorage`.
+    Изменённые игры и игроки копятся до вызова `flush`: менеджер сессий
+    вызывает его по таймеру, а смена активных игроков - если с последней
+    записи прошло `flush_interval` миллисекунд.
+    Тогда все изменения одним пакетом передаются фоновому потоку, который
+    записывает их в базу данных одной транзакцией.
+
+    Отмеченная игра сохраняется, только если изменилась её версия
+    `MauGame.version` или настройки комнаты: правила, число начальных
+    карт, открытость и владелец, которые меняются без новой версии.
+    Игра остаётся отмеченной ещё на одну запись,
+    потому изменения после отметки тоже попадут в базу.
+    Игры преобразуются в байты под замком игры, потому фоновый поток
+    никогда не видит игру в середине хода.
+    Игры, занятые другим потоком, сохраняются в следующий раз.
+
+    Args:
+        path: Путь к файлу базы данных.
+        codec: Способ преобразования игры в байты и обратно.
+            По умолчанию используются снимки игры.
+        flush_interval: Как часто записывать изменения, в миллисекундах.
+
+    """
+
+    __slots__ = (
+        "_path",
+        "_codec",
+        "_flush_interval",
+        "_last_flush",
+        "_saved",
+        "_dirty_games",
+        "_removed_games",
+        "_dirty_players",
+        "_queue",
+        "_writer",
+    )
+
+    def __init__(
+        self,
+        path: str | Path,
+        codec: GameCodec | None = None,
+        flush_interval: int = 500,
+    ) -> None:
+        super().__init__()
+        self._path = Path(path)
+        self._codec = codec or SnapshotCodec()
+        self._flush_interval = flush_interval / 1000
+        self._last_flush = monotonic()
+
+        self._saved: dict[str, _SaveKey] = {}
+        self._dirty_games: set[str] = set()
+        self._removed_games: set[str] = set()
+        self._dirty_players: dict[str, str | None] = {}
+
+        with closing(sqlite3.connect(self._path)) as conn, conn:
+            for query in _SCHEMA:
+                conn.execute(query)
+
+        self._queue: SimpleQueue[_Batch | None] = SimpleQueue()
+        self._writer = Thread(
+            target=self._write_loop, name="mau-sqlite-writer", daemon=True
+        )
+        self._writer.start()
+
+    def load(self, event_handler: "EventHandler") -> None:
+        """Загружает сохранённые игры и активных игроков из базы."""
+        with closing(sqlite3.connect(self._path)) as conn:
+            for room_id, data in conn.execute(
+                "SELECT room_id, data FROM games"
+            ):
+                try:
+                    game = self._codec.load(data, event_handler)
+                except ValueError:
+                    logger.exception("Can`t load game {}", room_id)
+                    continue
+                self._games[room_id] = game
+                self._saved[room_id] = _save_key(game)
+
+            for user_id, room_id in conn.execute(
+                "SELECT user_id, room_id FROM players"
+            ):
+                if room_id in self._games:
+                    self._players[user_id] = room_id
+        if log.INFO:
+            logger.info("Loaded {} games from {}", len(self._games), self._path)
+
+    def add_game(self, game: "MauGame") -> None:
+        """Добавляет игру в хранилище."""
+        super().add_game(game)
+        self._removed_games.discard(game.room_id)
+        self.mark_dirty(game.room_id)
+
+    def remove_game(self, room_id: str) -> "MauGame":
+        """Удаляет игру из хранилища и возвращает её."""
+        game = super().remove_game(room_id)
+        self._saved.pop(room_id, None)
+        self._dirty_games.discard(room_id)
+        self._removed_games.add(room_id)
+        self._maybe_flush()
+        return game
+
+    def evict_game(self, room_id: str) -> "MauGame":
+        """Записывает игру в базу и убирает её из памяти."""
+        self._dirty_games.add(room_id)
+        self.flush()
+        self._dirty_games.discard(room_id)
+        return super().evict_game(room_id)
+
+    def add_player(self, user_id: str, room_id: str) -> None:
+        """Отмечает пользователя активным игроком комнаты."""
+        super().add_player(user_id, room_id)
+        self._dirty_players[user_id] = room_id
+        self._maybe_flush()
+
+    def remove_player(self, user_id: str) -> None:
+        """Снимает отметку активного игрока."""
+        super().remove_player(user_id)
+        self._dirty_players[user_id] = None
+        self._maybe_flush()
+
+    def mark_dirty(self, room_id: str) -> None:
+        """Отмечает игру для сохранения в следующем пакете."""
+        self._dirty_games.add(room_id)
+
+    def _maybe_flush(self) -> None:
+        if monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Передаёт все накопленные изменения на запись."""
+        self._last_flush = monotonic()
+        if not (
+            self._dirty_games or self._removed_games or self._dirty_players
+        ):
+            return
+
+        games = []
+        for room_id in list(self._dirty_games):
+            data = self._dump(room_id)
+            if data is not None:
+                games.append((room_id, data))
+
+        players = [(u, r) for u, r in self._dirty_players.items() if r]
+        removed_players = [u for u, r in self._dirty_players.items() if not r]
+        self._queue.put(
+            (games, list(self._removed_games), players, removed_players)
+        )
+        self._removed_games = set()
+        self._dirty_players = {}
+
+    def _dump(self, room_id: str) -> bytes | None:
+        game = self._games.get(room_id)
+        if game is None:
+            self._dirty_games.discard(room_id)
+            return None
+        # Ждать замок нельзя: вызывающий поток может держать замок
+        # другой игры, которую сейчас сохраняет её поток
+        if not game.lock.acquire(blocking=False):
+            return None
+        try:
+            key = _save_key(game)
+            if key == self._saved.get(room_id):
+                self._dirty_games.discard(room_id)
+                return None
+            self._saved[room_id] = key
+            return self._codec.dump(game)
+        finally:
+            game.lock.release()
+
+    def close(self) -> None:
+        """Записывает оставшиеся изменения и останавливает запись."""
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        conn = sqlite3.connect(self._path)
+        try:
+            while (batch := self._queue.get()) is not None:
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: _Batch) -> None:
+        games, removed_games, players, removed_players = batch
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO games VALUES (?, ?)", games
+                )
+                conn.executemany(
+                    "DELETE FROM games WHERE room_id = ?",
+                    [(r,) for r in removed_games],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO players VALUES (?, ?)", players
+                )
+                conn.executemany(
+                    "DELETE FROM players WHERE user_id = ?",
+                    [(u,) for u in removed_players],
+                )
+        except sqlite3.Error:
+            logger.exception("Can`t write {} games to storage", len(games))
+
+
+class ShardedStorage:
+    """Потокобезопасное хранилище, разбитое на шарды.
+
+    Комнаты распределяются по шардам по хешу ID комнаты.
+    Каждый шард - отдельное хранилище со своим замком, потому потоки,
+    работающие с комнатами разных шардов, не мешают друг другу.
+
+    Индекс активных игроков общий для всех шардов и защищён отдельным
+    замком, потому комната игрока всегда находится одним обращением.
+    Отметки игроков дополнительно передаются в шард их комнаты,
+    чтобы постоянные хранилища сохраняли их вместе с игрой.
+
+    ```py
+    storage = ShardedStorage(8, lambda i: SQLiteStorage(f"mau-{i}.db"))
+    ```
+
+    Args:
+        shards: Количество шардов.
+        factory: Создаёт хранилище шарда по его номеру.
+            По умолчанию шарды хранятся в памяти.
+
+    """
+
+    __slots__ = ("_shards", "_locks", "_players", "_players_lock")
+
+    def __init__(
+        self,
+        shards: int = 16,
+        factory: Callable[[int], SessionStorage] | None = None,
+    ) -> None:
+        if shards <= 0:
+            raise ValueError("Shards count must be positive")
+        factory = factory or _memory_shard
+        self._shards = [factory(i) for i in range(shards)]
+        self._locks = [Lock() for _ in range(shards)]
+        self._players: dict[str, str] = {}
+        self._players_lock = Lock()
+
+    def _shard(self, room_id: str) -> int:
+        # Хеш не зависит от процесса, чтобы шарды на диске совпадали
+        return crc32(room_id.encode()) % len(self._shards)
+
+    def load(self, event_handler: "EventHandler") -> None:
+        """Загружает ранее сохранённые игры всех шардов."""
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                shard.load(event_handler)
+                players = list(shard.players())
+            with self._players_lock:
+                self._players.update(players)
+
+    def get_game(self, room_id: str) -> "MauGame | None":
+        """Возвращает игру по ID комнаты."""
+        i = self._shard(room_id)
+        with self._locks[i]:
+            return self._shards[i].get_game(room_id)
+
+    def add_game(self, game: "MauGame") -> None:
+        """Добавляет игру в хранилище."""
+        i = self._shard(game.room_id)
+        with self._locks[i]:
+            self._shards[i].add_game(game)
+
+    def remove_game(self, room_id: str) -> "MauGame":
+        """Удаляет игру из хранилища и возвращает её."""
+        i = self._shard(room_id)
+        with self._locks[i]:
+            return self._shards[i].remove_game(room_id)
+
+    def evict_game(self, room_id: str) -> "MauGame":
+        """Убирает игру из памяти, сохраняя её копию, если она есть."""
+        i = self._shard(room_id)
+        with self._locks[i]:
+            return self._shards[i].evict_game(room_id)
+
+    def games(self) -> Iterator["MauGame"]:
+        """Проходится по всем играм хранилища.
+
+        Игры каждого шарда копируются под его замком.
+        """
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                games = list(shard.games())
+            yield from games
+
+    def get_player(self, user_id: str) -> str | None:
+        """Возвращает ID комнаты активного игрока."""
+        with self._players_lock:
+            return self._players.get(user_id)
+
+    def players(self) -> Iterator[tuple[str, str]]:
+        """Проходится по активным игрокам и их комнатам."""
+        with self._players_lock:
+            players = list(self._players.items())
+        yield from players
+
+    def add_player(self, user_id: str, room_id: str) -> None:
+        """Отмечает пользователя активным игроком комнаты."""
+        with self._players_lock:
+            self._players[user_id] = room_id
+        i = self._shard(room_id)
+        with self._locks[i]:
+            self._shards[i].add_player(user_id, room_id)
+
+    def remove_player(self, user_id: str) -> None:
+        """Снимает отметку активного игрока."""
+        with self._players_lock:
+            room_id = self._players.pop(user_id, None)
+        if room_id is None:
+            return
+        i = self._shard(room_id)
+        with self._locks[i]:
+            self._shards[i].remove_player(user_id)
+
+    def mark_dirty(self, room_id: str) -> None:
+        """Отмечает что игра в комнате была изменена."""
+        i = self._shard(room_id)
+        with self._locks[i]:
+            self._shards[i].mark_dirty(room_id)
+
+    def flush(self) -> None:
+        """Сохраняет накопленные изменения всех шардов."""
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                shard.flush()
+
+    def close(self) -> None:
+        """Сохраняет оставшиеся изменения и закрывает все шарды."""
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                shard.close()
+
+
+def _memory_shard(_: int) -> SessionStorage:
+    return MemoryStorage()
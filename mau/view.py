@@ -0,0 +1,243 @@
+"""Состояние игры для клиентов.
+
+События движка содержат живую игру, которую нельзя передать клиенту
+по сети.
+Здесь собирается то, что видит отдельный игрок: своя рука, число карт
+у остальных, верхняя карта, чей ход, направление, счётчик взятия,
+состояние игры и доступные действия.
+Карты передаются упакованными числами, см. `MauCard.pack`.
+
+Каждое состояние привязано к `MauGame.version`.
+`ViewSync` помнит несколько последних состояний каждого игрока,
+потому клиенту с версией N отправляются только изменения с неё.
+
+```py
+sync = ViewSync()
+update = sync.update(game, user_id, since=client_version)
+send(user_id, update)
+```
+"""
+
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, fields, replace
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
+
+from mau.deck.card import CardColor
+from mau.enums import GameState
+from mau.game.actions import NO_ACTIONS, LegalActions
+from mau.game.game import MauGame
+from mau.game.player_manager import GameReverse
+
+_T = TypeVar("_T")
+
+# Изменение списка: с какого индекса, сколько удалить, что вставить
+Splice = tuple[int, int, tuple[Any, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerView:
+    """Состояние игры глазами одного игрока.
+
+    - version: Версия игры `MauGame.version`.
+    - user_id: Чьими глазами видна игра.
+    - started: Идёт ли игра.
+    - state: Состояние игры.
+    - hand: Упакованные карты в руке игрока по порядку.
+    - players: ID игроков и число их карт в порядке ходов.
+    - cursor: Чей сейчас ход.
+    - reverse: Направление ходов.
+    - take_counter: Сколько карт предстоит взять.
+    - top: Упакованная верхняя карта колоды.
+    - wild_color: Дикий цвет колоды.
+    - actions: Доступные игроку действия.
+    """
+
+    version: int
+    user_id: str
+    started: bool
+    state: GameState
+    hand: tuple[int, ...]
+    players: tuple[tuple[str, int], ...]
+    cursor: str
+    reverse: GameReverse
+    take_counter: int
+    top: int | None
+    wild_color: CardColor | None
+    actions: LegalActions
+
+
+# Поля, которые передаются в изменениях
+_FIELDS = tuple(f.name for f in fields(PlayerView))[2:]
+# Поля-списки, которые передаются частичными изменениями
+_SEQUENCES = frozenset(("hand", "players"))
+
+
+@dataclass(frozen=True, slots=True)
+class ViewUpdate:
+    """Обновление состояния для клиента.
+
+    - base: Версия, к которой применяются изменения,
+      `None` если передано полное состояние.
+    - version: Версия после применения изменений.
+    - changes: Изменившиеся поля `PlayerView`.
+      Поля `hand` и `players` передаются как `Splice`.
+    """
+
+    base: int | None
+    version: int
+    changes: dict[str, Any]
+
+
+def player_view(game: MauGame, user_id: str) -> PlayerView:
+    """Собирает состояние игры глазами игрока.
+
+    Если пользователь не участвует в игре, его рука пуста.
+    """
+    player = game.pm.get_or_none(user_id)
+    return PlayerView(
+        version=game.version,
+        user_id=user_id,
+        started=game.started,
+        state=game.state,
+        hand=() if player is None else tuple(c.pack() for c in player.hand),
+        players=tuple((pl.user_id, len(pl.hand)) for pl in game.pm.iter()),
+        cursor=game.player.user_id if game.started else game.owner_id,
+        reverse=game.pm.reverse,
+        take_counter=game.take_counter,
+        top=game.deck.top.pack() if game.started else None,
+        wild_color=game.deck.wild_color if game.started else None,
+        actions=(NO_ACTIONS if player is None else game.legal_actions(player)),
+    )
+
+
+def splice(old: Sequence[_T], new: Sequence[_T]) -> Splice:
+    """Находит изменение, которое превращает один список в другой.
+
+    Общие начало и конец списков не передаются, потому взятие
+    или розыгрыш одной карты занимает одну короткую запись.
+    """
+    start = 0
+    end = min(len(old), len(new))
+    while start < end and old[start] == new[start]:
+        start += 1
+    tail = 0
+    while (
+        tail < end - start
+        and old[len(old) - 1 - tail] == new[len(new) - 1 - tail]
+    ):
+        tail += 1
+    return (start, len(old) - start - tail, tuple(new[start : len(new) - tail]))
+
+
+def diff(old: PlayerView, new: PlayerView) -> dict[str, Any]:
+    """Возвращает изменившиеся поля между двумя состояниями."""
+    res: dict[str, Any] = {}
+    for name in _FIELDS:
+        before = getattr(old, name)
+        after = getattr(new, name)
+        if before == after:
+            continue
+        res[name] = splice(before, after) if name in _SEQUENCES else after
+    return res
+
+
+def apply(view: PlayerView, update: ViewUpdate) -> PlayerView:
+    """Применяет обновление к состоянию, как это делает клиент.
+
+    Полное состояние заменяет все поля переданного состояния.
+    """
+    changes = dict(update.changes)
+    if update.base is None:
+        return replace(view, version=update.version, **changes)
+    if update.base != view.version:
+        raise ValueError("Update does not apply to this version")
+    for name in _SEQUENCES & changes.keys():
+        start, count, items = changes[name]
+        seq = list(getattr(view, name))
+        seq[start : start + count] = items
+        changes[name] = tuple(seq)
+    return replace(view, version=update.version, **changes)
+
+
+class _GameViews:
+    """Состояния игроков одной игры."""
+
+    __slots__ = ("seed", "players", "users")
+
+    def __init__(self, seed: int, players: frozenset[str]) -> None:
+        self.seed = seed
+        self.players = players
+        self.users: dict[str, deque[PlayerView]] = {}
+
+
+class ViewSync:
+    """Рассылка состояния игры по версиям.
+
+    Помнит последние `history` состояний каждого игрока.
+    Если версии клиента среди них нет, отправляется полное состояние.
+    Состояния новой игры в той же комнате не смешиваются со старыми:
+    игры различаются по начальному значению генератора.
+    Состояния привязаны к самой игре и уходят вместе с ней из памяти,
+    когда комната удаляется или выгружается.
+    Состояния вышедших игроков забываются при следующем обновлении.
+    Как и сама игра, вызывается под замком игры.
+
+    Args:
+        history: Сколько последних состояний помнить для игрока.
+
+    """
+
+    __slots__ = ("history", "_views")
+
+    def __init__(self, history: int = 8) -> None:
+        self.history = history
+        self._views: WeakKeyDictionary[MauGame, _GameViews] = (
+            WeakKeyDictionary()
+        )
+
+    def _history(self, game: MauGame, user_id: str) -> deque[PlayerView]:
+        players = frozenset(pl.user_id for pl in game.pm.iter_all())
+        entry = self._views.get(game)
+        if entry is None or entry.seed != game.rng.seed:
+            entry = _GameViews(game.rng.seed, players)
+            self._views[game] = entry
+        elif entry.players != players:
+            for left in entry.players - players:
+                entry.users.pop(left, None)
+            entry.players = players
+        views = entry.users.get(user_id)
+        if views is None:
+            views = entry.users[user_id] = deque(maxlen=self.history)
+        return views
+
+    def view(self, game: MauGame, user_id: str) -> PlayerView:
+        """Возвращает текущее состояние игры глазами игрока."""
+        views = self._history(game, user_id)
+        if views and views[-1].version == game.version:
+            return views[-1]
+        view = player_view(game, user_id)
+        views.append(view)
+        return view
+
+    def update(
+        self, game: MauGame, user_id: str, since: int | None = None
+    ) -> ViewUpdate:
+        """Возвращает обновление для клиента с версией `since`."""
+        view = self.view(game, user_id)
+        if since is not None:
+            for base in self._history(game, user_id):
+                if base.version == since:
+                    return ViewUpdate(since, view.version, diff(base, view))
+        return ViewUpdate(
+            None, view.version, {name: getattr(view, name) for name in _FIELDS}
+        )
+
+    def forget(self, room_id: str, user_id: str | None = None) -> None:
+        """Забывает состояния игрока или всех игроков комнаты."""
+        for game in [g for g in self._views if g.room_id == room_id]:
+            if user_id is None:
+                del self._views[game]
+            else:
+                self._views[game].users.pop(user_id, None)
@@ -31,6 +31,13 @@ def type_check_cur(session: nox.Session) -> None:
     session.run("mypy", "-p", "mau")
 
 
+@nox.session(python=["3.12"], tags=["cur"])
+def tests_cur(session: nox.Session) -> None:
+    """Запускает тесты движка."""
+    session.run("uv", "sync", "--active")
+    session.run("pytest", "-q", "tests")
+
+
 # Full check
 # ==========
 
@@ -47,3 +54,32 @@ def type_check(session: nox.Session) -> None:
     """Проверка статической типизации при помощи mypy."""
     session.run("uv", "sync", "--active")
     session.run("mypy", "-p", "mau")
+
+
+@nox.session(python=["3.11", "3.12", "3.13"], tags=["full"])
+def tests(session: nox.Session) -> None:
+    """Запускает тесты движка."""
+    session.run("uv", "sync", "--active")
+    session.run("pytest", "-q", "tests")
+
+
+# Benchmarks
+# ==========
+
+
+@nox.session(python=["3.12"], tags=["bench"])
+def bench(session: nox.Session) -> None:
+    """Сравнивает производительность движка с сохранёнными замерами.
+
+    Завершается с ошибкой, если какой-то замер стал заметно медленнее.
+    Обновить базовые замеры: `nox -s bench -- --save benchmarks/baseline.json`.
+    """
+    session.run("uv", "sync", "--active", "--extra", "batch")
+    session.run(
+        "python",
+        "-m",
+        "benchmarks",
+        "--compare",
+        "benchmarks/baseline.json",
+        *session.posargs,
+    )
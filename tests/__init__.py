@@ -0,0 +1 @@
+"""Тесты движка Mau."""
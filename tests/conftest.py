@@ -0,0 +1,56 @@
+"""Общие заготовки для тестов."""
+
+from typing import Any
+
+import pytest
+
+from mau.deck.presets import CLASSIC
+from mau.events import Event
+from mau.game.game import MauGame
+from mau.game.player import BaseUser
+from mau.game.player_manager import PlayerManager
+from mau.session import SessionManager
+
+
+class NullHandler:
+    """Обработчик, который запоминает все события."""
+
+    def __init__(self) -> None:
+        self.events: list[Event[Any]] = []
+
+    def dispatch(self, event: Event[Any]) -> None:
+        """Запоминает событие."""
+        self.events.append(event)
+
+
+def _users(players: int) -> list[BaseUser]:
+    return [BaseUser(f"u{i}", f"User {i}", f"user{i}") for i in range(players)]
+
+
+def new_game(players: int = 3, seed: int = 1, rules: int = 0) -> MauGame:
+    """Создаёт и начинает игру с несколькими игроками."""
+    users = _users(players)
+    game = MauGame(PlayerManager(), NullHandler(), "room", users[0], seed)
+    for user in users[1:]:
+        game.join_player(user)
+    game.rules.state = rules
+    game.start(CLASSIC.deck())
+    return game
+
+
+@pytest.fixture
+def game() -> MauGame:
+    """Начатая игра на трёх игроков."""
+    return new_game()
+
+
+@pytest.fixture
+def sm() -> SessionManager[NullHandler]:
+    """Менеджер сессий с начатой игрой на трёх игроков в комнате `room`."""
+    users = _users(3)
+    sm = SessionManager(NullHandler())
+    game = sm.create("room", users[0], seed=1)
+    for user in users[1:]:
+        sm.join("room", user)
+    game.start(CLASSIC.deck())
+    return sm
@@ -0,0 +1,56 @@
+"""Проверки доступных действий игрока."""
+
+import pytest
+
+from mau import commands
+from mau.deck.card import CardColor, MauCard
+from mau.deck.presets import CLASSIC, TAKE, WILD_TAKE
+from mau.enums import GameState
+from mau.game.game import MauGame
+from mau.game.hand import Hand
+from mau.session import SessionManager
+from tests.conftest import NullHandler
+
+
+def _card(behavior: object, color: CardColor | None = None) -> MauCard:
+    return next(
+        card
+        for card in CLASSIC.deck().cards
+        if card.behavior is behavior and color in (None, card.color)
+    )
+
+
+def test_bluff_only_on_pending_wild_take(game: MauGame) -> None:
+    wild = game.player
+    wild.hand = Hand([_card(WILD_TAKE), _card(TAKE, CardColor.RED)])
+    game.process_turn(wild, 0)
+    wild.choose_color(CardColor.RED)
+
+    taker = game.player
+    assert game.legal_actions(taker).check_bluff
+    taker.take_cards()
+    assert game.bluff_state is None
+    taker.end_turn()
+
+    take = game.player
+    take.hand = Hand([_card(TAKE, CardColor.RED), _card(TAKE, CardColor.RED)])
+    game.process_turn(take, 0)
+
+    assert game.state == GameState.NEXT
+    assert game.take_counter > 0
+    assert not game.legal_actions(game.player).check_bluff
+
+
+def test_check_bluff_command_follows_legal_actions(
+    sm: SessionManager[NullHandler],
+) -> None:
+    game = sm.room("room")
+    assert game is not None
+
+    take = game.player
+    take.hand = Hand([_card(TAKE, game.deck.top.color), _card(TAKE)])
+    game.process_turn(take, 0)
+    assert game.take_counter > 0
+
+    with pytest.raises(ValueError, match="Nothing to check"):
+        commands.check_bluff(sm, "room", game.player.user_id)
@@ -0,0 +1,41 @@
+"""Проверки обработчиков событий."""
+
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+from mau.deck.presets import CLASSIC
+from mau.events import BufferedEventHandler, Event
+from mau.game.game import MauGame
+from mau.game.player import BaseUser
+from mau.game.player_manager import PlayerManager
+
+
+class BatchRecorder:
+    """Асинхронный обработчик, который запоминает пакеты."""
+
+    def __init__(self) -> None:
+        self.batches: list[Sequence[Event[Any]]] = []
+
+    async def dispatch_batch(self, events: Sequence[Event[Any]]) -> None:
+        """Запоминает пакет событий."""
+        self.batches.append(events)
+
+
+def test_end_turn_is_one_batch() -> None:
+    recorder = BatchRecorder()
+    handler = BufferedEventHandler(recorder)
+    users = [BaseUser(f"u{i}", f"User {i}", f"user{i}") for i in range(3)]
+    game = MauGame(PlayerManager(), handler, "room", users[0], 1)
+    for user in users[1:]:
+        game.join_player(user)
+    game.start(CLASSIC.deck())
+    asyncio.run(handler.flush())
+    recorder.batches.clear()
+
+    # Последняя карта: игрок выходит из игры, а ход переходит дальше
+    game.player.hand.clear()
+    game.player.end_turn()
+    asyncio.run(handler.flush())
+    assert len(recorder.batches) == 1
+    assert len(recorder.batches[0]) > 1
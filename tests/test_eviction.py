@@ -0,0 +1,23 @@
+"""Проверки выгрузки неактивных комнат."""
+
+from mau.eviction import Eviction, room_size
+from mau.game.player import BaseUser
+from mau.session import SessionManager
+from tests.conftest import NullHandler
+
+
+def test_size_follows_room() -> None:
+    eviction = Eviction(max_bytes=1 << 20)
+    sm = SessionManager(NullHandler(), eviction=eviction)
+    sm.create("room", BaseUser("u0", "User 0", "user0"))
+    sm.sweep()
+    before = eviction.total_bytes
+
+    for i in range(1, 4):
+        sm.join("room", BaseUser(f"u{i}", f"User {i}", f"user{i}"))
+    game = sm.room("room")
+    assert game is not None
+    sm.sweep()
+
+    assert eviction.total_bytes == room_size(game)
+    assert eviction.total_bytes > before
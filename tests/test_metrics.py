@@ -0,0 +1,43 @@
+"""Проверки метрик движка."""
+
+from collections.abc import Iterator
+
+import pytest
+
+from mau import metrics
+from tests.conftest import new_game
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics() -> Iterator[None]:
+    metrics.disable()
+    metrics.reset()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def test_toggle_single_operation() -> None:
+    metrics.enable("game.next_turn")
+    assert metrics.enabled("game.next_turn")
+    assert not metrics.enabled("game.process_turn")
+
+    game = new_game()
+    game.next_turn()
+    game.next_turn()
+
+    counters = metrics.snapshot().counters
+    assert counters["game.next_turn.calls"] == 2
+    assert counters["game.start.calls"] == 0
+    text = metrics.render()
+    assert "mau_game_next_turn_calls_total 2" in text
+    assert "mau_game_next_turn_seconds_count 2" in text
+
+    metrics.disable("game.next_turn")
+    game.next_turn()
+    assert metrics.snapshot().counters["game.next_turn.calls"] == 2
+
+
+def test_unknown_operation() -> None:
+    with pytest.raises(ValueError, match="Unknown metrics"):
+        metrics.enable("game.nope")
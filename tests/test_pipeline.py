@@ -0,0 +1,27 @@
+"""Проверки хода, собранного под набор правил."""
+
+from mau.enums import GameState
+from mau.game.pipeline import build_pipeline
+from mau.rules import GameRules
+from tests.conftest import new_game
+
+
+def test_pipeline_built_on_start() -> None:
+    game = new_game(rules=GameRules.shotgun)
+    assert game.pipeline is build_pipeline(GameRules.shotgun)
+
+    # Правила, изменённые во время игры, действуют со следующей игры
+    game.rules.toggle(GameRules.take_until_cover)
+    assert game.pipeline.rules == GameRules.shotgun
+
+
+def test_shotgun_take_step() -> None:
+    game = new_game(rules=GameRules.shotgun)
+    game.take_counter = 4
+    game.take_cards()
+    assert game.state == GameState.SHOTGUN
+
+    game = new_game()
+    game.take_counter = 4
+    game.take_cards()
+    assert game.state != GameState.SHOTGUN
@@ -0,0 +1,32 @@
+"""Проверки колеса таймеров."""
+
+from mau.scheduler import TimerWheel
+
+
+def test_schedule_after_lagging_advance() -> None:
+    wheel = TimerWheel(resolution=0.1, size=16)
+    origin = wheel._origin
+    fired: list[str] = []
+    wheel.advance(origin + 0.5)
+
+    # Колесо отстало на 10 секунд, таймер отсчитывается от текущего времени
+    wheel.schedule("turn", 1, lambda: fired.append("turn"), now=origin + 10)
+    wheel.advance(origin + 10.55)
+    assert fired == []
+    wheel.advance(origin + 11.05)
+    assert fired == ["turn"]
+
+
+def test_far_timers_fire_on_time() -> None:
+    wheel = TimerWheel(resolution=0.1, size=16)
+    origin = wheel._origin
+    fired: list[int] = []
+    for delay in (0.5, 3, 30):
+        wheel.schedule(delay, delay, lambda d=delay: fired.append(d), origin)
+
+    wheel.advance(origin + 2.95)
+    assert fired == [0.5]
+    wheel.advance(origin + 29.95)
+    assert fired == [0.5, 3]
+    wheel.advance(origin + 30.05)
+    assert fired == [0.5, 3, 30]
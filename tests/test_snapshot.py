@@ -0,0 +1,73 @@
+"""Проверки снимков игры."""
+
+from copy import deepcopy
+from random import Random
+
+from mau.game.game import MauGame
+from mau.session import SessionManager
+from mau.sim.players import RandomPlayer, ScriptedPlayer
+from mau.sim.runner import RuleStats, play_turn
+from tests.conftest import NullHandler
+
+Bots = dict[str, ScriptedPlayer]
+
+
+def _bots(game: MauGame) -> Bots:
+    return {
+        pl.user_id: RandomPlayer(Random(i))
+        for i, pl in enumerate(game.pm.iter_all())
+    }
+
+
+def _turn(sm: SessionManager[NullHandler], game: MauGame, bots: Bots) -> None:
+    play_turn(sm, game, bots[game.player.user_id], RuleStats(0))
+
+
+def _state(game: MauGame) -> tuple[object, ...]:
+    return (
+        game.version,
+        game.state,
+        game.rng.state,
+        game.deck.palette,
+        game.deck.top,
+        [list(pl.hand) for pl in game.pm.iter_all()],
+    )
+
+
+def test_snapshot_size_is_flat(sm: SessionManager[NullHandler]) -> None:
+    game = sm.room("room")
+    assert game is not None
+    bots = _bots(game)
+    sizes = []
+    while game.started:
+        _turn(sm, game, bots)
+        sizes.append(len(game.snapshot()))
+
+    # Снимок не растёт вместе с журналом команд
+    assert len(game.journal.data) > 1000
+    assert max(sizes) - sizes[0] < 100
+
+
+def test_restore_long_game(sm: SessionManager[NullHandler]) -> None:
+    game = sm.room("room")
+    assert game is not None
+    bots = _bots(game)
+    for _ in range(60):
+        _turn(sm, game, bots)
+
+    data = game.snapshot()
+    restored = MauGame.restore(data, NullHandler())
+    restored_bots = deepcopy(bots)
+    # Палитра сохраняется, а не собирается по оставшимся картам
+    assert restored.deck._palette == game.deck.palette
+    assert _state(restored) == _state(game)
+    while game.started:
+        _turn(sm, game, bots)
+        _turn(sm, restored, restored_bots)
+        assert _state(restored) == _state(game)
+    assert not restored.started
+
+    # Журнал восстановленной игры повторяется поверх снимка
+    replayed = MauGame.replay(bytes(restored.journal), NullHandler(), data)
+    assert _state(replayed) == _state(restored)
+    assert bytes(replayed.journal) == bytes(restored.journal)
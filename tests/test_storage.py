@@ -0,0 +1,34 @@
+"""Проверки хранилищ сессий."""
+
+from pathlib import Path
+
+from mau.game.player import BaseUser
+from mau.rules import GameRules
+from mau.session import SessionManager
+from mau.storage import SQLiteStorage
+from tests.conftest import NullHandler
+
+
+def test_sqlite_saves_lobby_settings(tmp_path: Path) -> None:
+    path = tmp_path / "mau.db"
+    storage = SQLiteStorage(path)
+    sm = SessionManager(NullHandler(), storage)
+    sm.create("room", BaseUser("u0", "User 0", "user0"))
+    storage.flush()
+
+    # Настройки лобби меняются без новой версии игры
+    game = sm.room("room")
+    assert game is not None
+    game.rules.toggle(GameRules.shotgun)
+    game.start_cards = 5
+    game.open = False
+    storage.close()
+
+    loaded = SQLiteStorage(path)
+    loaded.load(NullHandler())
+    restored = loaded.get_game("room")
+    loaded.close()
+    assert restored is not None
+    assert restored.rules.state == GameRules.shotgun
+    assert restored.start_cards == 5
+    assert not restored.open
@@ -0,0 +1,23 @@
+"""Проверки состояния игры для клиентов."""
+
+import gc
+
+from mau.view import ViewSync
+from tests.conftest import new_game
+
+
+def test_views_follow_game() -> None:
+    sync = ViewSync()
+    game = new_game()
+    users = [pl.user_id for pl in game.pm.iter()]
+    for user_id in users:
+        sync.update(game, user_id)
+    assert len(sync._views[game].users) == len(users)
+
+    game.pm.remove(users[-1])
+    sync.update(game, users[0])
+    assert users[-1] not in sync._views[game].users
+
+    del game
+    gc.collect()
+    assert len(sync._views) == 0